@@ -1,6 +1,15 @@
 """Configuration of Blog Admin panel"""
 from django.contrib import admin
 
+from core.changelist import LargeTableAdminMixin
+
 from .models import Post
 
-admin.site.register(Post)
+
+@admin.register(Post)
+class PostAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    """Configure Post panel"""
+
+    autocomplete_fields = ("tags", "startups")
+    list_display = ("title", "pub_date")
+    search_fields = ("title__startswith", "slug__exact")
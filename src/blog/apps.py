@@ -3,3 +3,15 @@ from django.apps import AppConfig
 
 class BlogConfig(AppConfig):
     name = "blog"
+
+    def ready(self):
+        # connect the signals keeping it current
+        from core.changes import track_changes
+
+        from . import (  # noqa: F401
+            sitemaps,
+            syndication,
+            tag_index,
+        )
+
+        track_changes(self.get_model("Post"), "post")
@@ -0,0 +1,50 @@
+"""Stream new Posts to dashboards; see core.events"""
+from django.db.models import Prefetch
+
+from core.events import register_stream
+from organizer.catalog import catalog
+from organizer.models import Startup
+
+from .models import Post
+
+
+@register_stream("post")
+def describe_posts(pks):
+    """Return the event data of Posts, by primary key"""
+    posts = (
+        Post.objects.filter(pk__in=pks)
+        .defer("text", "text_html")
+        .prefetch_related(
+            Prefetch(
+                "startups",
+                queryset=Startup.objects.only("slug"),
+            )
+        )
+    )
+    tagged = {}
+    for post_pk, tag_pk in (
+        Post.tags.through.objects.filter(post_id__in=pks)
+        .values_list("post_id", "tag_id")
+        .iterator()
+    ):
+        tagged.setdefault(post_pk, []).append(tag_pk)
+    snapshot = catalog.snapshot()
+    return {
+        post.pk: {
+            "title": post.title,
+            "excerpt": post.excerpt,
+            "pub_date": post.pub_date,
+            "url": post.get_absolute_url(),
+            "startups": [
+                startup.slug
+                for startup in post.startups.all()
+            ],
+            "tags": [
+                entry.slug
+                for entry in snapshot.tags(
+                    tagged.get(post.pk, [])
+                )
+            ],
+        }
+        for post in posts
+    }
@@ -0,0 +1,33 @@
+"""Factories to create Blog data in tests
+
+factory_boy Documentation:
+https://factoryboy.readthedocs.io/en/latest/
+"""
+from factory import Faker, Sequence, post_generation
+from factory.django import DjangoModelFactory
+
+from .models import Post
+
+
+class PostFactory(DjangoModelFactory):
+    """Create Posts; pass tags=[...] or startups=[...]"""
+
+    title = Faker("sentence", nb_words=4)
+    slug = Sequence(lambda n: f"post-{n}")
+    text = Faker("text")
+    pub_date = Faker("date_this_year")
+
+    class Meta:
+        model = Post
+
+    @post_generation
+    def tags(self, create, extracted, **kwargs):
+        """Relate the Tags passed in, if any"""
+        if create and extracted:
+            self.tags.add(*extracted)
+
+    @post_generation
+    def startups(self, create, extracted, **kwargs):
+        """Relate the Startups passed in, if any"""
+        if create and extracted:
+            self.startups.add(*extracted)
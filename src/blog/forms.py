@@ -1,6 +1,9 @@
 """Forms for the Blog app"""
 from django.forms import ModelForm
 
+from core.widgets import AutocompleteSelectMultiple
+from organizer.catalog import TagMultipleChoiceField
+
 from .models import Post
 
 
@@ -10,3 +13,12 @@ class PostForm(ModelForm):
     class Meta:
         model = Post
         fields = "__all__"
+        field_classes = {"tags": TagMultipleChoiceField}
+        widgets = {
+            "tags": AutocompleteSelectMultiple(
+                "tag_autocomplete"
+            ),
+            "startups": AutocompleteSelectMultiple(
+                "startup_autocomplete"
+            ),
+        }
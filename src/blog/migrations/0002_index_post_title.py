@@ -0,0 +1,18 @@
+# Generated by Django 2.1.15 on 2026-10-19 14:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("blog", "0001_initial")]
+
+    operations = [
+        migrations.AlterField(
+            model_name="post",
+            name="title",
+            field=models.CharField(
+                db_index=True, max_length=63
+            ),
+        )
+    ]
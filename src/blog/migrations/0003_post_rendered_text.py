@@ -0,0 +1,33 @@
+# Generated by Django 2.1.15 on 2026-10-19 15:10
+
+from django.db import migrations
+
+import core.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("blog", "0002_index_post_title")]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="excerpt",
+            field=core.text.ExcerptField(
+                blank=True,
+                default="",
+                editable=False,
+                source="text",
+            ),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="text_html",
+            field=core.text.HTMLField(
+                blank=True,
+                default="",
+                editable=False,
+                source="text",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.1.15 on 2026-10-19 15:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("blog", "0003_post_rendered_text")]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["-pub_date", "title"],
+                name="blog_post_list_idx",
+            ),
+        )
+    ]
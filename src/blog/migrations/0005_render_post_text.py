@@ -0,0 +1,21 @@
+# Generated by Django 2.1.15 on 2026-10-19 19:40
+
+from django.db import migrations
+
+from core.text import render_rows
+
+
+def render_posts(apps, schema_editor):
+    """Fill the HTML and excerpts of existing posts"""
+    render_rows(apps.get_model("blog", "Post"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("blog", "0004_index_post_list")]
+
+    operations = [
+        migrations.RunPython(
+            render_posts, migrations.RunPython.noop
+        )
+    ]
@@ -18,6 +18,7 @@ from datetime import date
 from django.db.models import (
     CharField,
     DateField,
+    Index,
     ManyToManyField,
     Model,
     SlugField,
@@ -25,19 +26,22 @@ from django.db.models import (
 )
 from django.urls import reverse
 
+from core.text import ExcerptField, HTMLField
 from organizer.models import Startup, Tag
 
 
 class Post(Model):
     """Blog post; news article about startups"""
 
-    title = CharField(max_length=63)
+    title = CharField(max_length=63, db_index=True)
     slug = SlugField(
         max_length=63,
         help_text="A label for URL config",
         unique_for_month="pub_date",
     )
     text = TextField()
+    text_html = HTMLField("text")
+    excerpt = ExcerptField("text")
     pub_date = DateField(
         "date published", default=date.today
     )
@@ -48,6 +52,13 @@ class Post(Model):
 
     class Meta:
         get_latest_by = "pub_date"
+        indexes = [
+            # PostList pages in this order
+            Index(
+                fields=["-pub_date", "title"],
+                name="blog_post_list_idx",
+            )
+        ]
         ordering = ["-pub_date", "title"]
         verbose_name = "blog post"
 
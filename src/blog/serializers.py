@@ -13,20 +13,19 @@ from rest_framework.serializers import (
     SerializerMethodField,
 )
 
+from core.serializers import TimedSerializerMixin
 from organizer.models import Startup, Tag
+from organizer.serializers import TagHyperlinkField
 
 from .models import Post
 
 
-class PostSerializer(ModelSerializer):
+class PostSerializer(TimedSerializerMixin, ModelSerializer):
     """Serialize Post data"""
 
     url = SerializerMethodField()
-    tags = HyperlinkedRelatedField(
-        lookup_field="slug",
-        many=True,
-        queryset=Tag.objects.all(),
-        view_name="api-tag-detail",
+    tags = TagHyperlinkField(
+        many=True, queryset=Tag.objects.all()
     )
     startups = HyperlinkedRelatedField(
         lookup_field="slug",
@@ -37,7 +36,7 @@ class PostSerializer(ModelSerializer):
 
     class Meta:
         model = Post
-        exclude = ("id",)
+        exclude = ("id", "text_html")
 
     def get_url(self, post):
         """Return full API URL for serialized POST object"""
@@ -50,3 +49,10 @@ class PostSerializer(ModelSerializer):
             ),
             request=self.context["request"],
         )
+
+
+class PostListSerializer(PostSerializer):
+    """Serialize Post data for lists: the excerpt, no text"""
+
+    class Meta(PostSerializer.Meta):
+        exclude = ("id", "text", "text_html")
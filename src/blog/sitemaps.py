@@ -0,0 +1,24 @@
+"""The pages of Posts, listed in the sitemap; see core.sitemaps"""
+from core.sitemaps import Section, register_section
+
+from .models import Post
+
+
+@register_section
+class PostSection(Section):
+    """Each Post's page, dated with its publication"""
+
+    name = "post"
+    model = Post
+    url_name = "post_detail"
+    url_kwargs = ("year", "month", "slug")
+    fields = ("pub_date", "slug")
+
+    def arguments(self, row):
+        """Return year, month and slug of a Post row"""
+        _pk, pub_date, slug = row
+        return (pub_date.year, pub_date.month, slug)
+
+    def lastmod(self, row):
+        """Date the page with the Post's publication"""
+        return row[1]
@@ -0,0 +1,92 @@
+"""RSS and Atom feeds of Posts, site-wide and by Tag
+
+Feeds are cached until a Post, its Tags or a Tag change; see
+core.syndication.
+"""
+from django.http import Http404
+from django.urls import reverse
+
+from core.syndication import (
+    AtomFeedMixin,
+    CachedFeed,
+    bump_on_change,
+    pubdate,
+)
+from organizer.catalog import catalog
+from organizer.models import Tag
+
+from .models import Post
+
+VERSION = "feeds:posts"
+
+
+def newest(posts, count):
+    """Return the newest count posts, without their text"""
+    return posts.defer("text", "text_html").order_by(
+        "-pub_date", "title"
+    )[:count]
+
+
+class PostFeed(CachedFeed):
+    """The newest Posts"""
+
+    version = VERSION
+    title = "Startup Organizer Blog"
+    description = "News about startups"
+
+    def link(self):
+        """Link to the list of Posts"""
+        return reverse("post_list")
+
+    def items(self):
+        """Load the newest Posts"""
+        return newest(Post.objects.all(), self.max_items)
+
+    def item_title(self, item):
+        """Title each item after its Post"""
+        return item.title
+
+    def item_description(self, item):
+        """Describe each item with its excerpt"""
+        return item.excerpt
+
+    def item_pubdate(self, item):
+        """Date each item with its Post"""
+        return pubdate(item.pub_date)
+
+
+class TagPostFeed(PostFeed):
+    """The newest Posts with a Tag"""
+
+    def get_object(self, request, slug):
+        """Find the Tag in the catalog"""
+        entry = catalog.snapshot().by_slug.get(slug)
+        if entry is None:
+            raise Http404("No Tag matches the given query.")
+        return entry
+
+    def title(self, obj):
+        """Title the feed after the Tag"""
+        return f"Startup Organizer Blog: {obj.name}"
+
+    def link(self, obj):
+        """Link to the Tag's page"""
+        return obj.url
+
+    def items(self, obj):
+        """Load the newest Posts with the Tag"""
+        return newest(
+            Post.objects.filter(tags=obj.pk), self.max_items
+        )
+
+
+class AtomPostFeed(AtomFeedMixin, PostFeed):
+    """The newest Posts, in Atom"""
+
+
+class AtomTagPostFeed(AtomFeedMixin, TagPostFeed):
+    """The newest Posts with a Tag, in Atom"""
+
+
+bump_on_change(VERSION, Post, relations=["tags"])
+bump_on_change(VERSION, Tag)
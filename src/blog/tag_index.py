@@ -0,0 +1,9 @@
+"""Filter blog Posts by their Tags in memory
+
+See organizer.tag_index.
+"""
+from organizer.tag_index import TagIndex
+
+from .models import Post
+
+post_index = TagIndex(Post)
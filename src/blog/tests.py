@@ -1,3 +1,254 @@
-from django.test import TestCase
+"""Tests for the Blog App"""
+from importlib import import_module
+from io import StringIO
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.testing import QueryBudgetMixin
+from organizer.factories import StartupFactory, TagFactory
+
+from .factories import PostFactory
+from .forms import PostForm
+from .models import Post
+
+JSON = {"HTTP_ACCEPT": "application/json"}
+
+
+# count queries with a warm Tag catalog, as in production
+@override_settings(TAG_CATALOG_MAX_AGE=60)
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Check Blog views avoid N+1 queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a Post with a Tag and a Startup"""
+        cls.post = PostFactory(
+            tags=[TagFactory()], startups=[StartupFactory()]
+        )
+        cls.user = get_user_model().objects.create_user(
+            "budget", password="s3cr3t!!"
+        )
+
+    def grow(self):
+        """Add Posts, and Tags and Startups to Posts"""
+        tags = TagFactory.create_batch(3)
+        startups = StartupFactory.create_batch(3)
+        self.post.tags.add(*tags)
+        self.post.startups.add(*startups)
+        PostFactory.create_batch(
+            3, tags=tags, startups=startups
+        )
+
+    def post_api_url(self):
+        """Return the API detail URL of the Post"""
+        return reverse(
+            "api-post-detail",
+            kwargs={
+                "year": self.post.pub_date.year,
+                "month": self.post.pub_date.month,
+                "slug": self.post.slug,
+            },
+        )
+
+    def test_post_views(self):
+        """Display Posts in constant queries"""
+        self.assert_query_budget(1, reverse("post_list"))
+        self.assert_query_budget(
+            3, self.post.get_absolute_url()
+        )
+
+    def test_form_views(self):
+        """Display forms in constant queries"""
+        self.client.force_login(self.user)
+        self.assert_query_budget(2, reverse("post_create"))
+        self.assert_query_budget(
+            7, self.post.get_update_url()
+        )
+
+    def test_admin_changelist(self):
+        """List Posts in the admin in constant queries"""
+        self.client.force_login(
+            get_user_model().objects.create_superuser(
+                "admin", "admin@example.com", "s3cr3t!!"
+            )
+        )
+        self.assert_query_budget(
+            5, reverse("admin:blog_post_changelist")
+        )
+
+    def test_post_api(self):
+        """List and retrieve Posts in constant queries"""
+        self.assert_query_budget(
+            3, reverse("api-post-list"), **JSON
+        )
+        self.assert_query_budget(
+            3, self.post_api_url(), **JSON
+        )
+
+
+class PostFormTests(TestCase):
+    """Check PostForm handles many Tags and Startups"""
+
+    def test_validate_submitted_pks(self):
+        """Check Tags and Startups with one query each"""
+        tags = TagFactory.create_batch(3)
+        startups = StartupFactory.create_batch(3)
+        data = {
+            "title": "News",
+            "slug": "news",
+            "text": "Text",
+            "pub_date": "2018-01-01",
+            "tags": [tag.pk for tag in tags[:2]],
+            "startups": [startups[0].pk],
+        }
+        form = PostForm(data)
+        # one more query checks the slug is unique_for_month
+        with self.assertNumQueries(3):
+            self.assertTrue(form.is_valid())
+        self.assertFalse(
+            PostForm(
+                dict(data, tags=[tags[0].pk, 0])
+            ).is_valid()
+        )
+
+    def test_render_selected_only(self):
+        """Render the selected Tags, not every Tag"""
+        tags = TagFactory.create_batch(3)
+        html = str(PostForm(initial={"tags": [tags[1].pk]}))
+        self.assertIn(tags[1].name, html)
+        self.assertNotIn(tags[0].name, html)
+        self.assertIn(reverse("tag_autocomplete"), html)
+
+
+class RenderedTextTests(TestCase):
+    """Check Post HTML and excerpts are stored"""
+
+    def test_computed_on_save(self):
+        """Render text and keep twenty words on save"""
+        words = " ".join(f"w{n}" for n in range(30))
+        post = PostFactory(text=f"<b>Hi</b>\n\n{words}")
+        self.assertEqual(
+            post.text_html,
+            "<p>&lt;b&gt;Hi&lt;/b&gt;</p>\n\n"
+            f"<p>{words}</p>",
+        )
+        self.assertEqual(
+            post.excerpt,
+            " ".join(["<b>Hi</b>"] + words.split()[:19])
+            + " …",
+        )
+
+    def test_lists_skip_text(self):
+        """List Posts without loading their text"""
+        PostFactory()
+        for url, headers in (
+            (reverse("post_list"), {}),
+            (reverse("api-post-list"), JSON),
+        ):
+            with CaptureQueriesContext(
+                connection
+            ) as queries:
+                response = self.client.get(url, **headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(
+                any(
+                    '"text"' in query["sql"]
+                    for query in queries.captured_queries
+                ),
+                url,
+            )
+
+    def test_backfill(self):
+        """Render rows changed without save()"""
+        post = PostFactory()
+        Post.objects.update(text="Updated", text_html="")
+        call_command("render_text", stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, "<p>Updated</p>")
+        self.assertEqual(post.excerpt, "Updated")
+
+    def test_migration(self):
+        """Render existing posts when migrating"""
+        post = PostFactory(text="Existing")
+        Post.objects.update(text_html="", excerpt="")
+        import_module(
+            "blog.migrations.0005_render_post_text"
+        ).render_posts(apps, None)
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, "<p>Existing</p>")
+        self.assertEqual(post.excerpt, "Existing")
+
+
+class FeedTests(TransactionTestCase):
+    """Check Post feeds are cached until Posts change"""
+
+    def test_newest_posts(self):
+        """List the newest Posts only"""
+        PostFactory.create_batch(21)
+        response = self.client.get(reverse("post_feed"))
+        self.assertEqual(
+            response.content.count(b"<item>"), 20
+        )
+        response = self.client.get(
+            reverse("post_atom_feed")
+        )
+        self.assertEqual(
+            response.content.count(b"<entry>"), 20
+        )
+
+    def test_not_modified(self):
+        """Answer 304 until a Post changes"""
+        post = PostFactory(title="First")
+        url = reverse("post_feed")
+        response = self.client.get(url)
+        self.assertContains(response, "First")
+        with self.assertNumQueries(1):
+            cached = self.client.get(url)
+        self.assertEqual(cached.content, response.content)
+        etag = response["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                url, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            url,
+            HTTP_IF_MODIFIED_SINCE=response[
+                "Last-Modified"
+            ],
+        )
+        self.assertEqual(response.status_code, 304)
+        post.title = "Renamed"
+        post.save()
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertContains(response, "Renamed")
+
+    def test_tag_feed(self):
+        """List the Posts of a Tag"""
+        tag = TagFactory(name="django")
+        PostFactory(title="Tagged", tags=[tag])
+        PostFactory(title="Other")
+        url = reverse(
+            "tag_post_feed", kwargs={"slug": tag.slug}
+        )
+        response = self.client.get(url)
+        self.assertContains(response, "Tagged")
+        self.assertNotContains(response, "Other")
+        response = self.client.get(
+            reverse(
+                "tag_post_feed", kwargs={"slug": "nope"}
+            )
+        )
+        self.assertEqual(response.status_code, 404)
@@ -1,6 +1,12 @@
 """URL paths for Blog App"""
 from django.urls import path
 
+from .syndication import (
+    AtomPostFeed,
+    AtomTagPostFeed,
+    PostFeed,
+    TagPostFeed,
+)
 from .views import (
     PostCreate,
     PostDelete,
@@ -14,6 +20,20 @@ urlpatterns = [
     path(
         "create/", PostCreate.as_view(), name="post_create"
     ),
+    path("feed/", PostFeed(), name="post_feed"),
+    path(
+        "feed/atom/", AtomPostFeed(), name="post_atom_feed"
+    ),
+    path(
+        "tag/<str:slug>/feed/",
+        TagPostFeed(),
+        name="tag_post_feed",
+    ),
+    path(
+        "tag/<str:slug>/feed/atom/",
+        AtomTagPostFeed(),
+        name="tag_post_atom_feed",
+    ),
     path(
         "<int:year>/<int:month>/<str:slug>/",
         PostDetail.as_view(),
@@ -10,6 +10,9 @@ from django.views.generic import (
     UpdateView,
 )
 
+from core.views import KeysetPaginationMixin
+from organizer.view_mixins import TagListContextMixin
+
 from .forms import PostForm
 from .models import Post
 
@@ -53,9 +56,14 @@ class PostCreate(LoginRequiredMixin, CreateView):
     extra_context = {"update": False}
 
 
-class PostDetail(PostObjectMixin, DetailView):
+class PostDetail(
+    TagListContextMixin, PostObjectMixin, DetailView
+):
     """Display a single blog Post"""
 
+    queryset = Post.objects.defer("text").prefetch_related(
+        "startups"
+    )
     template_name = "post/detail.html"
 
 
@@ -68,10 +76,16 @@ class PostDelete(
     success_url = reverse_lazy("post_list")
 
 
-class PostList(ListView):
+class PostList(KeysetPaginationMixin, ListView):
     """Display a list of blog Posts"""
 
-    model = Post
+    context_object_name = "post_list"
+    keys = [
+        ("pub_date", True),
+        ("title", False),
+        ("pk", False),
+    ]
+    queryset = Post.objects.defer("text", "text_html")
     template_name = "post/list.html"
 
 
@@ -1,16 +1,41 @@
 """Viewsets for the Blog app"""
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from rest_framework.viewsets import ModelViewSet
 
+from organizer.models import Tag
+from organizer.viewsets import TagFilterMixin
+
 from .models import Post
-from .serializers import PostSerializer
+from .serializers import PostListSerializer, PostSerializer
+from .tag_index import post_index
 
 
-class PostViewSet(ModelViewSet):
+class PostViewSet(TagFilterMixin, ModelViewSet):
     """A set of views for Post model"""
 
-    queryset = Post.objects.all()
+    queryset = Post.objects.prefetch_related(
+        Prefetch("tags", queryset=Tag.objects.only("pk")),
+        "startups",
+    )
     serializer_class = PostSerializer
+    tag_index = post_index
+
+    def get_queryset(self):
+        """Load the excerpt, not the text, for lists"""
+        if self.action == "list":
+            return (
+                super()
+                .get_queryset()
+                .defer("text", "text_html")
+            )
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        """Leave texts out of lists"""
+        if self.action == "list":
+            return PostListSerializer
+        return super().get_serializer_class()
 
     def get_object(self):
         """Override DRF's generic method
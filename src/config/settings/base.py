@@ -6,6 +6,7 @@ https://docs.djangoproject.com/en/2.1/topics/settings/
 https://docs.djangoproject.com/en/2.1/ref/settings/
 https://docs.djangoproject.com/en/2.1/howto/deployment/checklist/
 """
+from importlib.util import find_spec
 
 from environ import Env, Path
 
@@ -36,15 +37,24 @@ INSTALLED_APPS = [
     # first party
     "blog.apps.BlogConfig",
     "organizer.apps.OrganizerConfig",
+    "jobs.apps.JobsConfig",
+    "core.apps.CoreConfig",
 ]
 
 MIDDLEWARE = [
+    "core.middleware.ServerTimingMiddleware",
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.QueryCountMiddleware",
+    "core.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "core.middleware.SitemapMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.ReplicaRoutingMiddleware",
+    "core.middleware.ProfilerMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -53,7 +63,7 @@ ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "core.template_backends.TimedDjangoTemplates",
         "DIRS": [BASE_DIR("templates")],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -80,6 +90,123 @@ DATABASES = {
     )
 }
 
+# Read replicas: a comma-separated list of database URLs
+# https://docs.djangoproject.com/en/2.1/topics/db/multi-db/
+
+DATABASE_REPLICAS = []
+for number, url in enumerate(
+    ENV.list("REPLICA_DATABASE_URLS", default=[]), start=1
+):
+    DATABASES[f"replica{number}"] = dict(
+        ENV.db_url_config(url), TEST={"MIRROR": "default"}
+    )
+    DATABASE_REPLICAS.append(f"replica{number}")
+
+DATABASE_ROUTERS = ["core.db_routers.PrimaryReplicaRouter"]
+
+# Seconds a client reads from the primary after it writes
+REPLICA_PIN_SECONDS = ENV.int(
+    "REPLICA_PIN_SECONDS", default=5
+)
+
+# Log requests that run more queries than this as warnings
+QUERY_COUNT_WARNING = ENV.int(
+    "QUERY_COUNT_WARNING", default=20
+)
+
+# Send Server-Timing headers to everyone, not only staff
+SERVER_TIMING = ENV.bool("SERVER_TIMING", default=False)
+
+# Profile this fraction of requests (0.0 to 1.0), plus staff
+# requests sending PROFILE_HEADER; see core.profiling
+PROFILE_SAMPLE_RATE = ENV.float(
+    "PROFILE_SAMPLE_RATE", default=0.0
+)
+PROFILE_HEADER = "X-Profile"
+PROFILE_DIR = ENV.str(
+    "PROFILE_DIR", default=BASE_DIR("runtime", "profiles")
+)
+# Profiles kept per URL name
+PROFILE_KEEP = ENV.int("PROFILE_KEEP", default=20)
+
+# Share metrics between worker processes through files in
+# this directory; empty it before starting the server
+METRICS_DIR = ENV.str("METRICS_DIR", default="")
+# Seconds between copies of the connection pool statistics
+# to the metrics, made as connections are handed back
+METRICS_POOL_INTERVAL = ENV.float(
+    "METRICS_POOL_INTERVAL", default=10.0
+)
+# Bearer token Prometheus sends to read /metrics/
+METRICS_TOKEN = ENV.str("METRICS_TOKEN", default="")
+
+# Seconds a process uses its snapshot of all Tags before
+# checking the database for changes; see organizer.catalog
+TAG_CATALOG_MAX_AGE = ENV.float(
+    "TAG_CATALOG_MAX_AGE", default=1.0
+)
+
+# Seconds a process filters by Tags with its bitmaps before
+# checking the database for changes; see organizer.tag_index
+TAG_INDEX_MAX_AGE = ENV.float(
+    "TAG_INDEX_MAX_AGE", default=1.0
+)
+
+# Threads per process running the requests of parallel
+# batches (0: run them in turn); see core.batch
+BATCH_THREADS = ENV.int("BATCH_THREADS", default=4)
+
+# Render API responses as JSON, or MessagePack if installed;
+# see core.renderers
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ]
+}
+if find_spec("msgpack"):
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].append(
+        "core.renderers.MessagePackRenderer"
+    )
+
+# Compress responses of at least this many bytes; see
+# core.middleware.CompressionMiddleware
+COMPRESSION_MIN_SIZE = ENV.int(
+    "COMPRESSION_MIN_SIZE", default=1024
+)
+
+# Files written by the site, such as the sitemap's. Web and
+# worker processes share them: where they share no disk (as
+# on Heroku), set DEFAULT_FILE_STORAGE to a remote storage,
+# such as django-storages' S3Boto3Storage
+DEFAULT_FILE_STORAGE = ENV.str(
+    "DEFAULT_FILE_STORAGE",
+    default="django.core.files.storage.FileSystemStorage",
+)
+MEDIA_ROOT = ENV.str(
+    "MEDIA_ROOT", default=BASE_DIR("runtime", "media")
+)
+
+# The sitemap's files are written by the write_sitemaps
+# command and jobs, and served at the site's root; see
+# core.sitemaps
+SITEMAP_BASE_URL = ENV.str(
+    "SITEMAP_BASE_URL", default="http://localhost:8000"
+)
+# URLs per shard, at most 50,000
+SITEMAP_SHARD_SIZE = ENV.int(
+    "SITEMAP_SHARD_SIZE", default=50000
+)
+# Seconds before a changed shard is rewritten, so that
+# changes made meanwhile share the job
+SITEMAP_DELAY = ENV.int("SITEMAP_DELAY", default=60)
+
+# Private networks that the link checker and preview fetcher
+# may request, e.g. ["10.1.0.0/16"]; see organizer.linkcheck
+OUTBOUND_ALLOWED_NETWORKS = ENV.list(
+    "OUTBOUND_ALLOWED_NETWORKS", default=[]
+)
+
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
 
@@ -15,3 +15,22 @@ TEMPLATES[0]["OPTIONS"].update(  # noqa: F405
 # Normally set to settings.DEBUG, but tests run with DEBUG=FALSE!
 WHITENOISE_AUTOREFRESH = True
 WHITENOISE_USE_FINDERS = True
+
+# Pool PostgreSQL connections (as in Docker); always
+# health-check them, as the database container may restart.
+# See core.db_pool.ConnectionPool for the POOL options.
+for database in DATABASES.values():  # noqa: F405
+    if (
+        database["ENGINE"]
+        == "django.db.backends.postgresql"
+    ):
+        database.update(
+            ENGINE="core.backends.postgresql",
+            CONN_MAX_AGE=0,
+            POOL={
+                "MAX_SIZE": ENV.int(  # noqa: F405
+                    "DB_POOL_MAX_SIZE", default=2
+                ),
+                "CHECK_AFTER": 0,
+            },
+        )
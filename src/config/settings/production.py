@@ -13,6 +13,40 @@ ADMINS = MANAGERS = [
 
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+############################
+# DATABASE CONNECTION POOL #
+############################
+
+# Gunicorn workers borrow connections from a per-process pool
+# instead of connecting on every request. CONN_MAX_AGE stays
+# 0: Django hands connections back to the pool after each
+# request, and the pool keeps them open.
+# See core.db_pool.ConnectionPool for the POOL options.
+
+for database in DATABASES.values():  # noqa: F405
+    if (
+        database["ENGINE"]
+        == "django.db.backends.postgresql"
+    ):
+        database.update(
+            ENGINE="core.backends.postgresql",
+            CONN_MAX_AGE=0,
+            POOL={
+                "MAX_SIZE": ENV.int(  # noqa: F405
+                    "DB_POOL_MAX_SIZE", default=4
+                ),
+                "TIMEOUT": ENV.float(  # noqa: F405
+                    "DB_POOL_TIMEOUT", default=10.0
+                ),
+                "MAX_AGE": ENV.int(  # noqa: F405
+                    "DB_POOL_MAX_AGE", default=1800
+                ),
+                "CHECK_AFTER": ENV.float(  # noqa: F405
+                    "DB_POOL_CHECK_AFTER", default=30.0
+                ),
+            },
+        )
+
 #####################
 # SECURITY SETTINGS #
 #####################
@@ -35,8 +69,8 @@ SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
 X_FRAME_OPTIONS = "DENY"
 
-REST_FRAMEWORK = {
-    "DEFAULT_PERMISSION_CLASSES": (
-        "rest_framework.permissions.IsAuthenticatedOrReadOnly",
-    )
-}
+REST_FRAMEWORK[  # noqa: F405
+    "DEFAULT_PERMISSION_CLASSES"
+] = (
+    "rest_framework.permissions.IsAuthenticatedOrReadOnly",
+)
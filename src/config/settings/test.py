@@ -0,0 +1,27 @@
+"""Test settings for Startup Organizer
+
+Define two local SQLite databases—a primary and a replica—so
+that the test suite may exercise the database router. Reads
+use the replica only in tests that list it in
+DATABASE_REPLICAS (see core.tests).
+
+    python3 manage.py test --settings=config.settings.test
+"""
+from .development import *  # noqa: F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR("db.sqlite3"),  # noqa: F405
+    },
+    "replica1": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR("replica.sqlite3"),  # noqa: F405
+        "TEST": {"MIRROR": "default"},
+    },
+}
+
+# Check for changed Tags every time: tests roll back their
+# changes without sending signals
+TAG_CATALOG_MAX_AGE = 0
+TAG_INDEX_MAX_AGE = 0
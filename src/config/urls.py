@@ -5,22 +5,32 @@ from django.views.generic import TemplateView
 
 from blog import urls as blog_urls
 from blog.routers import urlpatterns as blog_api_urls
+from core import urls as core_urls
+from core.views import MetricsView
 from organizer import urls as organizer_urls
 from organizer.routers import (
     urlpatterns as organizer_api_urls,
 )
 
-from .views import RootApiView
+from .views import BatchView, ChangeFeedView, RootApiView
 
 root_api_url = [
-    path("", RootApiView.as_view(), name="api-root")
+    path("", RootApiView.as_view(), name="api-root"),
+    path(
+        "changes/",
+        ChangeFeedView.as_view(),
+        name="api-changes",
+    ),
+    path("batch/", BatchView.as_view(), name="api-batch"),
 ]
 api_urls = root_api_url + blog_api_urls + organizer_api_urls
 
 urlpatterns = [
+    path("admin/", include(core_urls)),
     path("admin/", admin.site.urls),
     path("api/v1/", include(api_urls)),
     path("blog/", include(blog_urls)),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
     path("", include(organizer_urls)),
     path(
         "",
@@ -9,11 +9,25 @@ would overcomplicate the work we're doing, so it's going
 here instead.
 """
 
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
-from rest_framework.status import HTTP_200_OK
+from rest_framework.status import HTTP_200_OK, HTTP_410_GONE
 from rest_framework.views import APIView
 
+from blog.viewsets import PostViewSet
+from core.batch import run_batch
+from core.changes import (
+    CursorExpired,
+    changes_since,
+    latest_cursor,
+)
+from organizer.viewsets import (
+    NewsLinkViewSet,
+    StartupViewSet,
+    TagViewSet,
+)
+
 
 class RootApiView(APIView):
     """Direct users to other API endpoints"""
@@ -26,6 +40,8 @@ class RootApiView(APIView):
             ("startup", "api-startup-list"),
             ("newslink", "api-newslink-list"),
             ("blog", "api-post-list"),
+            ("changes", "api-changes"),
+            ("batch", "api-batch"),
         ]
         data = {
             name: reverse(
@@ -36,3 +52,126 @@ class RootApiView(APIView):
             for (name, url_name) in api_endpoints
         }
         return Response(data=data, status=HTTP_200_OK)
+
+
+class ChangeFeedView(APIView):
+    """List the objects changed since a cursor
+
+    /api/v1/changes/ returns the cursor of the latest change:
+    fetch every list, then follow changes from there with
+    /api/v1/changes/?since=<cursor>. Each response holds a
+    batch of changes, compacted (each object once), as
+    {"saved": {kind: [objects]}, "deleted": {kind: [ids]},
+    "next": cursor, "more": bool}. Saved objects are as in
+    the lists of the API; ask again with next until more is
+    false.
+
+    Cursors from before changes forgotten by compaction get
+    410 Gone, with the latest cursor as next: fetch every
+    list again, then follow changes from there.
+    """
+
+    batch_size = 500
+    viewsets = {
+        "tag": TagViewSet,
+        "startup": StartupViewSet,
+        "newslink": NewsLinkViewSet,
+        "post": PostViewSet,
+    }
+
+    def get(self, request, *args, **kwargs):
+        """Return the next batch of changes"""
+        since = request.query_params.get("since")
+        if not since:
+            return Response(
+                {
+                    "saved": {},
+                    "deleted": {},
+                    "next": latest_cursor(),
+                    "more": False,
+                }
+            )
+        try:
+            batch = changes_since(since, self.batch_size)
+        except CursorExpired as error:
+            return Response(
+                {
+                    "detail": str(error),
+                    "next": latest_cursor(),
+                },
+                status=HTTP_410_GONE,
+            )
+        except ValueError as error:
+            raise ParseError(str(error))
+        return Response(
+            {
+                "saved": {
+                    kind: self.serialize(request, kind, pks)
+                    for kind, pks in batch.saved.items()
+                },
+                "deleted": batch.deleted,
+                "next": batch.cursor,
+                "more": batch.more,
+            }
+        )
+
+    def serialize(self, request, kind, pks):
+        """Serialize objects as the list of their API does"""
+        view = self.viewsets[kind](
+            request=request,
+            args=(),
+            kwargs={},
+            format_kwarg=None,
+            action="list",
+        )
+        queryset = view.get_queryset().filter(pk__in=pks)
+        return view.get_serializer(queryset, many=True).data
+
+
+class BatchView(APIView):
+    """Answer many GET requests to the API at once
+
+    GET /api/v1/batch/?url=/api/v1/startup/jambon/&url=...
+    or POST {"urls": [...], "parallel": true} returns
+    {"responses": [{"url", "status", "body"}, ...]}, in the
+    order of the URLs. With parallel, the requests run on a
+    thread pool.
+    """
+
+    max_requests = 20
+
+    def get(self, request, *args, **kwargs):
+        """Answer the URLs of the query string"""
+        return self.run(
+            request,
+            request.query_params.getlist("url"),
+            request.query_params.get("parallel")
+            in ("1", "true"),
+        )
+
+    def post(self, request, *args, **kwargs):
+        """Answer the URLs of the body"""
+        urls = request.data.get("urls")
+        if not isinstance(urls, list) or not all(
+            isinstance(url, str) for url in urls
+        ):
+            raise ParseError("urls must be a list of URLs")
+        return self.run(
+            request,
+            urls,
+            bool(request.data.get("parallel")),
+        )
+
+    def run(self, request, urls, parallel):
+        """Answer each URL"""
+        if len(urls) > self.max_requests:
+            raise ParseError(
+                f"At most {self.max_requests} URLs at once"
+            )
+        return Response(
+            {
+                "responses": run_batch(
+                    request._request, urls, parallel
+                )
+            }
+        )
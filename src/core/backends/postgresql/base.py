@@ -0,0 +1,97 @@
+"""PostgreSQL backend that borrows connections from a pool
+
+Use by setting a database ENGINE to "core.backends.postgresql"
+and, optionally, a POOL dictionary of ConnectionPool options:
+
+    DATABASES["default"]["POOL"] = {"MAX_SIZE": 4}
+
+Keep CONN_MAX_AGE at 0: closing the connection at the end of
+each request hands it back to the pool, which keeps it open.
+
+Database Backend Documentation:
+https://docs.djangoproject.com/en/2.1/ref/databases/#subclassing-the-built-in-database-backends
+"""
+from functools import partial
+
+from django.db.backends.postgresql import (
+    base as postgresql,
+    creation,
+)
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from ...db_pool import close_pool, get_pool
+from ...metrics import publish_pool_stats_now_and_then
+
+
+def check(conn):
+    """Ensure the server still answers"""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+
+def reset(conn):
+    """Roll back unfinished work; refuse closed connections"""
+    if conn.closed:
+        return False
+    if (
+        conn.get_transaction_status()
+        != TRANSACTION_STATUS_IDLE
+    ):
+        conn.rollback()
+    return True
+
+
+def pool_key(alias, database_name):
+    """Identify a pool: one per alias and database"""
+    return f"{alias}:{database_name}"
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Close pooled connections before dropping test databases"""
+
+    def _destroy_test_db(
+        self, test_database_name, verbosity
+    ):
+        """Ensure no pooled connection keeps the database open"""
+        close_pool(
+            pool_key(
+                self.connection.alias, test_database_name
+            )
+        )
+        super()._destroy_test_db(
+            test_database_name, verbosity
+        )
+
+
+class DatabaseWrapper(postgresql.DatabaseWrapper):
+    """Check connections out of and back into a pool"""
+
+    creation_class = DatabaseCreation
+
+    @property
+    def pool(self):
+        """Return the pool for this alias and database"""
+        return get_pool(
+            pool_key(
+                self.alias, self.settings_dict["NAME"]
+            ),
+            self.settings_dict.get("POOL"),
+            check=check,
+            reset=reset,
+        )
+
+    def get_new_connection(self, conn_params):
+        """Borrow a connection; open one only if needed"""
+        connection = self.pool.checkout(
+            partial(super().get_new_connection, conn_params)
+        )
+        self.isolation_level = self.settings_dict[
+            "OPTIONS"
+        ].get("isolation_level", connection.isolation_level)
+        return connection
+
+    def _close(self):
+        """Hand the connection back instead of closing it"""
+        if self.connection is not None:
+            self.pool.checkin(self.connection)
+            publish_pool_stats_now_and_then()
@@ -0,0 +1,500 @@
+"""Generate benchmark data and time the site's routes
+
+seed() fills the database with synthetic Tags, Startups,
+NewsLinks and Posts using bulk inserts. Relations fan out the
+way real data does: a few popular Tags label most Startups,
+and a few Startups collect most of the news.
+
+benchmark() requests every named GET route in the URL config,
+both HTML and API, and reports latency percentiles, query
+counts and allocated memory. compare_encodings() times how
+the API lists are rendered and compressed, and the bytes
+sent. See the seed_bench and bench management commands.
+"""
+import random
+import tracemalloc
+from datetime import date, timedelta
+from itertools import accumulate
+from time import perf_counter
+
+from django.db.models import Count, Max
+from django.test import Client
+from django.urls import (
+    URLPattern,
+    URLResolver,
+    get_resolver,
+    reverse,
+)
+from rest_framework.renderers import JSONRenderer
+
+from blog.models import Post
+from blog.tag_index import post_index
+from organizer.catalog import catalog
+from organizer.dedupe import link_hash
+from organizer.models import NewsLink, Startup, Tag
+from organizer.tag_index import startup_index
+
+from .bulk import batches
+from .compression import brotli, compress
+from .instrumentation import count_queries
+from .renderers import (
+    FastJSONRenderer,
+    MessagePackRenderer,
+    msgpack,
+)
+from .slugs import allocate_slugs
+
+WORDS = (
+    "agile alpha analytics apex atlas beacon blue bright "
+    "cloud cobalt code core crowd data delta digital echo "
+    "edge fin flow forge fusion grid growth health hive "
+    "insight labs launch logic loop lumen metric mint mobile "
+    "nova open orbit peak pixel prime pulse quant quantum "
+    "rapid ridge scale shift signal smart spark stack swift "
+    "sync terra tide trust vector venture vision wave zen"
+).split()
+
+
+def _cum_weights(count, skew=1.1):
+    """Zipf-like weights: item n is picked ~1/n**skew often
+
+    Cumulative, so that random.choices() need not sum them
+    on every call.
+    """
+    return list(
+        accumulate(
+            1 / (rank ** skew)
+            for rank in range(1, count + 1)
+        )
+    )
+
+
+def _name(rng, number, words=2):
+    """Return a readable name, unique thanks to number"""
+    return " ".join(
+        rng.sample(WORDS, words) + [str(number)]
+    )
+
+
+def _slug(name):
+    """Slugify a name built by _name()"""
+    return name.replace(" ", "-")
+
+
+def _article_url(number):
+    """Return the link of a synthetic NewsLink"""
+    return f"https://news.example.com/{number}"
+
+
+def _new_pks(model, after):
+    """Return primary keys of rows inserted after pk `after`"""
+    return list(
+        model.objects.filter(pk__gt=after)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def _max_pk(model):
+    """Return the highest primary key in use, or 0"""
+    return (
+        model.objects.aggregate(top=Max("pk"))["top"] or 0
+    )
+
+
+def _bulk_insert(model, rows, batch_size, prepare=None):
+    """Insert rows; return the primary keys of the new rows
+
+    prepare(batch), if given, is called before each insert.
+    """
+    start = _max_pk(model)
+    for batch in batches(rows, batch_size):
+        if prepare is not None:
+            prepare(batch)
+        model.objects.bulk_create(batch)
+    return _new_pks(model, start)
+
+
+def _relate(through, left, right, pairs, batch_size):
+    """Bulk insert M2M rows for (left pk, right pk) pairs"""
+    rows = (
+        through(**{left: left_pk, right: right_pk})
+        for left_pk, right_pk in pairs
+    )
+    for batch in batches(rows, batch_size):
+        through.objects.bulk_create(batch)
+
+
+def _fan_out(rng, sources, targets, low, high):
+    """Pair each source with low to high skewed targets"""
+    if not targets:
+        return
+    cum_weights = _cum_weights(len(targets))
+    for source in sources:
+        picks = rng.choices(
+            targets,
+            cum_weights=cum_weights,
+            k=rng.randint(low, high),
+        )
+        for target in set(picks):
+            yield source, target
+
+
+def seed(
+    startups,
+    tags=None,
+    newslinks=None,
+    posts=None,
+    batch_size=1000,
+    random_seed=0,
+):
+    """Add synthetic rows to the database
+
+    Unless given, the number of Tags, NewsLinks and Posts
+    scale with the number of Startups. Returns the number of
+    rows created for each model.
+    """
+    tags = max(10, startups // 10) if tags is None else tags
+    newslinks = (
+        startups * 3 if newslinks is None else newslinks
+    )
+    posts = startups // 2 if posts is None else posts
+    rng = random.Random(random_seed)
+    today = date.today()
+    # number new rows after existing ones, to keep names unique
+    offset = {
+        model: _max_pk(model) + 1
+        for model in (Tag, Startup, NewsLink, Post)
+    }
+
+    tag_pks = _bulk_insert(
+        Tag,
+        (
+            Tag(name=_name(rng, offset[Tag] + n, 1))
+            for n in range(tags)
+        ),
+        batch_size,
+        prepare=allocate_slugs,
+    )
+    catalog.changed()  # bulk_create sends no signals
+    startup_pks = _bulk_insert(
+        Startup,
+        (
+            Startup(
+                name=name[:31],
+                slug=_slug(name)[:31],
+                description=" ".join(
+                    rng.choices(WORDS, k=60)
+                ),
+                founded_date=today
+                - timedelta(days=rng.randint(30, 7300)),
+                contact=f"hello@{_slug(name)}.com",
+                website=f"https://{_slug(name)}.com",
+            )
+            for name in (
+                _name(rng, offset[Startup] + n)
+                for n in range(startups)
+            )
+        ),
+        batch_size,
+    )
+    _relate(
+        Startup.tags.through,
+        "startup_id",
+        "tag_id",
+        _fan_out(rng, startup_pks, tag_pks, 1, 5),
+        batch_size,
+    )
+    newslink_pks = []
+    if startup_pks:
+        news_weights = _cum_weights(
+            len(startup_pks), skew=0.8
+        )
+        newslink_pks = _bulk_insert(
+            NewsLink,
+            (
+                NewsLink(
+                    title=_name(rng, n, 4).title(),
+                    slug=f"article-{offset[NewsLink] + n}",
+                    pub_date=today
+                    - timedelta(days=rng.randint(0, 1500)),
+                    link=_article_url(offset[NewsLink] + n),
+                    link_hash=link_hash(
+                        _article_url(offset[NewsLink] + n)
+                    ),
+                    startup_id=startup_pk,
+                )
+                for n, startup_pk in enumerate(
+                    rng.choices(
+                        startup_pks,
+                        cum_weights=news_weights,
+                        k=newslinks,
+                    )
+                )
+            ),
+            batch_size,
+        )
+    post_pks = _bulk_insert(
+        Post,
+        (
+            Post(
+                title=_name(rng, n, 3).title(),
+                slug=f"post-{offset[Post] + n}",
+                text="\n\n".join(
+                    " ".join(rng.choices(WORDS, k=80))
+                    for _ in range(rng.randint(2, 6))
+                ),
+                pub_date=today
+                - timedelta(days=rng.randint(0, 1500)),
+            )
+            for n in range(posts)
+        ),
+        batch_size,
+    )
+    _relate(
+        Post.tags.through,
+        "post_id",
+        "tag_id",
+        _fan_out(rng, post_pks, tag_pks, 1, 4),
+        batch_size,
+    )
+    _relate(
+        Post.startups.through,
+        "post_id",
+        "startup_id",
+        _fan_out(rng, post_pks, startup_pks, 1, 3),
+        batch_size,
+    )
+    # bulk_create sends no signals
+    startup_index.changed()
+    post_index.changed()
+    return {
+        "tags": len(tag_pks),
+        "startups": len(startup_pks),
+        "newslinks": len(newslink_pks),
+        "posts": len(post_pks),
+    }
+
+
+def _sample_kwargs():
+    """Return URL kwargs for a sample object of each model
+
+    Pick the most related objects, as these are the slowest
+    pages to render.
+    """
+    tag = (
+        Tag.objects.annotate(related=Count("startup"))
+        .order_by("-related", "pk")
+        .first()
+    )
+    startup = (
+        Startup.objects.annotate(related=Count("newslink"))
+        .order_by("-related", "pk")
+        .first()
+    )
+    newslink = NewsLink.objects.select_related(
+        "startup"
+    ).first()
+    post = (
+        Post.objects.annotate(related=Count("tags"))
+        .order_by("-related", "pk")
+        .first()
+    )
+    samples = {}
+    if tag:
+        samples[Tag] = {"slug": tag.slug}
+    if startup:
+        samples[Startup] = {
+            "slug": startup.slug,
+            "startup_slug": startup.slug,
+        }
+    if newslink:
+        samples[NewsLink] = {
+            "startup_slug": newslink.startup.slug,
+            "newslink_slug": newslink.slug,
+        }
+    if post:
+        samples[Post] = {
+            "year": post.pub_date.year,
+            "month": post.pub_date.month,
+            "slug": post.slug,
+        }
+    return samples
+
+
+ADMIN_CHANGELISTS = [
+    "admin:organizer_tag_changelist",
+    "admin:organizer_startup_changelist",
+    "admin:organizer_newslink_changelist",
+    "admin:blog_post_changelist",
+]
+
+
+def _view_model(callback):
+    """Return the model a view function displays, if any"""
+    view_class = getattr(
+        callback,
+        "view_class",
+        getattr(callback, "cls", None),
+    )
+    model = getattr(view_class, "model", None)
+    queryset = getattr(view_class, "queryset", None)
+    if model is None and queryset is not None:
+        model = queryset.model
+    return model
+
+
+def _walk(patterns):
+    """Yield named URL patterns outside of namespaces"""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace is None:
+                yield from _walk(pattern.url_patterns)
+        elif (
+            isinstance(pattern, URLPattern) and pattern.name
+        ):
+            yield pattern
+
+
+def routes():
+    """Return (name, path) for each GET route to benchmark
+
+    Routes in namespaces (the admin) and routes that need
+    kwargs no sample object provides are skipped, except
+    the changelists of ADMIN_CHANGELISTS.
+    """
+    samples = _sample_kwargs()
+    found = []
+    for pattern in _walk(get_resolver().url_patterns):
+        names = set(pattern.pattern.regex.groupindex)
+        if "format" in names:
+            continue  # the same route with a format suffix
+        kwargs = {}
+        if names:
+            sample = samples.get(
+                _view_model(pattern.callback)
+            )
+            if sample is None or not names <= set(sample):
+                continue
+            kwargs = {name: sample[name] for name in names}
+        found.append(
+            (
+                pattern.name,
+                reverse(pattern.name, kwargs=kwargs),
+            )
+        )
+    for name in ADMIN_CHANGELISTS:
+        found.append((name, reverse(name)))
+    return found
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of values"""
+    ordered = sorted(values)
+    rank = max(1, round(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def time_route(client, path, repeat, headers):
+    """Time GET requests to path; return measurements"""
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        response = client.get(path, **headers)
+        timings.append(perf_counter() - start)
+    with count_queries() as counter:
+        client.get(path, **headers)
+    # tracemalloc slows Python down; measure memory separately
+    tracemalloc.start()
+    try:
+        client.get(path, **headers)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "path": path,
+        "status": response.status_code,
+        "bytes": len(response.content),
+        "p50_ms": percentile(timings, 0.50) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+        "queries": counter.count,
+        "query_ms": counter.duration * 1000,
+        "memory_kb": peak / 1024,
+    }
+
+
+def benchmark(user, repeat=20):
+    """Time every route for the data now in the database
+
+    Forms need a logged in user; API routes return JSON.
+    """
+    client = Client()
+    client.force_login(user)
+    results = {}
+    for name, path in routes():
+        headers = (
+            {"HTTP_ACCEPT": "application/json"}
+            if name.startswith("api-")
+            else {}
+        )
+        results[name] = time_route(
+            client, path, repeat, headers
+        )
+    return results
+
+
+ENCODED_ROUTES = [
+    "api-tag-list",
+    "api-startup-list",
+    "api-newslink-list",
+    "api-post-list",
+]
+
+
+def _renderers():
+    """Return the (name, renderer) pairs to compare"""
+    found = [
+        ("drf-json", JSONRenderer()),
+        ("json", FastJSONRenderer()),
+    ]
+    if msgpack is not None:
+        found.append(("msgpack", MessagePackRenderer()))
+    return found
+
+
+def compare_encodings(repeat=20):
+    """Time rendering and compressing the API lists
+
+    The data of each route in ENCODED_ROUTES is serialized
+    once, then rendered by each renderer and compressed with
+    each encoding available. Returns the median time and the
+    bytes sent, by route and "renderer+encoding".
+    """
+    client = Client()
+    encodings = [None, "gzip"] + (["br"] if brotli else [])
+    results = {}
+    for name in ENCODED_ROUTES:
+        data = client.get(
+            reverse(name), HTTP_ACCEPT="application/json"
+        ).data
+        found = results[name] = {}
+        for label, renderer in _renderers():
+            for encoding in encodings:
+                timings = []
+                for _ in range(repeat):
+                    start = perf_counter()
+                    body = renderer.render(data)
+                    if encoding is not None:
+                        body = compress(encoding, body)
+                    timings.append(perf_counter() - start)
+                key = (
+                    label
+                    if encoding is None
+                    else f"{label}+{encoding}"
+                )
+                found[key] = {
+                    "bytes": len(body),
+                    "p50_ms": percentile(timings, 0.50)
+                    * 1000,
+                }
+    return results
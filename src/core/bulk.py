@@ -0,0 +1,52 @@
+"""Write many rows with few queries
+
+Django 2.1 has bulk_create() but no bulk_update(): saving
+each object runs one UPDATE per row.
+"""
+from itertools import islice
+
+from django.db.models import Case, Value, When
+
+
+def batches(iterable, size):
+    """Split an iterable into lists of at most size items"""
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def bulk_update(model, values, batch_size=100):
+    """Update rows with one UPDATE per batch
+
+    values maps primary keys to {field name: value} dicts,
+    all with the same field names.
+
+    bulk_update(NewsLink, {1: {"title": "A"}, 2: {...}})
+    """
+    items = list(values.items())
+    if not items:
+        return 0
+    names = list(items[0][1])
+    updated = 0
+    for batch in batches(items, batch_size):
+        updated += model.objects.filter(
+            pk__in=[pk for pk, _fields in batch]
+        ).update(
+            **{
+                name: Case(
+                    *(
+                        When(
+                            pk=pk, then=Value(fields[name])
+                        )
+                        for pk, fields in batch
+                    ),
+                    output_field=model._meta.get_field(
+                        name
+                    ),
+                )
+                for name in names
+            }
+        )
+    return updated
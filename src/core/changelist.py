@@ -0,0 +1,251 @@
+"""Admin changelists for tables with millions of rows
+
+The default changelist runs two exact COUNT(*) queries and
+pages with OFFSET, which reads and discards every row before
+the page: both grow with the table. LargeTableAdminMixin
+instead
+
+- counts unfiltered tables from the statistics the
+  PostgreSQL planner keeps (pg_class.reltuples), and stops
+  counting filtered rows at count_limit;
+- pages with a cursor: the sort key of the last row shown.
+  The next page is the rows after it in the sort order,
+  found with the index (keyset pagination).
+
+Pages keep page-number links when the sort uses a nullable
+column or an expression, which keysets cannot follow, and
+when list_editable is set.
+
+See core.keyset.
+"""
+from django.contrib.admin.options import (
+    IncorrectLookupParameters,
+)
+from django.contrib.admin.utils import lookup_needs_distinct
+from django.contrib.admin.views.main import (
+    PAGE_VAR,
+    ChangeList,
+)
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .keyset import (
+    AFTER_VAR,
+    BEFORE_VAR,
+    beyond,
+    decode,
+    encode,
+    value,
+)
+
+
+def estimated_count(queryset):
+    """Return the planner's estimate of the rows in a table
+
+    Returns None if the database keeps no estimate.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class "
+            "WHERE oid = to_regclass(%s)",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # -1 means the table was never analyzed
+    if row is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginate without counting every row
+
+    Unfiltered tables larger than exact_below use the
+    planner's estimate; filtered rows are counted up to
+    count_limit. approximate is True if the count is not
+    exact.
+    """
+
+    exact_below = 10000
+    count_limit = 10000
+
+    approximate = False
+
+    @cached_property
+    def count(self):
+        """Return the estimated or capped number of rows"""
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset)
+            if (
+                estimate is not None
+                and estimate >= self.exact_below
+            ):
+                self.approximate = True
+                return estimate
+        count = queryset.values("pk")[
+            : self.count_limit + 1
+        ].count()
+        if count > self.count_limit:
+            self.approximate = True
+        return count
+
+
+def _decode(cursor, length):
+    """Return the sort key values of a cursor"""
+    try:
+        return decode(cursor, length)
+    except ValueError:
+        raise IncorrectLookupParameters
+
+
+class KeysetChangeList(ChangeList):
+    """Page through results with cursors, not offsets"""
+
+    def get_filters_params(self, params=None):
+        """Keep cursors out of the filters"""
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(AFTER_VAR, None)
+        lookup_params.pop(BEFORE_VAR, None)
+        return lookup_params
+
+    def sort_keys(self):
+        """Return (path, descending) pairs, or None
+
+        None means the sort cannot be followed with a keyset.
+        """
+        keys = []
+        for term in self.queryset.query.order_by:
+            if not isinstance(term, str):
+                return None
+            path = term.lstrip("-")
+            if path == "pk":
+                path = self.lookup_opts.pk.name
+            if not self._keyable(path):
+                return None
+            keys.append((path, term.startswith("-")))
+        return keys or None
+
+    def _keyable(self, path):
+        """Return True if path ends at a never-NULL column"""
+        opts = self.lookup_opts
+        field = None
+        for name in path.split("__"):
+            if field is not None:
+                # follow a relation to the next model
+                if not field.many_to_one or field.null:
+                    return False
+                opts = field.related_model._meta
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                return False
+        return not (field.is_relation or field.null)
+
+    def get_results(self, request):
+        """Show the page after or before the cursor"""
+        super().get_results(request)
+        self.keys = self.sort_keys()
+        self.keyset = False
+        self.next_url = self.previous_url = None
+        if (
+            self.keys is None
+            or self.list_editable  # needs a queryset
+            or (self.show_all and self.can_show_all)
+        ):
+            return
+        after = self.params.get(AFTER_VAR)
+        before = self.params.get(BEFORE_VAR)
+        queryset = self.queryset
+        if after:
+            queryset = queryset.filter(
+                beyond(
+                    self.keys,
+                    _decode(after, len(self.keys)),
+                )
+            )
+        elif before:
+            queryset = queryset.reverse().filter(
+                beyond(
+                    self.keys,
+                    _decode(before, len(self.keys)),
+                    backward=True,
+                )
+            )
+        rows = list(queryset[: self.list_per_page + 1])
+        more = len(rows) > self.list_per_page
+        rows = rows[: self.list_per_page]
+        if before:
+            rows.reverse()
+        self.keyset = True
+        self.result_list = rows
+        if rows and (more or before):
+            self.next_url = self._cursor_url(
+                AFTER_VAR, rows[-1]
+            )
+        if rows and (more if before else after):
+            self.previous_url = self._cursor_url(
+                BEFORE_VAR, rows[0]
+            )
+        self.first_url = self.get_query_string(
+            remove=[AFTER_VAR, BEFORE_VAR, PAGE_VAR]
+        )
+
+    def _cursor_url(self, name, obj):
+        """Return the query string of a page next to obj"""
+        return self.get_query_string(
+            {
+                name: encode(
+                    [
+                        value(obj, path)
+                        for path, _ in self.keys
+                    ]
+                )
+            },
+            remove=[AFTER_VAR, BEFORE_VAR, PAGE_VAR],
+        )
+
+
+class LargeTableAdminMixin:
+    """Configure a ModelAdmin for a table of millions of rows
+
+    Set list_select_related for the fields list_display and
+    __str__ read, and search_fields with indexed lookups,
+    such as name__startswith or slug__exact: the default
+    icontains search reads the whole table. Prefixes such as
+    ^ and = are not supported.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        """Page with cursors"""
+        return KeysetChangeList
+
+    def get_search_results(self, request, queryset, term):
+        """Match the whole search term with each lookup
+
+        The default search needs every word of the term to
+        match some field, which prefix lookups cannot do.
+        """
+        term = term.strip()
+        lookups = self.get_search_fields(request)
+        if not (term and lookups):
+            return queryset, False
+        condition = Q()
+        for lookup in lookups:
+            condition |= Q(**{lookup: term})
+        return (
+            queryset.filter(condition),
+            any(
+                lookup_needs_distinct(self.opts, lookup)
+                for lookup in lookups
+            ),
+        )
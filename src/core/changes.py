@@ -0,0 +1,387 @@
+"""Log saves and deletes, for clients to fetch only changes
+
+track_changes() connects signals appending a Change row for
+each save or delete of a model's objects, and for each change
+to their many-to-many relations, on the same connection as
+the write: inside a transaction (as in the admin, or
+transaction.atomic()), both commit or roll back together.
+Bulk inserts and queryset.update() send no signals, so log
+nothing: pass the objects bulk_create() inserted to
+log_created().
+
+changes_since() returns the objects changed after a cursor,
+in batches, compacted: an object changed many times is listed
+once, as saved or deleted. compact() removes rows superseded
+by a later change to the same object, so that the log holds
+about one row per object.
+
+Transactions may commit in another order than they insert
+rows, so cursors do not follow row ids, which a transaction
+committing late could insert behind them. Once a transaction
+logging changes commits, number_changes() gives its rows
+the next sequence numbers of the log, one numbering at a
+time (under an advisory lock on PostgreSQL; SQLite has one
+writer at a time): rows are numbered after every row
+committed before them, and a cursor never moves past a
+number yet to be given. Rows left unnumbered (if the process died right after
+committing) are numbered by the next numbering, or compact().
+
+compact() records in ChangeHorizon the last delete it
+forgets: changes_since() raises CursorExpired for cursors
+before it.
+
+On PostgreSQL, each numbering also sends a NOTIFY on the
+NOTIFY_CHANNEL as it commits, for listeners such as
+core.events to wake up.
+"""
+import logging
+from collections import namedtuple
+from functools import partial
+
+from django.db import (
+    DatabaseError,
+    connections,
+    router,
+    transaction,
+)
+from django.db.models import Max
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+)
+from django.utils import timezone
+
+from .bulk import batches
+from .keyset import decode, encode
+from .models import Change, ChangeHorizon
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "core_change"
+# pg_advisory_xact_lock() key serializing numberings
+NUMBERING_LOCK = 0x636F7265
+# number rows after the highest number, in order of ids;
+# numbers are unique and above the highest whether the
+# subqueries see the rows updated by the statement (SQLite)
+# or not (PostgreSQL)
+NUMBER_SQL = (
+    "UPDATE {table} SET {sequence} = "
+    "(SELECT COALESCE(MAX({sequence}), 0) FROM {table}) "
+    "+ {id} + 1 - (SELECT MIN({id}) FROM {table} "
+    "WHERE {sequence} IS NULL) "
+    "WHERE {sequence} IS NULL"
+)
+
+ChangeBatch = namedtuple(
+    "ChangeBatch", ["saved", "deleted", "cursor", "more"]
+)
+ChangeBatch.__doc__ = """Primary keys of the objects saved and
+deleted, by kind, and the cursor of the next batch"""
+
+_numberings = {}  # database alias: on_commit callback
+_kinds = {}  # tracked model: kind
+
+
+class CursorExpired(Exception):
+    """The cursor is before changes compaction forgot"""
+
+
+def _log(kind, pks, deleted=False, added=False):
+    """Append a Change for each primary key"""
+    changes = [
+        Change(
+            kind=kind,
+            object_id=pk,
+            deleted=deleted,
+            added=added,
+        )
+        for pk in pks
+    ]
+    if not changes:
+        return
+    Change.objects.bulk_create(changes)
+    using = router.db_for_write(Change)
+    numbering = _numberings.setdefault(
+        using, partial(_number_on_commit, using)
+    )
+    connection = connections[using]
+    # once per transaction
+    if not any(
+        function is numbering
+        for _savepoints, function in connection.run_on_commit
+    ):
+        transaction.on_commit(numbering, using=using)
+
+
+def number_changes(using=None):
+    """Assign sequence numbers to committed changes lacking one
+
+    Returns how many were numbered.
+    """
+    using = using or router.db_for_write(Change)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    sql = NUMBER_SQL.format(
+        table=quote(Change._meta.db_table),
+        sequence=quote("sequence"),
+        id=quote("id"),
+    )
+    postgresql = connection.vendor == "postgresql"
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            if postgresql:
+                # start after the last numbering committed
+                cursor.execute(
+                    "SELECT pg_advisory_xact_lock(%s)",
+                    [NUMBERING_LOCK],
+                )
+            cursor.execute(sql)
+            numbered = cursor.rowcount
+            if numbered and postgresql:
+                cursor.execute(f"NOTIFY {NOTIFY_CHANNEL}")
+    return numbered
+
+
+def _number_on_commit(using):
+    """Give the changes just committed their numbers
+
+    Failures are left for the next numbering.
+    """
+    try:
+        number_changes(using)
+    except DatabaseError:
+        logger.warning(
+            "Cannot number changes", exc_info=True
+        )
+
+
+def _saved(sender, instance, created, kind, **kwargs):
+    """Log a save"""
+    _log(kind, [instance.pk], added=created)
+
+
+def _deleted(sender, instance, kind, **kwargs):
+    """Log a delete"""
+    _log(kind, [instance.pk], deleted=True)
+
+
+def _relations_changed(
+    sender,
+    instance,
+    action,
+    reverse,
+    pk_set,
+    kind,
+    source,
+    target,
+    **kwargs,
+):
+    """Log the objects whose relations changed
+
+    When reverse, instance is the related object (as for
+    tag.startup_set.add()) and pk_set holds the tracked
+    objects; those losing a cleared relation are read before
+    the clear.
+    """
+    if not reverse:
+        if action in (
+            "post_add",
+            "post_remove",
+            "post_clear",
+        ):
+            _log(kind, [instance.pk])
+    elif action in ("post_add", "post_remove"):
+        _log(kind, pk_set)
+    elif action == "pre_clear":
+        _log(
+            kind,
+            sender.objects.filter(
+                **{target: instance.pk}
+            ).values_list(source, flat=True),
+        )
+
+
+def track_changes(model, kind):
+    """Log changes to model's objects, as kind
+
+    Changes to its many-to-many relations count as saves of
+    the object, whichever side changed them.
+    """
+    _kinds[model] = kind
+    uid = f"changes:{kind}"
+    post_save.connect(
+        partial(_saved, kind=kind),
+        sender=model,
+        weak=False,
+        dispatch_uid=f"{uid}:save",
+    )
+    post_delete.connect(
+        partial(_deleted, kind=kind),
+        sender=model,
+        weak=False,
+        dispatch_uid=f"{uid}:delete",
+    )
+    for field in model._meta.many_to_many:
+        m2m_changed.connect(
+            partial(
+                _relations_changed,
+                kind=kind,
+                source=f"{field.m2m_field_name()}_id",
+                target=f"{field.m2m_reverse_field_name()}_id",
+            ),
+            sender=field.remote_field.through,
+            weak=False,
+            dispatch_uid=f"{uid}:{field.name}",
+        )
+
+
+def log_created(model, objects):
+    """Log objects inserted without signals, as added
+
+    Objects need their primary keys. Does nothing unless
+    model's changes are tracked.
+    """
+    kind = _kinds.get(model)
+    if kind is not None:
+        _log(kind, [obj.pk for obj in objects], added=True)
+
+
+def latest_cursor():
+    """Return the cursor after every logged change"""
+    return encode([latest_sequence()])
+
+
+def _numbered(queryset, after, size, fields):
+    """Return rows numbered after after, and if there are more
+
+    Rows are values_list() tuples of fields, the first being
+    "sequence".
+    """
+    rows = list(
+        queryset.filter(sequence__gt=after)
+        .order_by("sequence")
+        .values_list(*fields)[: size + 1]
+    )
+    return rows[:size], len(rows) > size
+
+
+def latest_sequence():
+    """Return the number of the last logged change, or 0"""
+    return (
+        Change.objects.aggregate(last=Max("sequence"))[
+            "last"
+        ]
+        or 0
+    )
+
+
+def horizon():
+    """Return the number of the last change forgotten, or 0"""
+    return (
+        ChangeHorizon.objects.values_list(
+            "sequence", flat=True
+        ).first()
+        or 0
+    )
+
+
+def additions_since(after, kinds, size=500):
+    """Return objects of kinds added after change number after
+
+    Returns (change number, kind, primary key) tuples, in the
+    order of the log, and whether there are more.
+    """
+    return _numbered(
+        Change.objects.filter(kind__in=kinds, added=True),
+        after,
+        size,
+        ["sequence", "kind", "object_id"],
+    )
+
+
+def changes_since(cursor, size=500):
+    """Return a batch of the changes after cursor
+
+    Reads at most size rows. Raises ValueError for cursors
+    not made by this module, and CursorExpired for cursors
+    before the horizon: fetch everything again.
+    """
+    (after,) = decode(cursor, 1)
+    if not isinstance(after, int):
+        raise ValueError(f"Invalid cursor {cursor!r}")
+    rows, more = _numbered(
+        Change.objects.all(),
+        after,
+        size,
+        ["sequence", "kind", "object_id", "deleted"],
+    )
+    # read after the rows: compaction moves the horizon
+    # before forgetting, in the same transaction
+    if after < horizon():
+        raise CursorExpired(
+            f"Changes after {cursor!r} were forgotten"
+        )
+    latest = {}
+    for _sequence, kind, object_id, deleted in rows:
+        # later changes to an object replace earlier ones
+        latest[kind, object_id] = deleted
+    saved = {}
+    removed = {}
+    for (kind, object_id), deleted in latest.items():
+        found = removed if deleted else saved
+        found.setdefault(kind, []).append(object_id)
+    return ChangeBatch(
+        saved,
+        removed,
+        encode([rows[-1][0]]) if rows else cursor,
+        more,
+    )
+
+
+def compact(max_age=None, batch_size=1000):
+    """Remove the changes a later change supersedes
+
+    Deletes older than max_age (a timedelta), if given, are
+    removed too, and the horizon moved past them: clients
+    that last synchronized before then must fetch everything
+    again. Returns the number of rows removed.
+    """
+    number_changes()
+    superseded = []
+    last = {}
+    rows = (
+        Change.objects.filter(sequence__isnull=False)
+        .order_by("-sequence")
+        .values_list("pk", "kind", "object_id")
+        .iterator()
+    )
+    for pk, kind, object_id in rows:
+        if (kind, object_id) in last:
+            superseded.append(pk)
+        else:
+            last[kind, object_id] = pk
+    removed = 0
+    for batch in batches(superseded, batch_size):
+        removed += Change.objects.filter(
+            pk__in=batch
+        ).delete()[0]
+    if max_age is not None:
+        forgotten = Change.objects.filter(
+            deleted=True,
+            sequence__isnull=False,
+            created__lt=timezone.now() - max_age,
+        )
+        with transaction.atomic():
+            newest = forgotten.aggregate(
+                newest=Max("sequence")
+            )["newest"]
+            if newest is not None:
+                ChangeHorizon.objects.get_or_create(pk=1)
+                ChangeHorizon.objects.filter(
+                    pk=1, sequence__lt=newest
+                ).update(sequence=newest)
+                removed += forgotten.filter(
+                    sequence__lte=newest
+                ).delete()[0]
+    return removed
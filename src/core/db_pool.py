@@ -0,0 +1,250 @@
+"""A thread-safe pool of database connections
+
+Django opens a connection per request unless CONN_MAX_AGE is
+set, and even then keeps exactly one connection per thread.
+The pool lets threads share a bounded set of open connections,
+checks their health when they are handed out, and records how
+long callers wait for one.
+
+The pool knows nothing about any particular database driver:
+backends (see core.backends.postgresql) pass in the functions
+that create, check, reset and close connections.
+"""
+import logging
+from collections import deque
+from threading import Condition, Lock
+from time import monotonic
+
+logger = logging.getLogger(__name__)
+
+_pools = {}
+_pools_lock = Lock()
+
+
+class PoolTimeout(Exception):
+    """No connection became available in time"""
+
+
+class ConnectionPool:
+    """Hand out and take back database connections
+
+    max_size:    most connections open at once
+    timeout:     seconds to wait for a free connection
+    max_age:     seconds before a connection is recycled
+    check_after: seconds a connection may sit idle before
+                 it is health-checked on checkout
+    slow_wait:   log a warning if a checkout waits longer
+    """
+
+    def __init__(
+        self,
+        max_size=4,
+        timeout=10.0,
+        max_age=None,
+        check_after=30.0,
+        slow_wait=0.1,
+        check=None,
+        reset=None,
+        close=None,
+    ):
+        """Configure limits and connection callbacks"""
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.check_after = check_after
+        self.slow_wait = slow_wait
+        self._check = check or (lambda conn: True)
+        self._reset = reset or (lambda conn: True)
+        self._close = close or (lambda conn: conn.close())
+        self._cond = Condition(Lock())
+        self._idle = deque()  # (conn, returned_at), LIFO
+        self._born = {}  # id(conn) -> created_at
+        self._size = 0
+        self._in_use = 0
+        self._metrics = dict.fromkeys(
+            (
+                "checkouts",
+                "created",
+                "discarded",
+                "failed_checks",
+                "timeouts",
+                "waits",
+            ),
+            0,
+        )
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def checkout(self, create):
+        """Return an open connection
+
+        Reuse an idle connection if one passes its health
+        check; otherwise call create() if the pool has room,
+        or wait for another thread to return a connection.
+        """
+        start = monotonic()
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    conn = returned_at = None
+                    self._size += 1
+                    break
+                remaining = self.timeout - (
+                    monotonic() - start
+                )
+                if remaining <= 0:
+                    self._metrics["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No connection free after "
+                        f"{self.timeout}s "
+                        f"(max_size={self.max_size})"
+                    )
+                self._cond.wait(remaining)
+            self._in_use += 1
+            self._record_wait(monotonic() - start)
+
+        if conn is not None:
+            if self._usable(conn, returned_at):
+                return conn
+            self._discard(conn, in_use=False)
+        try:
+            conn = create()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._born[id(conn)] = monotonic()
+            self._metrics["created"] += 1
+        return conn
+
+    def checkin(self, conn):
+        """Take a connection back, keeping it if reusable"""
+        with self._cond:
+            born = self._born.get(id(conn), 0)
+        expired = (
+            self.max_age is not None
+            and monotonic() - born > self.max_age
+        )
+        if expired or not self._safely(self._reset, conn):
+            self._discard(conn)
+            return
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append((conn, monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._cond:
+            idle, self._idle = self._idle, deque()
+            self._size -= len(idle)
+            for conn, _returned_at in idle:
+                self._born.pop(id(conn), None)
+        for conn, _returned_at in idle:
+            self._safely(self._close, conn)
+
+    def stats(self):
+        """Return a snapshot of pool occupancy and wait times"""
+        with self._cond:
+            checkouts = self._metrics["checkouts"]
+            return dict(
+                self._metrics,
+                size=self._size,
+                in_use=self._in_use,
+                idle=len(self._idle),
+                max_size=self.max_size,
+                wait_total=self._wait_total,
+                wait_max=self._wait_max,
+                wait_mean=(
+                    self._wait_total / checkouts
+                    if checkouts
+                    else 0.0
+                ),
+            )
+
+    def _record_wait(self, waited):
+        """Update wait metrics; caller holds the lock"""
+        self._metrics["checkouts"] += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        if waited > self.slow_wait:
+            self._metrics["waits"] += 1
+            logger.warning(
+                "Waited %.3fs for a database connection "
+                "(%d of %d in use)",
+                waited,
+                self._in_use,
+                self.max_size,
+            )
+
+    def _usable(self, conn, returned_at):
+        """Health-check connections that sat idle too long"""
+        if monotonic() - returned_at < self.check_after:
+            return True
+        if self._safely(self._check, conn):
+            return True
+        with self._cond:
+            self._metrics["failed_checks"] += 1
+        return False
+
+    def _discard(self, conn, in_use=True):
+        """Close a connection and free its slot in the pool
+
+        Connections handed back by checkout() keep their
+        slot, since checkout() replaces them immediately.
+        """
+        self._safely(self._close, conn)
+        with self._cond:
+            self._born.pop(id(conn), None)
+            self._metrics["discarded"] += 1
+            if in_use:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+
+    @staticmethod
+    def _safely(function, conn):
+        """Call function(conn); return False if it fails"""
+        try:
+            return function(conn) is not False
+        except Exception:
+            return False
+
+
+def get_pool(key, options=None, **callbacks):
+    """Return the pool for key, creating it if necessary
+
+    Options are the upper-case POOL settings of a database,
+    e.g. {"MAX_SIZE": 4, "TIMEOUT": 10}.
+    """
+    with _pools_lock:
+        if key not in _pools:
+            kwargs = {
+                name.lower(): value
+                for name, value in (options or {}).items()
+            }
+            _pools[key] = ConnectionPool(
+                **kwargs, **callbacks
+            )
+        return _pools[key]
+
+
+def close_pool(key):
+    """Close the idle connections of a pool and forget it"""
+    with _pools_lock:
+        pool = _pools.pop(key, None)
+    if pool is not None:
+        pool.close_all()
+
+
+def pool_stats():
+    """Return statistics for every pool in this process"""
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {key: pool.stats() for key, pool in pools}
@@ -0,0 +1,122 @@
+"""Database routing between the primary and read replicas
+
+Writes always go to the primary ("default") database. Reads go
+to a replica only while the current thread has been told to
+use one, which ReplicaRoutingMiddleware does for safe read
+paths (see core.middleware). Everything else—management
+commands, the shell, form views, and any read made after a
+write—stays on the primary.
+
+Database Router Documentation:
+https://docs.djangoproject.com/en/2.1/topics/db/multi-db/#automatic-database-routing
+"""
+import random
+from contextlib import contextmanager
+from threading import local
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_state = local()
+
+
+def get_replicas():
+    """Return the aliases of configured read replicas"""
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def route_reads_to_replica(alias=None):
+    """Send reads in the current thread to a replica
+
+    Pick a random replica unless one is specified. Does
+    nothing if no replicas are configured.
+    """
+    replicas = get_replicas()
+    if alias is None and replicas:
+        alias = random.choice(replicas)
+    _state.replica = alias
+
+
+def reset_routing():
+    """Send reads in the current thread to the primary"""
+    _state.replica = None
+    _state.wrote = False
+
+
+def wrote_to_primary():
+    """Has a write been routed since the last reset?"""
+    return getattr(_state, "wrote", False)
+
+
+@contextmanager
+def request_routing():
+    """Route the reads of a request afresh in this block
+
+    The routing of an enclosing request, such as a batch of
+    requests (see core.batch), is restored after.
+    """
+    previous = (
+        getattr(_state, "replica", None),
+        wrote_to_primary(),
+    )
+    reset_routing()
+    try:
+        yield
+    finally:
+        _state.replica, _state.wrote = previous
+
+
+@contextmanager
+def use_replica(alias=None):
+    """Route reads in this block to a replica
+
+    Useful for scripts and tests; views get this behavior
+    from ReplicaRoutingMiddleware.
+    """
+    previous = (
+        getattr(_state, "replica", None),
+        wrote_to_primary(),
+    )
+    reset_routing()
+    route_reads_to_replica(alias)
+    try:
+        yield _state.replica
+    finally:
+        _state.replica, _state.wrote = previous
+
+
+class PrimaryReplicaRouter:
+    """Route reads to replicas and writes to the primary"""
+
+    def db_for_read(self, model, **hints):
+        """Use the active replica until the first write
+
+        Returning None lets Django fall back to the primary.
+        """
+        if wrote_to_primary():
+            return DEFAULT_DB_ALIAS
+        return getattr(_state, "replica", None)
+
+    def db_for_write(self, model, **hints):
+        """Send all writes to the primary
+
+        Remember the write so that later reads in the same
+        request see it (read-your-writes).
+        """
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Allow relations; all databases hold the same data"""
+        aliases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        return (
+            obj1._state.db in aliases
+            and obj2._state.db in aliases
+        )
+
+    def allow_migrate(self, db, app_label, **hints):
+        """Only migrate the primary
+
+        Replicas receive schema changes via replication.
+        """
+        return db not in get_replicas()
@@ -0,0 +1,410 @@
+"""Stream new objects to browsers, as server-sent events
+
+Dashboards polled lists every few seconds. Instead, they may
+open an EventSource on /events/, served by the serve_events
+management command: an aiohttp server, so that each client
+costs a coroutine, not a worker process or thread.
+
+One EventHub per process reads the objects added to the
+change log (see core.changes) and pushes them to every
+client. It wakes up on PostgreSQL NOTIFY, sent as changes
+are numbered, or else polls the log every poll_interval
+seconds. If the listening connection drops (say, as the
+database restarts), the hub polls until it can listen again.
+Database queries run in a thread pool, never in the event
+loop.
+
+Apps choose what is streamed with register_stream(), in
+their events.py module, found on start-up:
+
+    @register_stream("newslink")
+    def describe_newslinks(pks):
+        return {pk: {"title": ..., "startups": [...], ...}}
+
+Each event's data is a dict with "startups" and "tags" lists
+of slugs, used to filter: /events/?startup=jambon&tag=django
+streams objects related to any of the startups given, and to
+any of the tags given. Event ids are change log numbers: a
+reconnecting EventSource sends the last it saw in the
+Last-Event-ID header, and gets the events it missed.
+
+Server-Sent Events Specification:
+https://html.spec.whatwg.org/multipage/server-sent-events.html
+"""
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from aiohttp import web
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connections
+from django.utils.module_loading import autodiscover_modules
+
+from .changes import (
+    NOTIFY_CHANNEL,
+    additions_since,
+    latest_sequence,
+)
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE_INTERVAL = 15  # seconds
+RETRY = 3000  # milliseconds before browsers reconnect
+STREAMS = {}
+
+
+def register_stream(kind):
+    """Stream objects of kind added to the change log
+
+    Decorates a function taking primary keys and returning
+    event data by primary key; objects left out are skipped.
+    """
+    return partial(_register, kind)
+
+
+def _register(kind, describe):
+    """Keep describe as the describer of kind"""
+    STREAMS[kind] = describe
+    return describe
+
+
+def format_event(number, kind, data):
+    """Return an event in the text/event-stream format"""
+    encoded = json.dumps(
+        data, cls=DjangoJSONEncoder, separators=(",", ":")
+    )
+    return (
+        f"id: {number}\nevent: {kind}\ndata: {encoded}\n\n"
+    ).encode()
+
+
+def matches(data, startups, tags):
+    """Return True if an event passes a client's filters"""
+    if startups and startups.isdisjoint(data["startups"]):
+        return False
+    if tags and tags.isdisjoint(data["tags"]):
+        return False
+    return True
+
+
+def _read_events(after, size):
+    """Return events of objects added after change after
+
+    Returns ([(number, kind, data), ...], the number of the
+    last change read, whether there are more), in the order
+    of the log. Runs in a thread of the pool.
+    """
+    close_old_connections()
+    try:
+        rows, more = additions_since(
+            after, list(STREAMS), size
+        )
+        pks = {}
+        for _number, kind, pk in rows:
+            pks.setdefault(kind, []).append(pk)
+        described = {
+            kind: STREAMS[kind](found)
+            for kind, found in pks.items()
+        }
+        events = [
+            (number, kind, described[kind][pk])
+            for number, kind, pk in rows
+            if pk in described[kind]
+        ]
+        last = rows[-1][0] if rows else after
+        return events, last, more
+    finally:
+        close_old_connections()
+
+
+def _connect_listener(wrapper):
+    """Return a new connection listening for changes
+
+    The connection is its own, outside any pool: it stays
+    open as long as the hub listens.
+    """
+    connection = wrapper.Database.connect(
+        **wrapper.get_connection_params()
+    )
+    try:
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+    except Exception:
+        connection.close()
+        raise
+    return connection
+
+
+def _read_latest():
+    """Return the number of the last change"""
+    close_old_connections()
+    try:
+        return latest_sequence()
+    finally:
+        close_old_connections()
+
+
+class EventHub:
+    """Read new events once, and push them to every client"""
+
+    def __init__(
+        self,
+        poll_interval=5.0,
+        batch_size=500,
+        queue_size=1000,
+        executor=None,
+    ):
+        """Poll the change log every poll_interval seconds
+
+        Clients more than queue_size events behind are
+        disconnected; they reconnect with Last-Event-ID.
+        """
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="events"
+        )
+        self.position = None
+        self.queues = set()
+        self.woken = None
+        self.listener = None
+
+    async def run_in_thread(self, function, *args):
+        """Await function(*args), run in the thread pool"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.executor, partial(function, *args)
+        )
+
+    async def start(self):
+        """Begin after the last change"""
+        self.woken = asyncio.Event()
+        self.position = await self.run_in_thread(
+            _read_latest
+        )
+
+    async def poll(self):
+        """Push the events added since the last poll
+
+        Returns True if the batch was full: there are more.
+        """
+        events, last, more = await self.run_in_thread(
+            _read_events, self.position, self.batch_size
+        )
+        self.position = last
+        for event in events:
+            for queue in list(self.queues):
+                if queue.qsize() >= self.queue_size:
+                    # the client is too slow; drop it
+                    self.queues.discard(queue)
+                    queue.put_nowait(None)
+                else:
+                    queue.put_nowait(event)
+        return more
+
+    async def run(self):
+        """Poll whenever woken up, or every poll_interval
+
+        Call start() first.
+        """
+        try:
+            while True:
+                if self.listener is None:
+                    await self.listen_again()
+                try:
+                    await asyncio.wait_for(
+                        self.woken.wait(),
+                        self.poll_interval,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self.woken.clear()
+                try:
+                    if await self.poll():
+                        self.woken.set()
+                except Exception:
+                    logger.exception(
+                        "Polling events failed"
+                    )
+        finally:
+            self.unlisten()
+
+    async def listen(self):
+        """Wake up on PostgreSQL NOTIFY; return the connection
+
+        Returns None on other databases, which are polled.
+        """
+        wrapper = connections["default"]
+        if wrapper.vendor != "postgresql":
+            return None
+        connection = await self.run_in_thread(
+            _connect_listener, wrapper
+        )
+        fileno = connection.fileno()
+
+        def notified():
+            """Wake the hub, or stop listening if dropped"""
+            try:
+                connection.poll()
+            except wrapper.Database.OperationalError:
+                logger.warning(
+                    "Lost the connection listening for "
+                    "changes",
+                    exc_info=True,
+                )
+                self.unlisten()
+                # notifications may have been missed
+                self.woken.set()
+                return
+            if connection.notifies:
+                connection.notifies.clear()
+                self.woken.set()
+
+        asyncio.get_event_loop().add_reader(
+            fileno, notified
+        )
+        self.listener = (connection, fileno)
+        return connection
+
+    async def listen_again(self):
+        """Listen, or keep polling if the database refuses"""
+        try:
+            await self.listen()
+        except Exception:
+            logger.warning(
+                "Cannot listen for changes", exc_info=True
+            )
+
+    def unlisten(self):
+        """Stop listening, and close the connection"""
+        if self.listener is None:
+            return
+        connection, fileno = self.listener
+        self.listener = None
+        asyncio.get_event_loop().remove_reader(fileno)
+        connection.close()
+
+    def subscribe(self):
+        """Return a queue receiving every new event"""
+        # room for the None ending the stream
+        queue = asyncio.Queue(self.queue_size + 1)
+        self.queues.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        """Stop pushing events to queue"""
+        self.queues.discard(queue)
+
+    async def replay(self, after, until):
+        """Yield the events after after, up to until"""
+        while after < until:
+            events, last, more = await self.run_in_thread(
+                _read_events, after, self.batch_size
+            )
+            for event in events:
+                if event[0] <= until:
+                    yield event
+            if not more or last == after:
+                return
+            after = last
+
+
+async def _pushed(queue):
+    """Yield the events pushed to queue, until it is dropped
+
+    Yields None after KEEPALIVE_INTERVAL seconds without.
+    """
+    while True:
+        try:
+            event = await asyncio.wait_for(
+                queue.get(), KEEPALIVE_INTERVAL
+            )
+        except asyncio.TimeoutError:
+            yield None
+            continue
+        if event is None:
+            return
+        yield event
+
+
+async def _send(response, event, startups, tags):
+    """Write event if it passes the filters
+
+    None is written as a comment, keeping proxies from
+    closing the idle connection.
+    """
+    if event is None:
+        await response.write(b": keepalive\n\n")
+        return
+    number, kind, data = event
+    if matches(data, startups, tags):
+        await response.write(
+            format_event(number, kind, data)
+        )
+
+
+async def stream_events(request):
+    """Send events to a client until it disconnects"""
+    hub = request.app["hub"]
+    startups = set(request.query.getall("startup", []))
+    tags = set(request.query.getall("tag", []))
+    last_id = request.headers.get("Last-Event-ID", "")
+    response = web.StreamResponse(
+        headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            # stop proxies such as nginx from buffering
+            "X-Accel-Buffering": "no",
+        }
+    )
+    await response.prepare(request)
+    # events after until are pushed to the queue; those
+    # before, since Last-Event-ID, are read from the log
+    queue = hub.subscribe()
+    until = hub.position
+    try:
+        await response.write(f"retry: {RETRY}\n\n".encode())
+        if last_id.isdigit():
+            async for event in hub.replay(
+                int(last_id), until
+            ):
+                await _send(response, event, startups, tags)
+        async for event in _pushed(queue):
+            await _send(response, event, startups, tags)
+    except ConnectionResetError:
+        pass
+    finally:
+        hub.unsubscribe(queue)
+    return response
+
+
+async def _start_hub(app):
+    """Start reading events"""
+    await app["hub"].start()
+    app["hub_task"] = asyncio.ensure_future(
+        app["hub"].run()
+    )
+
+
+async def _stop_hub(app):
+    """Stop reading events"""
+    app["hub_task"].cancel()
+
+
+def make_app(hub):
+    """Return the aiohttp application serving /events/
+
+    Streams are registered by the events.py module of each
+    app.
+    """
+    autodiscover_modules("events")
+    app = web.Application()
+    app["hub"] = hub
+    app.router.add_get("/events/", stream_events)
+    app.on_startup.append(_start_hub)
+    app.on_cleanup.append(_stop_hub)
+    return app
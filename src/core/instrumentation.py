@@ -0,0 +1,112 @@
+"""Measure database work per request and per URL name
+
+Database Instrumentation Documentation:
+https://docs.djangoproject.com/en/2.1/topics/db/instrumentation/
+"""
+from contextlib import ExitStack, contextmanager
+from threading import Lock
+from time import perf_counter
+
+from django.db import connections
+
+
+class QueryCounter:
+    """Database execute wrapper that counts and times queries"""
+
+    def __init__(self):
+        """Start counting from zero"""
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Run the query, recording the time it takes"""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += perf_counter() - start
+
+
+@contextmanager
+def wrap_queries(wrapper):
+    """Install an execute wrapper on every connection"""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(
+                connection.execute_wrapper(wrapper)
+            )
+        yield wrapper
+
+
+@contextmanager
+def count_queries():
+    """Count queries sent to any database in this block
+
+    with count_queries() as counter:
+        ...
+    print(counter.count, counter.duration)
+    """
+    with wrap_queries(QueryCounter()) as counter:
+        yield counter
+
+
+@contextmanager
+def count_request_queries(request):
+    """Count the queries made while handling request
+
+    The first middleware to ask installs a QueryCounter; the
+    middleware it wraps share that counter, so each query
+    goes through a single execute wrapper.
+    """
+    counter = getattr(request, "query_counter", None)
+    if counter is not None:
+        yield counter
+        return
+    with count_queries() as counter:
+        request.query_counter = counter
+        yield counter
+
+
+class EndpointStats:
+    """Aggregate query counts and times by URL name"""
+
+    def __init__(self):
+        """Start with no recorded requests"""
+        self._lock = Lock()
+        self._stats = {}
+
+    def record(self, url_name, queries, duration):
+        """Add one request to the totals for url_name"""
+        with self._lock:
+            stats = self._stats.setdefault(
+                url_name,
+                {
+                    "requests": 0,
+                    "queries": 0,
+                    "query_time": 0.0,
+                    "max_queries": 0,
+                },
+            )
+            stats["requests"] += 1
+            stats["queries"] += queries
+            stats["query_time"] += duration
+            stats["max_queries"] = max(
+                stats["max_queries"], queries
+            )
+
+    def snapshot(self):
+        """Return a copy of the totals"""
+        with self._lock:
+            return {
+                name: dict(stats)
+                for name, stats in self._stats.items()
+            }
+
+    def reset(self):
+        """Forget all totals"""
+        with self._lock:
+            self._stats.clear()
+
+
+endpoint_stats = EndpointStats()
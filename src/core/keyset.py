@@ -0,0 +1,176 @@
+"""Page through ordered rows with cursors, not offsets
+
+A page with OFFSET reads and discards every row before it,
+and a page count needs COUNT(*): both grow with the table.
+Keyset pagination instead remembers the sort key of the last
+row shown (the cursor) and fetches the rows after it in the
+sort order, found with the index. Links to pages depend only
+on the rows at their edges, so they stay valid as rows are
+added.
+
+Keys are (path, descending) pairs, such as
+[("pub_date", True), ("title", False), ("pk", False)]. The
+last key must be unique, so that every row has its own
+cursor.
+
+Keyset Pagination: https://use-the-index-luke.com/no-offset
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+AFTER_VAR = "after"
+BEFORE_VAR = "before"
+
+KeysetPage = namedtuple(
+    "KeysetPage", ["object_list", "next", "previous"]
+)
+KeysetPage.__doc__ = """A page of rows and the cursors of its
+neighbours (None if there is no such page)"""
+
+
+def encode(values):
+    """Turn sort key values into a URL-safe cursor"""
+    return urlsafe_b64encode(
+        json.dumps(values, cls=DjangoJSONEncoder).encode()
+    ).decode()
+
+
+def decode(cursor, length):
+    """Return the sort key values of a cursor
+
+    Raises ValueError if the cursor is not one of ours.
+    """
+    try:
+        values = json.loads(
+            urlsafe_b64decode(cursor.encode())
+        )
+    except (Base64Error, UnicodeError, ValueError):
+        raise ValueError(f"Invalid cursor {cursor!r}")
+    if (
+        not isinstance(values, list)
+        or len(values) != length
+    ):
+        raise ValueError(f"Invalid cursor {cursor!r}")
+    return values
+
+
+def beyond(keys, values, backward=False):
+    """Match rows after values in the order of keys
+
+    For keys (a, b) ascending: a > x OR (a = x AND b > y).
+    """
+    condition = Q()
+    equal = Q()
+    for (path, descending), bound in zip(keys, values):
+        lookup = "lt" if descending != backward else "gt"
+        condition |= equal & Q(
+            **{f"{path}__{lookup}": bound}
+        )
+        equal &= Q(**{path: bound})
+    return condition
+
+
+def value(obj, path):
+    """Follow a field path such as startup__name from obj"""
+    for name in path.split("__"):
+        obj = getattr(obj, name)
+    return obj
+
+
+def ordering(keys):
+    """Return the order_by() arguments of keys"""
+    return [
+        f"-{path}" if descending else path
+        for path, descending in keys
+    ]
+
+
+def _page(rows, size, after, before, cursor):
+    """Cut rows fetched in the direction of the cursor
+
+    rows holds up to size + 1 rows: one more means there are
+    more pages that way.
+    """
+    more = len(rows) > size
+    rows = rows[:size]
+    if before:
+        rows.reverse()
+    next_cursor = previous_cursor = None
+    if rows and (more or before):
+        next_cursor = cursor(rows[-1])
+    if rows and (more if before else after):
+        previous_cursor = cursor(rows[0])
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def page_queryset(
+    queryset, keys, size, after=None, before=None
+):
+    """Return the page of queryset after or before a cursor
+
+    Runs one query, without OFFSET or COUNT. Raises
+    ValueError for cursors not made by this module.
+    """
+    queryset = queryset.order_by(*ordering(keys))
+    if after:
+        queryset = queryset.filter(
+            beyond(keys, decode(after, len(keys)))
+        )
+    elif before:
+        queryset = queryset.reverse().filter(
+            beyond(
+                keys,
+                decode(before, len(keys)),
+                backward=True,
+            )
+        )
+    return _page(
+        list(queryset[: size + 1]),
+        size,
+        after,
+        before,
+        lambda obj: encode(
+            [value(obj, path) for path, _ in keys]
+        ),
+    )
+
+
+def page_sequence(
+    items, sort_keys, size, after=None, before=None
+):
+    """Return the page of a sorted sequence, like page_queryset
+
+    sort_keys holds the sort key of each item, a tuple, in
+    ascending order and unique: pages are found by bisection.
+    """
+    length = len(sort_keys[0]) if sort_keys else 0
+    if after:
+        start = bisect_right(
+            sort_keys, tuple(decode(after, length))
+        )
+        indexes = range(start, len(items))[: size + 1]
+    elif before:
+        end = bisect_left(
+            sort_keys, tuple(decode(before, length))
+        )
+        indexes = range(end - 1, -1, -1)[: size + 1]
+    else:
+        indexes = range(len(items))[: size + 1]
+    page = _page(
+        list(indexes),
+        size,
+        after,
+        before,
+        lambda index: encode(sort_keys[index]),
+    )
+    return page._replace(
+        object_list=[
+            items[index] for index in page.object_list
+        ]
+    )
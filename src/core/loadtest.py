@@ -0,0 +1,362 @@
+"""Replay a weighted mix of traffic against a running server
+
+Each simulated user is a thread with its own cookies. Users
+pick scenarios at random, in proportion to their weights:
+anonymous reads of HTML lists and details, API list reads,
+and logged in NewsLink creates and Post updates. See the
+loadtest management command.
+
+The harness reads sample slugs from the database the server
+uses, so it must run with the same settings as the server.
+Write scenarios create rows: use a disposable database.
+"""
+import random
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import (
+    HTTPCookieProcessor,
+    HTTPRedirectHandler,
+    Request,
+    build_opener,
+)
+from uuid import uuid4
+
+from django.urls import reverse
+
+from blog.models import Post
+from organizer.models import Startup, Tag
+
+from .benchmarks import percentile
+
+SAMPLE_SIZE = 500
+
+
+class NoRedirect(HTTPRedirectHandler):
+    """Report redirects instead of following them"""
+
+    def redirect_request(self, *args, **kwargs):
+        """Raise HTTPError for 3xx responses"""
+        return None
+
+
+class LoadClient:
+    """HTTP client with a cookie jar and CSRF support"""
+
+    def __init__(self, base_url, timeout=30):
+        """Start a session against base_url"""
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = build_opener(
+            HTTPCookieProcessor(self.cookies), NoRedirect
+        )
+
+    def csrf_token(self):
+        """Return the CSRF cookie, if Django has set one"""
+        for cookie in self.cookies:
+            if cookie.name == "csrftoken":
+                return cookie.value
+        return ""
+
+    def request(self, path, data=None, headers=None):
+        """Send a request; return (status, bytes received)"""
+        body = None
+        if data is not None:
+            data = dict(
+                data, csrfmiddlewaretoken=self.csrf_token()
+            )
+            body = urlencode(data, doseq=True).encode()
+        request = Request(
+            self.base_url + path,
+            data=body,
+            headers=headers or {},
+        )
+        try:
+            with self.opener.open(
+                request, timeout=self.timeout
+            ) as response:
+                return response.status, len(response.read())
+        except HTTPError as error:
+            return error.code, len(error.read())
+
+    def login(self, username, password):
+        """Log in through the admin login form"""
+        path = reverse("admin:login")
+        self.request(path)
+        status, _size = self.request(
+            path,
+            {
+                "username": username,
+                "password": password,
+                "next": reverse("admin:index"),
+            },
+        )
+        if status != 302:
+            raise RuntimeError(
+                f"Login as {username} failed (HTTP {status})"
+            )
+
+
+class Samples:
+    """Slugs and form data of existing objects to request"""
+
+    def __init__(self):
+        """Load a sample of each model from the database"""
+        self.tags = list(
+            Tag.objects.values_list("slug", flat=True)[
+                :SAMPLE_SIZE
+            ]
+        )
+        self.startups = list(
+            Startup.objects.values("pk", "slug")[
+                :SAMPLE_SIZE
+            ]
+        )
+        self.posts = [
+            {
+                "path": post.get_absolute_url(),
+                "update": post.get_update_url(),
+                "form": {
+                    "title": post.title,
+                    "slug": post.slug,
+                    "text": post.text,
+                    "pub_date": post.pub_date.isoformat(),
+                    "tags": [
+                        tag.pk for tag in post.tags.all()
+                    ],
+                    "startups": [
+                        startup.pk
+                        for startup in post.startups.all()
+                    ],
+                },
+            }
+            for post in Post.objects.prefetch_related(
+                "tags", "startups"
+            )[:SAMPLE_SIZE]
+        ]
+        if not (self.tags and self.startups and self.posts):
+            raise RuntimeError(
+                "Load tests need data; try manage.py seed_bench"
+            )
+
+
+def tag_list(client, samples):
+    """Read the list of Tags"""
+    return client.request(reverse("tag_list"))
+
+
+def tag_detail(client, samples):
+    """Read a Tag's page"""
+    slug = random.choice(samples.tags)
+    return client.request(
+        reverse("tag_detail", kwargs={"slug": slug})
+    )
+
+
+def startup_list(client, samples):
+    """Read the list of Startups"""
+    return client.request(reverse("startup_list"))
+
+
+def startup_detail(client, samples):
+    """Read a Startup's page"""
+    slug = random.choice(samples.startups)["slug"]
+    return client.request(
+        reverse("startup_detail", kwargs={"slug": slug})
+    )
+
+
+def post_list(client, samples):
+    """Read the list of Posts"""
+    return client.request(reverse("post_list"))
+
+
+def post_detail(client, samples):
+    """Read a Post's page"""
+    return client.request(
+        random.choice(samples.posts)["path"]
+    )
+
+
+def api_list(client, samples):
+    """Read an API list, whole: API lists are not paged"""
+    name = random.choice(
+        [
+            "api-tag-list",
+            "api-startup-list",
+            "api-newslink-list",
+            "api-post-list",
+        ]
+    )
+    return client.request(
+        reverse(name),
+        headers={"Accept": "application/json"},
+    )
+
+
+def newslink_create(client, samples):
+    """Add a NewsLink to a Startup (logged in)"""
+    startup = random.choice(samples.startups)
+    slug = f"load-{uuid4().hex[:12]}"
+    return client.request(
+        reverse(
+            "newslink_create",
+            kwargs={"startup_slug": startup["slug"]},
+        ),
+        {
+            "title": "Load Test Article",
+            "slug": slug,
+            "pub_date": time.strftime("%Y-%m-%d"),
+            "link": f"https://example.com/{slug}",
+            "startup": startup["pk"],
+        },
+    )
+
+
+def post_update(client, samples):
+    """Save a Post's form unchanged (logged in)"""
+    post = random.choice(samples.posts)
+    return client.request(post["update"], post["form"])
+
+
+# Successful writes redirect; a 200 means the form had errors
+Scenario = namedtuple(
+    "Scenario", ["function", "weight", "login", "expected"]
+)
+
+SCENARIOS = {
+    "tag_list": Scenario(tag_list, 5, False, 200),
+    "tag_detail": Scenario(tag_detail, 10, False, 200),
+    "startup_list": Scenario(startup_list, 15, False, 200),
+    "startup_detail": Scenario(
+        startup_detail, 20, False, 200
+    ),
+    "post_list": Scenario(post_list, 10, False, 200),
+    "post_detail": Scenario(post_detail, 15, False, 200),
+    "api_list": Scenario(api_list, 15, False, 200),
+    "newslink_create": Scenario(
+        newslink_create, 5, True, 302
+    ),
+    "post_update": Scenario(post_update, 5, True, 302),
+}
+
+
+class LoadTest:
+    """Run simulated users and collect their measurements
+
+    weights overrides SCENARIOS weights by scenario name; a
+    weight of 0 disables a scenario.
+    """
+
+    def __init__(
+        self,
+        base_url,
+        concurrency=10,
+        duration=30.0,
+        weights=None,
+        credentials=None,
+    ):
+        """Configure the run"""
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.duration = duration
+        self.weights = {
+            name: (weights or {}).get(name, scenario.weight)
+            for name, scenario in SCENARIOS.items()
+        }
+        self.credentials = credentials
+        self.samples = Samples()
+
+    @property
+    def needs_login(self):
+        """Do any enabled scenarios need a logged in user?"""
+        return any(
+            self.weights[name] and scenario.login
+            for name, scenario in SCENARIOS.items()
+        )
+
+    def mix(self):
+        """Return the enabled scenarios' names and weights"""
+        names = [
+            name
+            for name in self.weights
+            if self.weights[name]
+        ]
+        return names, [self.weights[name] for name in names]
+
+    def user(self, deadline):
+        """Send requests until the deadline; return timings"""
+        client = LoadClient(self.base_url)
+        if self.needs_login:
+            client.login(*self.credentials)
+        names, weights = self.mix()
+        results = []
+        while time.monotonic() < deadline:
+            name = random.choices(names, weights)[0]
+            scenario = SCENARIOS[name]
+            start = time.monotonic()
+            try:
+                status, size = scenario.function(
+                    client, self.samples
+                )
+            except (URLError, OSError):
+                status, size = 0, 0
+            results.append(
+                (
+                    name,
+                    status == scenario.expected,
+                    size,
+                    time.monotonic() - start,
+                )
+            )
+        return results
+
+    def run(self):
+        """Run all users concurrently; return a report"""
+        deadline = time.monotonic() + self.duration
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            futures = [
+                pool.submit(self.user, deadline)
+                for _ in range(self.concurrency)
+            ]
+            results = [
+                result
+                for future in futures
+                for result in future.result()
+            ]
+        return self.report(results)
+
+    def report(self, results):
+        """Summarize throughput, latency and errors"""
+        by_name = defaultdict(list)
+        for result in results:
+            by_name[result[0]].append(result)
+        return {
+            "concurrency": self.concurrency,
+            "duration": self.duration,
+            "requests": len(results),
+            "throughput": len(results) / self.duration,
+            "scenarios": {
+                name: summarize(rows)
+                for name, rows in sorted(by_name.items())
+            },
+            "total": summarize(results) if results else {},
+        }
+
+
+def summarize(rows):
+    """Summarize (name, succeeded, size, seconds) rows"""
+    timings = [row[3] for row in rows]
+    return {
+        "requests": len(rows),
+        "errors": sum(1 for row in rows if not row[1]),
+        "bytes": sum(row[2] for row in rows),
+        "p50_ms": percentile(timings, 0.50) * 1000,
+        "p90_ms": percentile(timings, 0.90) * 1000,
+        "p99_ms": percentile(timings, 0.99) * 1000,
+        "max_ms": max(timings) * 1000,
+    }
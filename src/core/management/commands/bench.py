@@ -0,0 +1,166 @@
+"""Benchmark every route at several dataset sizes"""
+import json
+import platform
+from datetime import datetime
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from django.db import connection
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from ...benchmarks import benchmark, compare_encodings, seed
+
+
+class Command(BaseCommand):
+    """Time routes against freshly seeded test databases
+
+    Like the test runner, the benchmark creates and destroys
+    its own databases; existing data is never touched.
+
+    python3 manage.py bench --sizes 100 1000 10000
+        --output bench.json --compare previous.json
+    """
+
+    help = "Time every route for several dataset sizes."
+
+    def add_arguments(self, parser):
+        """Define command-line arguments"""
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[100, 1000],
+            help="Numbers of Startups to seed",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Requests per route to time",
+        )
+        parser.add_argument(
+            "--output", help="File to write JSON results to"
+        )
+        parser.add_argument(
+            "--compare",
+            help="JSON results of a previous run",
+        )
+
+    def handle(self, *args, **options):
+        """Seed each size, time each route, report"""
+        previous = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as results:
+                    previous = json.load(results)
+            except (OSError, ValueError) as error:
+                raise CommandError(
+                    f"Cannot read {options['compare']}: {error}"
+                )
+        report = {
+            "meta": {
+                "date": datetime.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "repeat": options["repeat"],
+            },
+            "runs": self.run(
+                options["sizes"], options["repeat"]
+            ),
+        }
+        for run in report["runs"]:
+            self.print_run(run, previous)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+
+    def run(self, sizes, repeat):
+        """Benchmark each size in fresh test databases"""
+        setup_test_environment(debug=False)
+        old_config = setup_databases(
+            verbosity=0, interactive=False
+        )
+        runs = []
+        try:
+            for size in sizes:
+                call_command(
+                    "flush", interactive=False, verbosity=0
+                )
+                rows = seed(size)
+                user = get_user_model().objects.create_superuser(
+                    "bench", "bench@example.com", "bench"
+                )
+                runs.append(
+                    {
+                        "size": size,
+                        "rows": rows,
+                        "routes": benchmark(user, repeat),
+                        "encodings": compare_encodings(
+                            repeat
+                        ),
+                    }
+                )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+        return runs
+
+    def print_run(self, run, previous=None):
+        """Print one size's results as a table"""
+        before = {}
+        for old_run in (previous or {}).get("runs", []):
+            if old_run["size"] == run["size"]:
+                before = old_run["routes"]
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"\n{run['size']} startups: "
+                + ", ".join(
+                    f"{count} {name}"
+                    for name, count in run["rows"].items()
+                )
+            )
+        )
+        self.stdout.write(
+            f"{'route':<24}{'p50 ms':>9}{'p95 ms':>9}"
+            f"{'queries':>9}{'KiB':>9}"
+            + ("   p50 vs previous" if previous else "")
+        )
+        for name, result in run["routes"].items():
+            line = (
+                f"{name:<24}{result['p50_ms']:>9.1f}"
+                f"{result['p95_ms']:>9.1f}"
+                f"{result['queries']:>9}"
+                f"{result['memory_kb']:>9.0f}"
+            )
+            if name in before and before[name]["p50_ms"]:
+                ratio = (
+                    result["p50_ms"]
+                    / before[name]["p50_ms"]
+                )
+                line += f"   {ratio:.2f}x"
+            self.stdout.write(line)
+        self.print_encodings(run.get("encodings", {}))
+
+    def print_encodings(self, encodings):
+        """Print the cost and size of each API encoding"""
+        for name, results in encodings.items():
+            self.stdout.write(
+                f"\n{name:<24}{'p50 ms':>9}{'KiB':>9}"
+            )
+            for label, result in results.items():
+                self.stdout.write(
+                    f"  {label:<22}{result['p50_ms']:>9.2f}"
+                    f"{result['bytes'] / 1024:>9.1f}"
+                )
@@ -0,0 +1,51 @@
+"""Remove superseded rows from the change log"""
+from datetime import timedelta
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from ...changes import compact
+
+
+class Command(BaseCommand):
+    """Keep about one change log row per object
+
+    Run on a schedule. With --max-age, deletes older than that
+    many days are forgotten too: clients idle for longer must
+    fetch everything again.
+
+    python3 manage.py compact_changes --max-age 30
+    """
+
+    help = "Compact the change log of the API."
+
+    def add_arguments(self, parser):
+        """Define command-line arguments"""
+        parser.add_argument(
+            "--max-age",
+            type=float,
+            help="Forget deletes this many days old",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows to remove per query",
+        )
+
+    def handle(self, *args, **options):
+        """Compact the log and report"""
+        start = perf_counter()
+        max_age = options["max_age"]
+        removed = compact(
+            max_age=None
+            if max_age is None
+            else timedelta(days=max_age),
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{removed} changes removed "
+                f"in {perf_counter() - start:.1f}s"
+            )
+        )
@@ -0,0 +1,226 @@
+"""Load test the site with concurrent simulated users"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from secrets import token_urlsafe
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+
+from ...loadtest import SCENARIOS, LoadTest
+
+
+def wait_for_port(host, port, timeout=30):
+    """Wait until a server accepts connections on host:port"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), 1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"No server on {host}:{port}")
+
+
+class Command(BaseCommand):
+    """Replay a weighted traffic mix at a local server
+
+    Either point the command at a server (--url) or have it
+    start one: runserver, or gunicorn with a given number of
+    workers and threads.
+
+    python3 manage.py loadtest --server gunicorn --workers 4
+        --concurrency 32 --duration 60 --output load.json
+    """
+
+    help = (
+        "Run a concurrent load test against a local server."
+    )
+
+    def add_arguments(self, parser):
+        """Define command-line arguments"""
+        parser.add_argument(
+            "--url",
+            default="http://127.0.0.1:8000",
+            help="Server to test, if not started here",
+        )
+        parser.add_argument(
+            "--server",
+            choices=["none", "runserver", "gunicorn"],
+            default="none",
+            help="Start this server on --port first",
+        )
+        parser.add_argument(
+            "--port", type=int, default=8765
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=2,
+            help="Gunicorn worker processes",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=1,
+            help="Gunicorn threads per worker",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=10,
+            help="Simulated users",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=30.0,
+            help="Seconds to run for",
+        )
+        parser.add_argument(
+            "--weight",
+            action="append",
+            default=[],
+            metavar="SCENARIO=WEIGHT",
+            help=(
+                "Change a scenario's weight (0 disables it): "
+                + ", ".join(SCENARIOS)
+            ),
+        )
+        parser.add_argument(
+            "--username",
+            help="Staff user for writes (default: create one)",
+        )
+        parser.add_argument("--password")
+        parser.add_argument(
+            "--output",
+            help="File to write the JSON report to",
+        )
+
+    def handle(self, *args, **options):
+        """Start the server, run the load test, report"""
+        load_test = LoadTest(
+            options["url"],
+            concurrency=options["concurrency"],
+            duration=options["duration"],
+            weights=self.parse_weights(options["weight"]),
+        )
+        if load_test.needs_login:
+            load_test.credentials = self.credentials(
+                options
+            )
+        with self.server(options) as url:
+            load_test.base_url = url
+            report = load_test.run()
+        report["server"] = options["server"]
+        self.print_report(report)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+
+    @staticmethod
+    def parse_weights(pairs):
+        """Turn ["name=3", ...] into {"name": 3, ...}"""
+        weights = {}
+        for pair in pairs:
+            name, _, weight = pair.partition("=")
+            if (
+                name not in SCENARIOS
+                or not weight.isdigit()
+            ):
+                raise CommandError(f"Bad --weight: {pair}")
+            weights[name] = int(weight)
+        return weights
+
+    @staticmethod
+    def credentials(options):
+        """Return (username, password) of a staff user"""
+        if options["username"]:
+            return options["username"], options["password"]
+        password = token_urlsafe()
+        user, _created = get_user_model().objects.get_or_create(
+            username="loadtest", defaults={"is_staff": True}
+        )
+        user.is_staff = True
+        user.set_password(password)
+        user.save()
+        return user.username, password
+
+    @contextmanager
+    def server(self, options):
+        """Start the requested server; yield its URL"""
+        if options["server"] == "none":
+            yield options["url"]
+            return
+        address = f"127.0.0.1:{options['port']}"
+        if options["server"] == "gunicorn":
+            command = [
+                "gunicorn",
+                "config.wsgi",
+                f"--bind={address}",
+                f"--workers={options['workers']}",
+                f"--threads={options['threads']}",
+                "--log-level=warning",
+            ]
+        else:
+            command = [
+                sys.executable,
+                "manage.py",
+                "runserver",
+                "--noreload",
+                address,
+            ]
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE,
+        )
+        # runserver logs every request to stderr; silence it
+        quiet = options["server"] == "runserver"
+        process = subprocess.Popen(
+            command,
+            cwd=str(settings.BASE_DIR),
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL if quiet else None,
+        )
+        try:
+            wait_for_port("127.0.0.1", options["port"])
+            yield f"http://{address}"
+        finally:
+            process.terminate()
+            process.wait()
+
+    def print_report(self, report):
+        """Print throughput and per-scenario latency"""
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"{report['requests']} requests in "
+                f"{report['duration']:.0f}s from "
+                f"{report['concurrency']} users: "
+                f"{report['throughput']:.1f} requests/s"
+            )
+        )
+        self.stdout.write(
+            f"{'scenario':<18}{'requests':>9}{'errors':>8}"
+            f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}"
+        )
+        rows = dict(
+            report["scenarios"], total=report["total"]
+        )
+        for name, row in rows.items():
+            if not row:
+                continue
+            self.stdout.write(
+                f"{name:<18}{row['requests']:>9}"
+                f"{row['errors']:>8}{row['p50_ms']:>9.1f}"
+                f"{row['p90_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+            )
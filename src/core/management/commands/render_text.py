@@ -0,0 +1,53 @@
+"""Compute the stored HTML and excerpts of text fields"""
+from time import perf_counter
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from ...text import derived_fields, render_rows
+
+
+class Command(BaseCommand):
+    """Fill HTMLFields and ExcerptFields of existing rows
+
+    Migrations fill the fields they add. Run this after
+    updating text with queryset.update(), and with --all
+    after changing how text is rendered.
+
+    python3 manage.py render_text --all
+    """
+
+    help = "Render the HTML and excerpts of stored text."
+
+    def add_arguments(self, parser):
+        """Define command-line arguments"""
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            dest="everything",
+            help="Render every row, not only missing ones",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows to read between database writes",
+        )
+
+    def handle(self, *args, **options):
+        """Render the rows of every model with such fields"""
+        for model in apps.get_models():
+            if not derived_fields(model):
+                continue
+            start = perf_counter()
+            count = render_rows(
+                model,
+                everything=options["everything"],
+                batch_size=options["batch_size"],
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{model._meta.label}: {count} rows "
+                    f"rendered in {perf_counter() - start:.1f}s"
+                )
+            )
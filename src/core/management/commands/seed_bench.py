@@ -0,0 +1,72 @@
+"""Fill the database with synthetic benchmark data"""
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...benchmarks import seed
+
+
+class Command(BaseCommand):
+    """Bulk insert Tags, Startups, NewsLinks and Posts
+
+    python3 manage.py seed_bench 10000
+    """
+
+    help = "Generate synthetic data for benchmarks."
+
+    def add_arguments(self, parser):
+        """Define command-line arguments"""
+        parser.add_argument(
+            "startups", type=int, help="Startups to create"
+        )
+        parser.add_argument(
+            "--tags",
+            type=int,
+            help="Tags to create (default: startups / 10)",
+        )
+        parser.add_argument(
+            "--newslinks",
+            type=int,
+            help="NewsLinks to create (default: startups * 3)",
+        )
+        parser.add_argument(
+            "--posts",
+            type=int,
+            help="Posts to create (default: startups / 2)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows per INSERT statement",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed, for repeatable data",
+        )
+
+    def handle(self, *args, **options):
+        """Seed the database in a single transaction"""
+        start = perf_counter()
+        with transaction.atomic():
+            created = seed(
+                options["startups"],
+                tags=options["tags"],
+                newslinks=options["newslinks"],
+                posts=options["posts"],
+                batch_size=options["batch_size"],
+                random_seed=options["seed"],
+            )
+        summary = ", ".join(
+            f"{count} {name}"
+            for name, count in created.items()
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {summary} "
+                f"in {perf_counter() - start:.1f}s"
+            )
+        )
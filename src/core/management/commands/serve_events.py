@@ -0,0 +1,49 @@
+"""Serve the server-sent events of new objects"""
+from aiohttp import web
+from django.core.management.base import BaseCommand
+
+from ...events import EventHub, make_app
+
+
+class Command(BaseCommand):
+    """Run the aiohttp server streaming /events/
+
+    Route /events/ to it, beside the web process; one server
+    holds many idle clients.
+
+    python3 manage.py serve_events --port 8001
+    """
+
+    help = "Stream new NewsLinks and Posts as server-sent events."
+
+    def add_arguments(self, parser):
+        """Define command-line arguments"""
+        parser.add_argument(
+            "--host",
+            default="0.0.0.0",
+            help="Address to bind",
+        )
+        parser.add_argument(
+            "--port",
+            type=int,
+            default=8001,
+            help="Port to bind",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Seconds between reads of the change log",
+        )
+
+    def handle(self, *args, **options):
+        """Serve until interrupted"""
+        hub = EventHub(
+            poll_interval=options["poll_interval"]
+        )
+        web.run_app(
+            make_app(hub),
+            host=options["host"],
+            port=options["port"],
+            print=self.stdout.write,
+        )
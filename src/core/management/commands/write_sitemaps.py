@@ -0,0 +1,29 @@
+"""Write every shard of the sitemap, and its index"""
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from ...sitemaps import write_sitemaps
+
+
+class Command(BaseCommand):
+    """Write the sitemap files served at the site's root
+
+    Run once on deploy; jobs then rewrite the shards of
+    objects as they change.
+
+    python3 manage.py write_sitemaps
+    """
+
+    help = "Write the sitemap to the default storage."
+
+    def handle(self, *args, **options):
+        """Write the files and report"""
+        start = perf_counter()
+        written = write_sitemaps()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{written} shards written "
+                f"in {perf_counter() - start:.1f}s"
+            )
+        )
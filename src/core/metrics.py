@@ -0,0 +1,621 @@
+"""Count requests and export metrics in Prometheus format
+
+MetricsMiddleware records, by URL name and HTTP method:
+
+    http_requests_total            requests, also by status
+    http_request_duration_seconds  latency histogram
+    http_response_size_bytes       response size histogram
+    http_request_db_queries        query count histogram
+
+and, for each pool of database connections (see
+core.db_pool), its connections in use and idle, its size,
+checkouts, timeouts and time spent waiting (db_pool_*).
+
+Gunicorn runs several worker processes, each of which sees
+only its own requests. If METRICS_DIR is set, every process
+keeps its values in a memory-mapped file in that directory,
+and the metrics view adds up the files of all processes.
+Files of processes that exited still count, as counters
+only go up, but their gauges are left out. Empty the
+directory before starting the server. Without METRICS_DIR,
+values are kept in the memory of the process.
+
+Recording a request is a few dictionary lookups and writes
+to memory under one lock: no system calls and no locks
+shared between processes.
+
+Prometheus Exposition Format:
+https://prometheus.io/docs/instrumenting/exposition_formats/
+"""
+import json
+import mmap
+import os
+from bisect import bisect_left
+from pathlib import Path
+from struct import calcsize, pack_into, unpack_from
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+
+from .db_pool import pool_stats
+
+HEADER = "q"  # bytes used in the file, including header
+LENGTH = "i"  # length of the encoded key that follows
+VALUE = "d"
+
+
+def _padded(length):
+    """Round length up to a multiple of 8 bytes"""
+    return length + (-length % 8)
+
+
+class MemoryStore:
+    """Float values by key, in the memory of this process"""
+
+    def __init__(self):
+        """Start with no values"""
+        self._values = {}
+        self._lock = Lock()
+
+    def add(self, increments):
+        """Add each (key, amount) pair to the values"""
+        values = self._values
+        with self._lock:
+            for key, amount in increments:
+                values[key] = values.get(key, 0.0) + amount
+
+    def set(self, values):
+        """Replace the value of each (key, value) pair"""
+        with self._lock:
+            self._values.update(values)
+
+    def items(self):
+        """Return (key, value) pairs"""
+        with self._lock:
+            return list(self._values.items())
+
+
+class MmapStore:
+    """Float values by key, in a memory-mapped file
+
+    The file holds the number of bytes in use, then entries:
+    the length of the key, the UTF-8 key padded to 8 bytes,
+    and the value as a double. The count of bytes in use is
+    updated after an entry is complete, so readers in other
+    processes never see half an entry.
+    """
+
+    def __init__(self, path, initial_size=64 * 1024):
+        """Open (or create) the file and map it"""
+        self.path = Path(path)
+        self._lock = Lock()
+        self._file = open(self.path, "a+b")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < initial_size:
+            self._file.truncate(initial_size)
+            size = initial_size
+        self._map(size)
+        self._positions = {}
+        used = unpack_from(HEADER, self._mmap, 0)[0]
+        if not used:
+            used = calcsize(HEADER)
+            pack_into(HEADER, self._mmap, 0, used)
+        for key, _value, position in _entries(
+            self._mmap, used
+        ):
+            self._positions[key] = position
+        self._used = used
+
+    def _map(self, size):
+        """Map size bytes of the file into memory"""
+        self._size = size
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+
+    def add(self, increments):
+        """Add each (key, amount) pair to the values"""
+        positions = self._positions
+        with self._lock:
+            data = self._mmap
+            for key, amount in increments:
+                position = positions.get(key)
+                if position is None:
+                    position = self._append(key)
+                    data = self._mmap
+                value = unpack_from(VALUE, data, position)[
+                    0
+                ]
+                pack_into(
+                    VALUE, data, position, value + amount
+                )
+
+    def set(self, values):
+        """Replace the value of each (key, value) pair"""
+        positions = self._positions
+        with self._lock:
+            for key, value in values:
+                position = positions.get(key)
+                if position is None:
+                    position = self._append(key)
+                pack_into(
+                    VALUE, self._mmap, position, value
+                )
+
+    def _append(self, key):
+        """Add an entry for key; return its value's offset"""
+        encoded = key.encode()
+        key_size = _padded(calcsize(LENGTH) + len(encoded))
+        entry_size = key_size + calcsize(VALUE)
+        if self._used + entry_size > self._size:
+            size = self._size
+            while self._used + entry_size > size:
+                size *= 2
+            self._mmap.close()
+            self._file.truncate(size)
+            self._map(size)
+        start = self._used
+        pack_into(
+            f"{LENGTH}{len(encoded)}s",
+            self._mmap,
+            start,
+            len(encoded),
+            encoded,
+        )
+        position = start + key_size
+        pack_into(VALUE, self._mmap, position, 0.0)
+        self._used += entry_size
+        pack_into(HEADER, self._mmap, 0, self._used)
+        self._positions[key] = position
+        return position
+
+    def items(self):
+        """Return (key, value) pairs"""
+        with self._lock:
+            return [
+                (key, value)
+                for key, value, _position in _entries(
+                    self._mmap, self._used
+                )
+            ]
+
+    def close(self):
+        """Unmap and close the file"""
+        self._mmap.close()
+        self._file.close()
+
+
+def _entries(data, used):
+    """Yield (key, value, value offset) of a store's data"""
+    offset = calcsize(HEADER)
+    while offset < used:
+        length = unpack_from(LENGTH, data, offset)[0]
+        key_start = offset + calcsize(LENGTH)
+        key = bytes(data[key_start : key_start + length])
+        position = offset + _padded(
+            calcsize(LENGTH) + length
+        )
+        value = unpack_from(VALUE, data, position)[0]
+        yield key.decode(), value, position
+        offset = position + calcsize(VALUE)
+
+
+def read_store(path):
+    """Return (key, value) pairs of another process's file"""
+    data = Path(path).read_bytes()
+    if len(data) < calcsize(HEADER):
+        return []
+    used = min(unpack_from(HEADER, data, 0)[0], len(data))
+    return [
+        (key, value)
+        for key, value, _position in _entries(data, used)
+    ]
+
+
+class Metric:
+    """A named family of samples with labels"""
+
+    kind = None
+
+    def __init__(self, registry, name, documentation):
+        """Name and describe the metric"""
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self._keys = {}
+
+    def key(self, labels, suffix="", bound=None):
+        """Return the store key of a sample (cached)"""
+        cache_key = (labels, suffix, bound)
+        key = self._keys.get(cache_key)
+        if key is None:
+            labels = [
+                (name, str(value)) for name, value in labels
+            ]
+            key = self._keys[cache_key] = json.dumps(
+                [self.name, suffix, labels, bound]
+            )
+        return key
+
+    def render(self, samples):
+        """Yield exposition lines for this metric's samples"""
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(Metric):
+    """A value that only goes up"""
+
+    kind = "counter"
+
+    def increments(self, labels, amount=1.0):
+        """Return the store increments for inc()"""
+        return [(self.key(labels), amount)]
+
+    def inc(self, labels, amount=1.0):
+        """Add amount to the counter for labels
+
+        labels is a tuple of (name, value) pairs.
+        """
+        self.registry.store.add(
+            self.increments(labels, amount)
+        )
+
+    def render(self, samples):
+        """Yield one line per set of labels"""
+        yield from super().render(samples)
+        for (_suffix, labels, _bound), value in sorted(
+            samples.items()
+        ):
+            yield f"{self.name}{_labels(labels)} {value}"
+
+
+class Gauge(Counter):
+    """A value that goes up and down"""
+
+    kind = "gauge"
+
+
+class Histogram(Metric):
+    """Count observations in buckets, with their sum"""
+
+    kind = "histogram"
+
+    def __init__(
+        self, registry, name, documentation, buckets
+    ):
+        """Use the given upper bounds for buckets"""
+        super().__init__(registry, name, documentation)
+        self.buckets = sorted(buckets)
+
+    def increments(self, labels, value):
+        """Return the store increments for observe()"""
+        index = bisect_left(self.buckets, value)
+        return [
+            (self.key(labels, "bucket", index), 1.0),
+            (self.key(labels, "sum"), value),
+            (self.key(labels, "count"), 1.0),
+        ]
+
+    def observe(self, labels, value):
+        """Record one observation for labels"""
+        self.registry.store.add(
+            self.increments(labels, value)
+        )
+
+    def render(self, samples):
+        """Yield cumulative buckets, sum and count"""
+        yield from super().render(samples)
+        by_labels = {}
+        for (
+            (suffix, labels, bound),
+            value,
+        ) in samples.items():
+            by_labels.setdefault(labels, {})[
+                (suffix, bound)
+            ] = value
+        bounds = [
+            f"{bound:g}" for bound in self.buckets
+        ] + ["+Inf"]
+        for labels, values in sorted(by_labels.items()):
+            total = 0.0
+            for index, bound in enumerate(bounds):
+                total += values.get(("bucket", index), 0.0)
+                yield (
+                    f"{self.name}_bucket"
+                    f"{_labels(labels, le=bound)} {total}"
+                )
+            yield (
+                f"{self.name}_sum{_labels(labels)} "
+                f"{values.get(('sum', None), 0.0)}"
+            )
+            yield (
+                f"{self.name}_count{_labels(labels)} "
+                f"{values.get(('count', None), 0.0)}"
+            )
+
+
+def _escape(value):
+    """Escape a label value for the exposition format"""
+    return (
+        str(value)
+        .replace("\\", r"\\")
+        .replace("\n", r"\n")
+        .replace('"', r"\"")
+    )
+
+
+def _labels(labels, **extra):
+    """Format label pairs as {name="value",...}"""
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return (
+        "{"
+        + ",".join(
+            f'{name}="{_escape(value)}"'
+            for name, value in pairs
+        )
+        + "}"
+    )
+
+
+class Registry:
+    """The metrics of the site and where they are stored"""
+
+    def __init__(self):
+        """Start with no metrics"""
+        self.metrics = {}
+        self._store = None
+        self._pid = None
+        self._lock = Lock()
+
+    def counter(self, name, documentation):
+        """Define a Counter"""
+        return self._add(Counter(self, name, documentation))
+
+    def gauge(self, name, documentation):
+        """Define a Gauge"""
+        return self._add(Gauge(self, name, documentation))
+
+    def histogram(self, name, documentation, buckets):
+        """Define a Histogram"""
+        return self._add(
+            Histogram(self, name, documentation, buckets)
+        )
+
+    def _add(self, metric):
+        """Register a metric under its name"""
+        self.metrics[metric.name] = metric
+        return metric
+
+    @property
+    def store(self):
+        """Return the store of this process
+
+        Worker processes forked after the store was created
+        get a file of their own.
+        """
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._store = self._open_store(pid)
+                    self._pid = pid
+        return self._store
+
+    @staticmethod
+    def _open_store(pid):
+        """Create the store this process writes to"""
+        if not settings.METRICS_DIR:
+            return MemoryStore()
+        directory = Path(settings.METRICS_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        return MmapStore(directory / f"metrics_{pid}.db")
+
+    def collect(self):
+        """Add up the values of every process
+
+        Gauges of processes that exited are left out: they
+        hold the last values of connections long closed.
+        """
+        if settings.METRICS_DIR:
+            gauges = {
+                name
+                for name, metric in self.metrics.items()
+                if metric.kind == Gauge.kind
+            }
+            pairs = []
+            for path in Path(settings.METRICS_DIR).glob(
+                "metrics_*.db"
+            ):
+                alive = _is_alive(path)
+                pairs.extend(
+                    (key, value)
+                    for key, value in read_store(path)
+                    if alive
+                    or json.loads(key)[0] not in gauges
+                )
+        else:
+            pairs = self.store.items()
+        totals = {}
+        for key, value in pairs:
+            totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    def render(self):
+        """Return all metrics in Prometheus text format"""
+        samples = {}
+        for key, value in self.collect().items():
+            name, suffix, labels, bound = json.loads(key)
+            labels = tuple(tuple(pair) for pair in labels)
+            samples.setdefault(name, {})[
+                (suffix, labels, bound)
+            ] = value
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.extend(
+                metric.render(samples.get(name, {}))
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _is_alive(path):
+    """Is the process that writes the store at path running?"""
+    try:
+        os.kill(int(path.stem.rpartition("_")[2]), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        # another user's process; or not a process's file
+        return True
+    return True
+
+
+registry = Registry()
+
+REQUESTS = registry.counter(
+    "http_requests_total",
+    "Requests handled, by URL name, method and status.",
+)
+LATENCY = registry.histogram(
+    "http_request_duration_seconds",
+    "Time to handle requests, by URL name and method.",
+    [
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+        10,
+    ],
+)
+RESPONSE_SIZE = registry.histogram(
+    "http_response_size_bytes",
+    "Size of response bodies, by URL name and method.",
+    [100, 1000, 10000, 100_000, 1_000_000, 10_000_000],
+)
+QUERIES = registry.histogram(
+    "http_request_db_queries",
+    "Database queries per request, by URL name and method.",
+    [0, 1, 2, 5, 10, 20, 50, 100],
+)
+POOL_CONNECTIONS = registry.gauge(
+    "db_pool_connections",
+    "Pooled database connections, by database and state.",
+)
+POOL_MAX_SIZE = registry.gauge(
+    "db_pool_max_size",
+    "Most connections a pool may open, by database.",
+)
+POOL_COUNTERS = {
+    name: registry.counter(
+        f"db_pool_{name}_total", documentation
+    )
+    for name, documentation in [
+        ("checkouts", "Connections handed out."),
+        ("created", "Connections opened."),
+        ("discarded", "Connections closed as unusable."),
+        ("failed_checks", "Failed health checks."),
+        ("timeouts", "Checkouts that found no connection."),
+        ("waits", "Checkouts slower than slow_wait."),
+    ]
+}
+POOL_WAIT = registry.counter(
+    "db_pool_wait_seconds_total",
+    "Time spent waiting for connections, by database.",
+)
+
+
+METHODS = {
+    "DELETE",
+    "GET",
+    "HEAD",
+    "OPTIONS",
+    "PATCH",
+    "POST",
+    "PUT",
+}
+
+
+def record_request(
+    url_name, method, status, duration, size, queries
+):
+    """Record the metrics of one request
+
+    Labels take few values, to keep the number of samples
+    small: unknown methods and unresolved URLs are lumped
+    together.
+    """
+    labels = (
+        (
+            "method",
+            method if method in METHODS else "other",
+        ),
+        ("url_name", url_name or "unresolved"),
+    )
+    increments = (
+        REQUESTS.increments(labels + (("status", status),))
+        + LATENCY.increments(labels, duration)
+        + QUERIES.increments(labels, queries)
+    )
+    if size is not None:
+        increments += RESPONSE_SIZE.increments(labels, size)
+    registry.store.add(increments)
+
+
+def publish_pool_stats():
+    """Copy the statistics of this process's pools to its store
+
+    The pools keep their own totals, which replace the stored
+    values; with METRICS_DIR, the metrics view adds up those
+    of every process. Called before metrics are rendered, and
+    now and then as connections are handed back (see
+    publish_pool_stats_now_and_then).
+    """
+    values = []
+    for key, stats in pool_stats().items():
+        labels = (("database", key),)
+        for state in ("in_use", "idle"):
+            values += POOL_CONNECTIONS.increments(
+                labels + (("state", state),), stats[state]
+            )
+        values += POOL_MAX_SIZE.increments(
+            labels, stats["max_size"]
+        )
+        for name, counter in POOL_COUNTERS.items():
+            values += counter.increments(
+                labels, stats[name]
+            )
+        values += POOL_WAIT.increments(
+            labels, stats["wait_total"]
+        )
+    if values:
+        registry.store.set(values)
+
+
+_pool_stats_published = None
+
+
+def publish_pool_stats_now_and_then():
+    """Publish pool statistics every METRICS_POOL_INTERVAL
+
+    Called as each connection is handed back: the metrics
+    view only sees the pools of the process it runs in, so
+    the other processes must publish theirs, but not on
+    every request.
+    """
+    global _pool_stats_published
+    now = monotonic()
+    if (
+        _pool_stats_published is not None
+        and now - _pool_stats_published
+        < settings.METRICS_POOL_INTERVAL
+    ):
+        return
+    _pool_stats_published = now
+    publish_pool_stats()
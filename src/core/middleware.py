@@ -0,0 +1,425 @@
+"""Middleware for the Startup Organizer Project
+
+Middleware Documentation:
+https://docs.djangoproject.com/en/2.1/topics/http/middleware/
+"""
+import logging
+import random
+import re
+import sys
+from calendar import timegm
+from cProfile import Profile
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.files.storage import default_storage
+from django.http import FileResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
+from django.views.generic import DetailView, ListView
+
+from .compression import (
+    compress,
+    compress_stream,
+    is_compressible,
+    negotiate,
+)
+from .db_routers import (
+    request_routing,
+    route_reads_to_replica,
+    wrote_to_primary,
+)
+from .instrumentation import (
+    count_request_queries,
+    endpoint_stats,
+)
+from .metrics import record_request
+from .profiling import ProfileStore
+from .sitemaps import FILE_PREFIX, storage_name
+from .timing import request_timer
+
+logger = logging.getLogger(__name__)
+timing_logger = logging.getLogger("core.timing")
+
+PIN_COOKIE_NAME = "pin_primary"
+SITEMAP_PATH = re.compile(
+    rf"^/({FILE_PREFIX}[\w-]*\.xml(?:\.gz)?)$"
+)
+ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+READ_ONLY_ACTIONS = ("list", "retrieve")
+
+
+def is_read_only_view(request, view_func):
+    """May this view be served from a read replica?
+
+    Only safe requests to public ListView and DetailView
+    subclasses or to the list and retrieve actions of a
+    DRF ViewSet qualify.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return False
+    view_class = getattr(view_func, "view_class", None)
+    if view_class is not None:
+        return issubclass(
+            view_class, (ListView, DetailView)
+        ) and not issubclass(view_class, LoginRequiredMixin)
+    # DRF ViewSets bind methods to actions in as_view()
+    actions = getattr(view_func, "actions", None) or {}
+    return actions.get("get") in READ_ONLY_ACTIONS
+
+
+def is_staff(request):
+    """Is the request from a logged in staff user?
+
+    Without a session cookie there can be no user: check
+    for one first, since loading the session adds a Vary:
+    Cookie header to the response.
+    """
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return False
+    user = getattr(request, "user", None)
+    return bool(user and user.is_staff)
+
+
+class ReplicaRoutingMiddleware:
+    """Serve read-only views from read replicas
+
+    A client that writes is pinned to the primary with a
+    short-lived cookie, so that it sees its own writes
+    despite replication lag.
+    """
+
+    def __init__(self, get_response):
+        """Store the next middleware or view"""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Route reads afresh; pin clients that write"""
+        with request_routing():
+            response = self.get_response(request)
+            wrote = wrote_to_primary()
+        if wrote:
+            response.set_cookie(
+                PIN_COOKIE_NAME,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+            )
+        return response
+
+    def process_view(
+        self, request, view_func, view_args, view_kwargs
+    ):
+        """Pick the database for reads in this request"""
+        pinned = PIN_COOKIE_NAME in request.COOKIES
+        if not pinned and is_read_only_view(
+            request, view_func
+        ):
+            route_reads_to_replica()
+
+
+class QueryCountMiddleware:
+    """Record query count and time by URL name
+
+    Totals are kept in core.instrumentation.endpoint_stats.
+    Requests that run more than QUERY_COUNT_WARNING queries
+    are logged as warnings; all others at debug level.
+    """
+
+    def __init__(self, get_response):
+        """Store the next middleware or view"""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Count queries made while handling the request"""
+        with count_request_queries(request) as counter:
+            response = self.get_response(request)
+        match = request.resolver_match
+        url_name = match.view_name if match else None
+        endpoint_stats.record(
+            url_name, counter.count, counter.duration
+        )
+        level = (
+            logging.WARNING
+            if counter.count > settings.QUERY_COUNT_WARNING
+            else logging.DEBUG
+        )
+        logger.log(
+            level,
+            "%s %s (%s): %d queries in %.1fms",
+            request.method,
+            request.path,
+            url_name,
+            counter.count,
+            counter.duration * 1000,
+        )
+        return response
+
+
+class ServerTimingMiddleware:
+    """Time database, template, serializer and URL work
+
+    Staff users get the timings in a Server-Timing header,
+    as does everyone if SERVER_TIMING is set. Timings of
+    every request are logged to the core.timing logger at
+    info level, with the numbers in the record's timings
+    attribute for aggregation. See core.timing.
+    """
+
+    def __init__(self, get_response):
+        """Store the next middleware or view"""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Time the request; report the phases"""
+        with request_timer() as timer:
+            with count_request_queries(request) as counter:
+                response = self.get_response(request)
+        if counter.count:
+            timer.add("db", counter.duration, counter.count)
+        match = request.resolver_match
+        url_name = match.view_name if match else None
+        if self.show_timings(request):
+            response["Server-Timing"] = timer.header()
+        timings = timer.as_dict()
+        timing_logger.info(
+            "%s %s (%s): %s",
+            request.method,
+            request.path,
+            url_name,
+            " ".join(
+                f"{name}={timing['ms']}ms"
+                for name, timing in sorted(timings.items())
+            ),
+            extra={
+                "url_name": url_name,
+                "timings": timings,
+            },
+        )
+        return response
+
+    @staticmethod
+    def show_timings(request):
+        """May this client see the Server-Timing header?"""
+        return settings.SERVER_TIMING or is_staff(request)
+
+
+class ProfilerMiddleware:
+    """Profile a sample of requests with cProfile
+
+    PROFILE_SAMPLE_RATE is the fraction of requests to
+    profile; staff may also ask for a profile by sending
+    the PROFILE_HEADER header. Profiles are saved by URL
+    name, see core.profiling. Must follow
+    AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        """Store the next middleware or view"""
+        self.get_response = get_response
+        self.header = "HTTP_" + (
+            settings.PROFILE_HEADER.upper().replace(
+                "-", "_"
+            )
+        )
+
+    def __call__(self, request):
+        """Handle the request, profiling it if chosen"""
+        if not self.should_profile(request):
+            return self.get_response(request)
+        profiler = Profile()
+        start = perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        match = request.resolver_match
+        url_name = match.view_name if match else None
+        try:
+            ProfileStore().save(
+                url_name, profiler, perf_counter() - start
+            )
+        except OSError:
+            logger.exception("Could not save profile")
+        return response
+
+    def should_profile(self, request):
+        """Is this request sampled or asking for a profile?
+
+        Requests within a profiled one (see core.batch) are
+        not profiled again.
+        """
+        if sys.getprofile() is not None:
+            return False
+        if self.header in request.META:
+            return is_staff(request)
+        return (
+            random.random() < settings.PROFILE_SAMPLE_RATE
+        )
+
+
+class MetricsMiddleware:
+    """Record request metrics by URL name and method
+
+    See core.metrics; the metrics view exports them.
+    """
+
+    def __init__(self, get_response):
+        """Store the next middleware or view"""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Measure the request and record the numbers"""
+        start = perf_counter()
+        with count_request_queries(request) as counter:
+            response = self.get_response(request)
+        match = request.resolver_match
+        record_request(
+            match.view_name if match else None,
+            request.method,
+            response.status_code,
+            perf_counter() - start,
+            self.response_size(response),
+            counter.count,
+        )
+        return response
+
+    @staticmethod
+    def response_size(response):
+        """Return the size of the body, if known"""
+        if not response.streaming:
+            return len(response.content)
+        if response.has_header("Content-Length"):
+            return int(response["Content-Length"])
+        return None
+
+
+class CompressionMiddleware:
+    """Compress responses with Brotli or gzip
+
+    Like Django's GZipMiddleware, with Brotli: bodies of
+    compressible types, at least COMPRESSION_MIN_SIZE bytes
+    long, are compressed with the encoding the client prefers
+    (see core.compression). Streaming responses are
+    compressed chunk by chunk, as they are sent.
+    """
+
+    def __init__(self, get_response):
+        """Store the next middleware or view"""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Compress the response, if worth it"""
+        response = self.get_response(request)
+        if (
+            response.has_header("Content-Encoding")
+            or response.status_code in (204, 206, 304)
+            or not is_compressible(
+                response.get("Content-Type", "")
+            )
+        ):
+            return response
+        if (
+            not response.streaming
+            and len(response.content)
+            < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                encoding, response.streaming_content
+            )
+            del response["Content-Length"]
+        else:
+            compressed = compress(
+                encoding, response.content
+            )
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(
+                len(compressed)
+            )
+        etag = response.get("ETag", "")
+        if etag.startswith('"'):
+            # the compressed bytes differ from the original
+            response["ETag"] = f"W/{etag}"
+        response["Content-Encoding"] = encoding
+        return response
+
+
+class SitemapMiddleware:
+    """Serve the sitemap's files from the default storage
+
+    Jobs in other processes rewrite them (see core.sitemaps),
+    so each request opens the file in the storage; only the
+    paths of sitemap files are looked up. Clients accepting
+    gzip get the index's gzip file.
+    """
+
+    def __init__(self, get_response):
+        """Store the next middleware or view"""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Serve the file, if the path is the sitemap's"""
+        match = SITEMAP_PATH.match(request.path_info)
+        if match is None or request.method not in (
+            "GET",
+            "HEAD",
+        ):
+            return self.get_response(request)
+        name = match.group(1)
+        path = storage_name(name)
+        gzipped = f"{path}.gz"
+        if (
+            not name.endswith(".gz")
+            and ACCEPTS_GZIP.search(
+                request.META.get("HTTP_ACCEPT_ENCODING", "")
+            )
+            and default_storage.exists(gzipped)
+        ):
+            response = self.serve(request, gzipped, name)
+            if response.status_code == 200:
+                response["Content-Encoding"] = "gzip"
+        elif default_storage.exists(path):
+            response = self.serve(request, path, name)
+        else:
+            return self.get_response(request)
+        if not name.endswith(".gz"):
+            patch_vary_headers(
+                response, ("Accept-Encoding",)
+            )
+        return response
+
+    @staticmethod
+    def serve(request, path, name):
+        """Answer with the file at path, or 304"""
+        modified = timegm(
+            default_storage.get_modified_time(
+                path
+            ).utctimetuple()
+        )
+        response = get_conditional_response(
+            request, last_modified=modified
+        )
+        if response is None:
+            response = FileResponse(
+                default_storage.open(path),
+                content_type="application/gzip"
+                if name.endswith(".gz")
+                else "application/xml",
+            )
+        response["Last-Modified"] = http_date(modified)
+        return response
@@ -0,0 +1,42 @@
+# Generated by Django 2.1.15 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("core", "0001_initial")]
+
+    operations = [
+        migrations.CreateModel(
+            name="Change",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        primary_key=True, serialize=False
+                    ),
+                ),
+                ("kind", models.CharField(max_length=31)),
+                (
+                    "object_id",
+                    models.PositiveIntegerField(),
+                ),
+                (
+                    "deleted",
+                    models.BooleanField(default=False),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(auto_now_add=True),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="change",
+            index=models.Index(
+                fields=["kind", "object_id"],
+                name="core_change_object_idx",
+            ),
+        ),
+    ]
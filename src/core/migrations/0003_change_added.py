@@ -0,0 +1,16 @@
+# Generated by Django 2.1.15 on 2026-10-19 15:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("core", "0002_change_log")]
+
+    operations = [
+        migrations.AddField(
+            model_name="change",
+            name="added",
+            field=models.BooleanField(default=False),
+        )
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.1.15 on 2026-10-19 15:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("core", "0003_change_added")]
+
+    operations = [
+        migrations.AddField(
+            model_name="version",
+            name="changed",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now
+            ),
+        )
+    ]
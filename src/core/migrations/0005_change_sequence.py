@@ -0,0 +1,46 @@
+# Generated by Django 2.1.15 on 2026-10-19 15:57
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def number_changes(apps, schema_editor):
+    """Number the changes logged so far by id, as before"""
+    Change = apps.get_model("core", "Change")
+    Change.objects.update(sequence=F("id"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("core", "0004_version_changed")]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeHorizon",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "sequence",
+                    models.BigIntegerField(default=0),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="change",
+            name="sequence",
+            field=models.BigIntegerField(
+                editable=False, null=True, unique=True
+            ),
+        ),
+        migrations.RunPython(
+            number_changes, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,78 @@
+"""Django data models shared by the project's apps
+
+Django Model Documentation:
+https://docs.djangoproject.com/en/2.1/topics/db/models/
+"""
+from django.db.models import (
+    BigAutoField,
+    BigIntegerField,
+    BooleanField,
+    CharField,
+    DateTimeField,
+    Index,
+    Model,
+    PositiveIntegerField,
+)
+from django.utils import timezone
+
+
+class Version(Model):
+    """A stamp that changes whenever some data changes
+
+    Processes caching the data compare stamps to know if
+    their copy is still current; see core.versions.
+    """
+
+    name = CharField(max_length=63, primary_key=True)
+    stamp = CharField(max_length=32)
+    # when the stamp last changed
+    changed = DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name}: {self.stamp}"
+
+
+class Change(Model):
+    """A save or delete of an object, logged for clients
+
+    Written by the signals of core.changes, in the same
+    transaction as the change, and numbered once it commits.
+    """
+
+    id = BigAutoField(primary_key=True)
+    kind = CharField(max_length=31)
+    object_id = PositiveIntegerField()
+    deleted = BooleanField(default=False)
+    # the object was created, not updated
+    added = BooleanField(default=False)
+    created = DateTimeField(auto_now_add=True)
+    # the position in the log, in commit order; None until
+    # numbered, after the transaction commits
+    sequence = BigIntegerField(
+        null=True, unique=True, editable=False
+    )
+
+    class Meta:
+        indexes = [
+            Index(
+                fields=["kind", "object_id"],
+                name="core_change_object_idx",
+            )
+        ]
+
+    def __str__(self):
+        action = "deleted" if self.deleted else "saved"
+        return f"{self.kind} {self.object_id} {action}"
+
+
+class ChangeHorizon(Model):
+    """How far compaction forgot changes; a single row
+
+    Clients whose cursor is before sequence may have missed
+    deletes, and must fetch everything again.
+    """
+
+    sequence = BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"changes forgotten up to {self.sequence}"
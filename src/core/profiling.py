@@ -0,0 +1,161 @@
+"""Store and read cProfile profiles of requests
+
+ProfilerMiddleware profiles a sample of requests and saves
+each profile under PROFILE_DIR, in a directory named after
+the URL name of the view:
+
+    runtime/profiles/startup_detail/20181019T101500-42ms-1a2b.prof
+
+The files are ordinary pstats dumps: besides the admin pages,
+they open in tools such as snakeviz or python -m pstats.
+
+cProfile Documentation:
+https://docs.python.org/3/library/profile.html
+"""
+import os
+import pstats
+import re
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+from django.conf import settings
+
+FILENAME_RE = re.compile(
+    r"^(?P<created>\d{8}T\d{6})-(?P<ms>\d+)ms-\w+\.prof$"
+)
+
+
+def _directory_name(url_name):
+    """Return a safe directory name for a URL name
+
+    Names of dots only, such as "..", are not left to climb
+    out of PROFILE_DIR.
+    """
+    name = re.sub(r"[^\w.-]", "_", url_name or "unresolved")
+    if not name.strip("."):
+        return name.replace(".", "_")
+    return name
+
+
+class ProfileStore:
+    """Save profiles by URL name, keeping the newest few"""
+
+    def __init__(self, directory=None, keep=None):
+        """Use PROFILE_DIR and PROFILE_KEEP by default"""
+        self.directory = Path(
+            directory or settings.PROFILE_DIR
+        )
+        self.keep = (
+            settings.PROFILE_KEEP if keep is None else keep
+        )
+
+    def save(self, url_name, profiler, duration):
+        """Write a profile; delete the oldest beyond keep"""
+        folder = self.directory / _directory_name(url_name)
+        folder.mkdir(parents=True, exist_ok=True)
+        name = (
+            f"{datetime.now():%Y%m%dT%H%M%S}-"
+            f"{round(duration * 1000)}ms-"
+            f"{uuid4().hex[:8]}.prof"
+        )
+        profiler.dump_stats(str(folder / name))
+        for old in sorted(folder.glob("*.prof"))[
+            : -max(self.keep, 1)
+        ]:
+            try:
+                old.unlink()
+            except FileNotFoundError:
+                pass  # another process removed it
+        return name
+
+    def profiles(self):
+        """Return saved profiles, newest first"""
+        found = []
+        if not self.directory.is_dir():
+            return found
+        for folder in self.directory.iterdir():
+            if not folder.is_dir():
+                continue
+            for path in folder.glob("*.prof"):
+                match = FILENAME_RE.match(path.name)
+                if match is None:
+                    continue
+                found.append(
+                    {
+                        "url_name": folder.name,
+                        "name": path.name,
+                        "created": datetime.strptime(
+                            match.group("created"),
+                            "%Y%m%dT%H%M%S",
+                        ),
+                        "duration_ms": int(
+                            match.group("ms")
+                        ),
+                        "size": path.stat().st_size,
+                    }
+                )
+        found.sort(
+            key=lambda profile: (
+                profile["created"],
+                profile["name"],
+            ),
+            reverse=True,
+        )
+        return found
+
+    def path(self, url_name, name):
+        """Return the file of a saved profile, or None"""
+        if not FILENAME_RE.match(name) or (
+            _directory_name(url_name) != url_name
+        ):
+            return None
+        path = self.directory / url_name / name
+        return path if path.is_file() else None
+
+    @staticmethod
+    def hottest(path, sort="tottime", limit=30):
+        """Return the functions that took the most time
+
+        sort is "tottime" (time in the function itself) or
+        "cumtime" (including the functions it calls).
+        """
+        stats = pstats.Stats(str(path))
+        rows = []
+        for function, row in stats.stats.items():
+            calls, primitive, tottime, cumtime, _ = row
+            filename, line, name = function
+            rows.append(
+                {
+                    "function": name,
+                    "location": (
+                        f"{_shorten(filename)}:{line}"
+                        if line
+                        else filename
+                    ),
+                    "calls": calls,
+                    "primitive_calls": primitive,
+                    "tottime_ms": tottime * 1000,
+                    "cumtime_ms": cumtime * 1000,
+                }
+            )
+        rows.sort(
+            key=lambda row: row[f"{sort}_ms"], reverse=True
+        )
+        return {
+            "total_ms": stats.total_tt * 1000,
+            "calls": stats.total_calls,
+            "functions": rows[:limit],
+        }
+
+
+def _shorten(filename):
+    """Strip the site-packages or project prefix of a path"""
+    for marker in (
+        "site-packages" + os.sep,
+        "src" + os.sep,
+    ):
+        head, found, tail = filename.rpartition(marker)
+        if found:
+            return tail
+    return filename
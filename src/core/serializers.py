@@ -0,0 +1,18 @@
+"""Serializer helpers for the Startup Organizer Project
+
+Serializer Documentation
+http://www.django-rest-framework.org/api-guide/serializers/
+"""
+from .timing import timed
+
+
+class TimedSerializerMixin:
+    """Count to_representation() as serialize time
+
+    See core.timing.
+    """
+
+    def to_representation(self, instance):
+        """Serialize instance, timing it"""
+        with timed("serialize"):
+            return super().to_representation(instance)
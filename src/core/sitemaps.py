@@ -0,0 +1,313 @@
+"""Write the sitemap as static gzip files, shard by shard
+
+Search engines crawl the pages listed in /sitemap.xml, an
+index of shards of at most SITEMAP_SHARD_SIZE URLs (50,000,
+the protocol's limit). django.contrib.sitemaps would build
+every URL of a shard in memory, on each request; instead,
+the write_sitemaps command and jobs write the shards as
+gzip files in the DIRECTORY of the default storage, served
+by core.middleware.SitemapMiddleware. Jobs run in worker
+processes, apart from the web processes serving the files:
+on hosts where they share no disk (such as Heroku's dynos),
+DEFAULT_FILE_STORAGE must be shared, such as S3.
+
+Apps list their pages with Section subclasses, in their
+sitemaps.py module, imported when the app is ready:
+
+    @register_section
+    class StartupSection(Section):
+        name = "startup"
+        model = Startup
+        url_name = "startup_detail"
+
+Shard n of a section holds the objects whose primary keys
+fall in the n-th range of SITEMAP_SHARD_SIZE keys, so that
+saving or deleting an object only affects its own shard: a
+job rewrites that shard, and the index, SITEMAP_DELAY
+seconds later. Shards are read with keyset iteration, a
+chunk of rows at a time, and their URLs are formatted from a
+template reversed once per shard.
+
+Sitemaps Protocol: https://www.sitemaps.org/protocol.html
+"""
+import gzip
+from datetime import timedelta
+from functools import partial
+from tempfile import SpooledTemporaryFile
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Max
+from django.db.models.signals import post_delete, post_save
+from django.urls import reverse
+
+from jobs.queue import enqueue_on_commit
+
+DIRECTORY = "sitemaps"
+FILE_PREFIX = "sitemap"
+INDEX_NAME = f"{FILE_PREFIX}.xml"
+SHARD_TASK = "core.tasks.write_sitemap_shard"
+CHUNK_SIZE = 2000
+# a URL argument valid for both int and str converters
+MARKER = 987_654_320
+SECTIONS = {}
+
+HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    "<{} "
+    'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+URL = "<url><loc>{}</loc></url>\n"
+DATED_URL = (
+    "<url><loc>{}</loc><lastmod>{}</lastmod></url>\n"
+)
+SITEMAP = (
+    "<sitemap><loc>{}</loc>"
+    "<lastmod>{}</lastmod></sitemap>\n"
+)
+
+
+def url_formatter(name, kwargs):
+    """Return a function building URL name from arguments
+
+    Reverses the URL once, instead of once per row: the
+    function takes the values of kwargs, in order, and
+    returns the absolute URL, escaped for XML. Values must be
+    numbers or slugs, which need no escaping.
+    """
+    markers = [
+        str(MARKER + index) for index in range(len(kwargs))
+    ]
+    url = settings.SITEMAP_BASE_URL.rstrip("/") + reverse(
+        name, kwargs=dict(zip(kwargs, markers))
+    )
+    template = (
+        escape(url).replace("{", "{{").replace("}", "}}")
+    )
+    for index, marker in enumerate(markers):
+        template = template.replace(marker, f"{{{index}}}")
+    return template.format
+
+
+class Section:
+    """The detail pages of a model, for the sitemap
+
+    Rows are values_list() tuples of the primary key and
+    fields; arguments() turns them into the values of the
+    URL's url_kwargs, and lastmod() into the date each page
+    last changed, or None.
+    """
+
+    name = None
+    model = None
+    url_name = None
+    url_kwargs = ("slug",)
+    fields = ("slug",)
+
+    def queryset(self):
+        """Return the objects listed"""
+        return self.model._default_manager.all()
+
+    def arguments(self, row):
+        """Return the URL's arguments for a row"""
+        return row[1:]
+
+    def lastmod(self, row):
+        """Return when the page of a row last changed"""
+        return None
+
+    def shard_of(self, pk):
+        """Return the number of the shard of primary key pk"""
+        return (pk - 1) // settings.SITEMAP_SHARD_SIZE + 1
+
+    def shard_count(self):
+        """Return the number of shards, 0 if none"""
+        last = self.model._default_manager.aggregate(
+            last=Max("pk")
+        )["last"]
+        return 0 if last is None else self.shard_of(last)
+
+    def rows(self, shard):
+        """Yield the rows of shard, in primary key order
+
+        Reads CHUNK_SIZE rows per query, each starting after
+        the last primary key read.
+        """
+        size = settings.SITEMAP_SHARD_SIZE
+        queryset = (
+            self.queryset()
+            .filter(pk__lte=shard * size)
+            .order_by("pk")
+            .values_list("pk", *self.fields)
+        )
+        last = (shard - 1) * size
+        while True:
+            rows = list(
+                queryset.filter(pk__gt=last)[:CHUNK_SIZE]
+            )
+            yield from rows
+            if len(rows) < CHUNK_SIZE:
+                return
+            last = rows[-1][0]
+
+    def entries(self, shard):
+        """Yield the <url> elements of shard"""
+        location = url_formatter(
+            self.url_name, self.url_kwargs
+        )
+        for row in self.rows(shard):
+            url = location(*self.arguments(row))
+            lastmod = self.lastmod(row)
+            if lastmod is None:
+                yield URL.format(url)
+            else:
+                yield DATED_URL.format(
+                    url, lastmod.isoformat()
+                )
+
+
+def register_section(section_class):
+    """List the pages of section_class in the sitemap
+
+    Saving or deleting objects of its model queues a job
+    rewriting their shard.
+    """
+    section = section_class()
+    SECTIONS[section.name] = section
+    handler = partial(_changed, section)
+    uid = f"sitemap:{section.name}"
+    post_save.connect(
+        handler,
+        sender=section.model,
+        weak=False,
+        dispatch_uid=f"{uid}:save",
+    )
+    post_delete.connect(
+        handler,
+        sender=section.model,
+        weak=False,
+        dispatch_uid=f"{uid}:delete",
+    )
+    return section_class
+
+
+def _changed(
+    section, sender, instance, raw=False, **kwargs
+):
+    """Queue a rewrite of the shard of instance, on commit
+
+    Changes to a shard while its job is queued share the job.
+    """
+    if raw:
+        return
+    shard = section.shard_of(instance.pk)
+    enqueue_on_commit(
+        SHARD_TASK,
+        {"section": section.name, "shard": shard},
+        key=f"sitemap:{section.name}:{shard}",
+        delay=timedelta(seconds=settings.SITEMAP_DELAY),
+    )
+
+
+def shard_name(section, shard):
+    """Return the file name of a shard"""
+    return f"{FILE_PREFIX}-{section.name}-{shard}.xml.gz"
+
+
+def storage_name(name):
+    """Return the name in the storage of a sitemap file"""
+    return f"{DIRECTORY}/{name}"
+
+
+def _write(name, chunks, compressed=True):
+    """Write chunks of text to the file name, replacing it
+
+    The file is written to a temporary file first (in memory
+    while small), then saved in one go. Storages cannot
+    replace a file: the old one is deleted just before.
+    """
+    with SpooledTemporaryFile(1024 * 1024) as temporary:
+        if compressed:
+            stream = gzip.GzipFile(
+                fileobj=temporary, mode="wb", mtime=0
+            )
+        else:
+            stream = temporary
+        for chunk in chunks:
+            stream.write(chunk.encode())
+        if compressed:
+            stream.close()
+        temporary.seek(0)
+        path = storage_name(name)
+        default_storage.delete(path)
+        default_storage.save(path, File(temporary))
+
+
+def _document(tag, elements):
+    """Yield an XML document of elements, in chunks"""
+    yield HEADER.format(tag)
+    chunk = []
+    for element in elements:
+        chunk.append(element)
+        if len(chunk) == CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+    chunk.append(f"</{tag}>\n")
+    yield "".join(chunk)
+
+
+def write_shard(section, shard):
+    """Write the file of one shard of section"""
+    _write(
+        shard_name(section, shard),
+        _document("urlset", section.entries(shard)),
+    )
+
+
+def _index_entries():
+    """Yield a <sitemap> element per shard file written"""
+    base_url = escape(settings.SITEMAP_BASE_URL.rstrip("/"))
+    for name in sorted(SECTIONS):
+        section = SECTIONS[name]
+        for shard in range(1, section.shard_count() + 1):
+            file_name = shard_name(section, shard)
+            path = storage_name(file_name)
+            if not default_storage.exists(path):
+                continue
+            modified = default_storage.get_modified_time(
+                path
+            )
+            yield SITEMAP.format(
+                f"{base_url}/{file_name}",
+                modified.replace(microsecond=0).isoformat(),
+            )
+
+
+def write_index():
+    """Write the index listing every shard, plain and gzip"""
+    elements = list(_index_entries())
+    _write(
+        INDEX_NAME,
+        _document("sitemapindex", elements),
+        compressed=False,
+    )
+    _write(
+        f"{INDEX_NAME}.gz",
+        _document("sitemapindex", elements),
+    )
+
+
+def write_sitemaps():
+    """Write every shard of every section, then the index
+
+    Returns the number of shards written.
+    """
+    written = 0
+    for section in SECTIONS.values():
+        for shard in range(1, section.shard_count() + 1):
+            write_shard(section, shard)
+            written += 1
+    write_index()
+    return written
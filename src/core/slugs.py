@@ -0,0 +1,124 @@
+"""Find free slugs for many objects with one query
+
+django_extensions' AutoSlugField finds a free slug by trying
+candidates (name, name-2, name-3...) one query at a time, on
+every save. allocate_slugs() reads every taken slug sharing a
+prefix with the candidates of a batch of objects in one
+query, then picks the same slugs AutoSlugField would, in
+memory: objects are given slugs in order, as if saved one
+after the other.
+
+BatchAutoSlugField is an AutoSlugField that allocates this
+way on save, and keeps slugs set with allocate_slugs() before
+a bulk_create(). Like AutoSlugField, it does not lock: two
+transactions allocating at once may pick the same slug.
+"""
+from django.db.models import Q
+from django_extensions.db.fields import AutoSlugField
+
+from .bulk import batches
+
+
+def _base_slug(field, instance):
+    """Return the slug AutoSlugField tries first"""
+    populate_from = field._populate_from
+    if not isinstance(populate_from, (list, tuple)):
+        populate_from = (populate_from,)
+    slug = field.separator.join(
+        field.slugify_func(
+            field.get_slug_fields(instance, lookup)
+        )
+        for lookup in populate_from
+    )
+    if field.max_length:
+        slug = slug[: field.max_length]
+    return field._slug_strip(slug)
+
+
+def _prefix(field, base):
+    """Return the start shared by every candidate of base
+
+    Candidates are truncated to make room for the longest
+    suffix, e.g. "-99".
+    """
+    suffix = (
+        f"{field.separator}"
+        f"{field.max_unique_query_attempts - 1}"
+    )
+    if (
+        field.max_length
+        and len(base) + len(suffix) > field.max_length
+    ):
+        base = field._slug_strip(
+            base[: field.max_length - len(suffix)]
+        )
+    return base or field.separator
+
+
+def allocate_slugs(
+    objects, field_name="slug", batch_size=100
+):
+    """Give objects without a slug a free one
+
+    field_name is an AutoSlugField whose slugs are unique in
+    the whole table. Runs one query per batch_size objects.
+    """
+    objects = list(objects)
+    if not objects:
+        return
+    model = type(objects[0])
+    field = model._meta.get_field(field_name)
+    pending = [
+        obj
+        for obj in objects
+        if not getattr(obj, field.attname)
+    ]
+    if field.allow_duplicates:
+        for obj in pending:
+            setattr(
+                obj, field.attname, _base_slug(field, obj)
+            )
+        return
+    # read by slug_generator(), as in AutoSlugField
+    field.slug_len = field.max_length
+    queryset = field.get_queryset(model, field)
+    taken = set()
+    for batch in batches(pending, batch_size):
+        bases = [_base_slug(field, obj) for obj in batch]
+        condition = Q()
+        for prefix in {
+            _prefix(field, base) for base in bases
+        }:
+            condition |= Q(
+                **{f"{field.attname}__startswith": prefix}
+            )
+        taken.update(
+            queryset.filter(condition)
+            .exclude(
+                pk__in=[obj.pk for obj in batch if obj.pk]
+            )
+            .values_list(field.attname, flat=True)
+        )
+        for obj, base in zip(batch, bases):
+            for slug in field.slug_generator(base, 2):
+                if slug and slug not in taken:
+                    break
+            taken.add(slug)
+            setattr(obj, field.attname, slug)
+
+
+class BatchAutoSlugField(AutoSlugField):
+    """An AutoSlugField finding a free slug in one query
+
+    A slug set before the first save, such as by
+    allocate_slugs(), is kept.
+    """
+
+    def create_slug(self, model_instance, add):
+        """Allocate a slug unless one is set"""
+        slug = getattr(model_instance, self.attname)
+        if slug and not self.overwrite:
+            return slug
+        setattr(model_instance, self.attname, "")
+        allocate_slugs([model_instance], self.name)
+        return getattr(model_instance, self.attname)
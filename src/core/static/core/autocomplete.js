@@ -0,0 +1,86 @@
+/* Search for choices of AutocompleteSelectMultiple widgets
+ *
+ * As the user types, fetch {"results": [{"id", "text"}]}
+ * from the widget's data-url; choosing a result adds it to
+ * the selected options of the widget's <select>.
+ */
+(function () {
+  "use strict";
+
+  var DELAY = 200; // milliseconds after the last keystroke
+
+  function setUp(container) {
+    var select = container.querySelector("select");
+    var search = container.querySelector(".autocomplete-search");
+    var results = container.querySelector(".autocomplete-results");
+    var timer = null;
+    var latest = 0;
+
+    function choose(item) {
+      select.appendChild(new Option(item.text, item.id, true, true));
+      search.value = "";
+      show([]);
+      search.focus();
+    }
+
+    function show(items) {
+      results.textContent = "";
+      items.forEach(function (item) {
+        if (select.querySelector('option[value="' + item.id + '"]')) {
+          return;
+        }
+        var entry = document.createElement("li");
+        entry.textContent = item.text;
+        entry.tabIndex = 0;
+        entry.addEventListener("click", function () {
+          choose(item);
+        });
+        entry.addEventListener("keydown", function (event) {
+          if (event.key === "Enter") {
+            event.preventDefault();
+            choose(item);
+          }
+        });
+        results.appendChild(entry);
+      });
+      results.hidden = !results.children.length;
+    }
+
+    function fetchResults(term) {
+      var request = ++latest;
+      fetch(
+        container.dataset.url + "?q=" + encodeURIComponent(term),
+        { credentials: "same-origin" }
+      )
+        .then(function (response) {
+          return response.json();
+        })
+        .then(function (data) {
+          if (request === latest) {
+            show(data.results);
+          }
+        });
+    }
+
+    search.hidden = false;
+    search.addEventListener("input", function () {
+      var term = search.value.trim();
+      clearTimeout(timer);
+      if (!term) {
+        latest++;
+        show([]);
+        return;
+      }
+      timer = setTimeout(fetchResults, DELAY, term);
+    });
+    search.addEventListener("keydown", function (event) {
+      if (event.key === "Enter") {
+        event.preventDefault(); // do not submit the form
+      }
+    });
+  }
+
+  document.addEventListener("DOMContentLoaded", function () {
+    document.querySelectorAll(".autocomplete").forEach(setUp);
+  });
+})();
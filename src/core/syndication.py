@@ -0,0 +1,139 @@
+"""Serve RSS and Atom feeds rendered once per change
+
+Aggregators poll feeds every few minutes, though they change
+a few times a day. A CachedFeed is a syndication Feed whose
+content depends only on a version stamp (see core.versions),
+bumped by the signals connected with bump_on_change() once
+the transaction of the change commits. Code writing rows
+without signals (such as bulk_create()) calls
+versions.bump_on_commit() itself.
+
+Each request reads the stamp: one query. A client sending
+the ETag or Last-Modified date of the current version gets a
+304 Not Modified; others get the feed from the cache,
+rendered again only once the stamp changes. Feeds list only
+the newest rows: subclasses slice their querysets to
+max_items.
+
+Syndication Feed Framework Documentation:
+https://docs.djangoproject.com/en/2.1/ref/contrib/syndication/
+"""
+from calendar import timegm
+from datetime import datetime, time
+from functools import partial
+from hashlib import md5
+
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+)
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date
+from django.utils.timezone import make_aware
+
+from . import versions
+
+CACHE_TIMEOUT = 24 * 60 * 60  # seconds
+
+
+def _bump(sender, name, action=None, **kwargs):
+    """Bump the stamp name once a change is made"""
+    if action is None or action.startswith("post_"):
+        versions.bump_on_commit(name)
+
+
+def bump_on_change(name, model, relations=()):
+    """Bump the stamp name as objects of model change
+
+    relations names ManyToManyFields of model whose changes
+    count too.
+    """
+    handler = partial(_bump, name=name)
+    uid = f"{name}:{model._meta.label_lower}"
+    post_save.connect(
+        handler,
+        sender=model,
+        weak=False,
+        dispatch_uid=f"{uid}:save",
+    )
+    post_delete.connect(
+        handler,
+        sender=model,
+        weak=False,
+        dispatch_uid=f"{uid}:delete",
+    )
+    for relation in relations:
+        m2m_changed.connect(
+            handler,
+            sender=getattr(model, relation).through,
+            weak=False,
+            dispatch_uid=f"{uid}:{relation}",
+        )
+
+
+def pubdate(day):
+    """Return the datetime of midnight on day, for feeds"""
+    return make_aware(datetime.combine(day, time.min))
+
+
+class CachedFeed(Feed):
+    """A Feed served from the cache, until version changes
+
+    version names the stamp the feed depends on.
+    """
+
+    version = None
+    max_items = 20
+
+    def __call__(self, request, *args, **kwargs):
+        """Answer 304, or the cached feed, or render it"""
+        stamp, changed = versions.stamped(self.version)
+        url = request.build_absolute_uri(request.path)
+        etag = '"{}"'.format(
+            md5(f"{url}\n{stamp}".encode()).hexdigest()
+        )
+        last_modified = (
+            None
+            if changed is None
+            else timegm(changed.utctimetuple())
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            key = f"feed:{etag}"
+            cached = cache.get(key)
+            if cached is None:
+                rendered = super().__call__(
+                    request, *args, **kwargs
+                )
+                cached = (
+                    rendered.content,
+                    rendered["Content-Type"],
+                )
+                cache.set(key, cached, CACHE_TIMEOUT)
+            content, content_type = cached
+            response = HttpResponse(
+                content, content_type=content_type
+            )
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(
+                last_modified
+            )
+        return response
+
+
+class AtomFeedMixin:
+    """Render a Feed as Atom rather than RSS"""
+
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        """Use the description as subtitle"""
+        return self._get_dynamic_attr("description", obj)
@@ -0,0 +1,21 @@
+"""Background tasks of the Core App
+
+Saving or deleting an object listed in the sitemap queues a
+rewrite of its shard; see core.sitemaps.
+"""
+from jobs.queue import task
+
+from . import sitemaps
+
+
+@task(name=sitemaps.SHARD_TASK)
+def write_sitemap_shard(section, shard):
+    """Write one shard of the sitemap, then the index"""
+    sitemaps.write_shard(sitemaps.SECTIONS[section], shard)
+    sitemaps.write_index()
+
+
+@task(max_attempts=1)
+def write_sitemaps():
+    """Write the whole sitemap"""
+    return sitemaps.write_sitemaps()
@@ -0,0 +1,44 @@
+"""Django template engine that reports rendering time
+
+Set as the BACKEND of TEMPLATES; see core.timing.
+
+Template Backend Documentation:
+https://docs.djangoproject.com/en/2.1/topics/templates/#support-for-template-engines
+"""
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import (
+    DjangoTemplates,
+    Template,
+    reraise,
+)
+
+from .timing import timed
+
+
+class TimedTemplate(Template):
+    """Template whose rendering counts as template time"""
+
+    def render(self, context=None, request=None):
+        """Render the template, timing it"""
+        with timed("template"):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates returning TimedTemplate objects"""
+
+    def from_string(self, template_code):
+        """Compile a template from a string"""
+        return TimedTemplate(
+            self.engine.from_string(template_code), self
+        )
+
+    def get_template(self, template_name):
+        """Load a template by name"""
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name),
+                self,
+            )
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
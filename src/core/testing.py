@@ -0,0 +1,163 @@
+"""Helpers for the test suites of the project's apps"""
+from concurrent.futures import Executor, Future
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer,
+)
+from threading import Lock, Thread
+
+from .instrumentation import count_queries
+
+
+class QueryBudgetMixin:
+    """Assert that views run a fixed number of queries
+
+    Subclasses implement grow(), which adds rows related to
+    the objects the views display. A view is within budget if
+    it never runs more than the budgeted number of queries
+    and the number does not change as rows are added. Each
+    counted request follows an uncounted one, so caches are
+    warm.
+    """
+
+    def grow(self):
+        """Add rows to the database between requests"""
+        raise NotImplementedError
+
+    def assert_query_budget(self, budget, url, **extra):
+        """GET url before and after grow(); check query count"""
+        counts = []
+        for _ in range(2):
+            # fill per-process caches, such as the Tag catalog
+            self.client.get(url, **extra)
+            with count_queries() as counter:
+                response = self.client.get(url, **extra)
+            self.assertEqual(response.status_code, 200, url)
+            counts.append(counter.count)
+            self.grow()
+        self.assertLessEqual(
+            counts[0],
+            budget,
+            f"{url} ran {counts[0]} queries; "
+            f"the budget is {budget}",
+        )
+        self.assertEqual(
+            counts[0],
+            counts[1],
+            f"{url} queries grow with the number of rows",
+        )
+
+
+class StandInServer:
+    """Serve canned responses on localhost, for tests
+
+    routes maps paths to functions that take the request
+    method and headers and return (status, headers, body). Requests
+    are recorded as (method, path, headers).
+
+    with StandInServer({"/": ok}) as server:
+        fetch(server.url("/"))
+    """
+
+    def __init__(self, routes, host="127.0.0.1"):
+        """Prepare the server; start it with `with`"""
+        self.routes = routes
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = Lock()
+        self._server = ThreadingHTTPServer(
+            (host, 0), self._handler_class()
+        )
+        self._server.daemon_threads = True
+
+    def _handler_class(self):
+        """Build a request handler bound to this server"""
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Answer from the routes of the stand-in"""
+
+            def do_GET(self):  # noqa: N802
+                """Send the routed response with a body"""
+                stand_in.respond(self, body=True)
+
+            def do_HEAD(self):  # noqa: N802
+                """Send the routed response without a body"""
+                stand_in.respond(self, body=False)
+
+            def log_message(self, *args):
+                """Keep test output quiet"""
+
+        return Handler
+
+    def respond(self, handler, body):
+        """Record the request and send the route's answer"""
+        with self._lock:
+            self.requests.append(
+                (
+                    handler.command,
+                    handler.path,
+                    dict(handler.headers),
+                )
+            )
+            self.active += 1
+            self.max_active = max(
+                self.max_active, self.active
+            )
+        try:
+            route = self.routes.get(
+                handler.path.split("?")[0]
+            )
+            if route is None:
+                status, headers, content = 404, {}, b""
+            else:
+                status, headers, content = route(
+                    handler.command, handler.headers
+                )
+            handler.send_response(status)
+            for name, value in headers.items():
+                handler.send_header(name, value)
+            handler.send_header(
+                "Content-Length", str(len(content))
+            )
+            handler.end_headers()
+            if body:
+                handler.wfile.write(content)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def url(self, path):
+        """Return the absolute URL of path on this server"""
+        host, port = self._server.server_address
+        return f"http://{host}:{port}{path}"
+
+    def __enter__(self):
+        """Start serving in a background thread"""
+        Thread(
+            target=self._server.serve_forever, daemon=True
+        ).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Stop serving"""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class InlineExecutor(Executor):
+    """Run submitted calls at once, in the calling thread
+
+    Code running queries in a thread pool then sees the
+    test's transaction.
+    """
+
+    def submit(self, function, *args, **kwargs):
+        """Call function; return its finished Future"""
+        future = Future()
+        try:
+            future.set_result(function(*args, **kwargs))
+        except BaseException as error:
+            future.set_exception(error)
+        return future
@@ -0,0 +1,1609 @@
+"""Tests for the core app"""
+import asyncio
+import gzip
+import json
+import socket
+import subprocess
+import sys
+from contextlib import contextmanager
+from cProfile import Profile
+from datetime import date, timedelta
+from functools import partial
+from importlib import import_module
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Timer
+from unittest import skipUnless
+from unittest.mock import Mock, patch
+
+from aiohttp.test_utils import TestClient, TestServer
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    OperationalError,
+    connections,
+    transaction,
+)
+from django.db.backends.postgresql import base as postgresql
+from django.http import StreamingHttpResponse
+from django.template import Context, Template
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, reverse
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE,
+    TRANSACTION_STATUS_INTRANS,
+)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.reverse import reverse as drf_reverse
+
+from blog.factories import PostFactory
+from jobs.models import Job
+from jobs.queue import run_job
+from organizer.catalog import catalog
+from organizer.factories import (
+    NewsLinkFactory,
+    StartupFactory,
+    TagFactory,
+)
+from organizer.models import Startup, Tag
+
+from .backends.postgresql import base as pooled
+from .batch import sub_request
+from .benchmarks import routes, seed
+from .changes import (
+    CursorExpired,
+    changes_since,
+    compact,
+    latest_cursor,
+    latest_sequence,
+    number_changes,
+)
+from .compression import brotli, negotiate
+from .db_pool import (
+    ConnectionPool,
+    PoolTimeout,
+    close_pool,
+    get_pool,
+)
+from .db_routers import (
+    PrimaryReplicaRouter,
+    request_routing,
+    use_replica,
+)
+from .events import EventHub, make_app
+from .instrumentation import QueryCounter, endpoint_stats
+from .keyset import page_queryset, page_sequence
+from .loadtest import SCENARIOS, LoadTest, Samples
+from .metrics import (
+    MmapStore,
+    Registry,
+    publish_pool_stats_now_and_then,
+)
+from .middleware import (
+    PIN_COOKIE_NAME,
+    CompressionMiddleware,
+)
+from .models import Change
+from .profiling import ProfileStore
+from .renderers import (
+    FastJSONRenderer,
+    MessagePackRenderer,
+    msgpack,
+)
+from .sitemaps import SECTIONS, shard_name, write_sitemaps
+from .slugs import allocate_slugs
+from .testing import InlineExecutor
+from .timing import request_timer
+
+REPLICA = "replica1"
+
+
+@skipUnless(
+    REPLICA in settings.DATABASES,
+    "Use config.settings.test",
+)
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTests(TransactionTestCase):
+    """Check reads and writes reach the right database
+
+    The replica mirrors the primary during tests. SQLite
+    locks tables with uncommitted writes, so these tests
+    commit their data instead of using TestCase.
+    """
+
+    multi_db = True
+
+    def setUp(self):
+        """Commit a Startup and a User to the primary"""
+        self.startup = Startup.objects.create(
+            name="jambon software",
+            slug="jambon-software",
+            description="Training and consulting.",
+            founded_date=date(2013, 1, 18),
+            contact="django@jambonsw.com",
+            website="https://www.jambonsw.com",
+        )
+        self.user = get_user_model().objects.create_user(
+            "andrew", password="s3cr3t!!"
+        )
+
+    def assert_reads_from(self, alias, path):
+        """GET the path; assert only alias was queried"""
+        others = [
+            connections[name]
+            for name in (DEFAULT_DB_ALIAS, REPLICA)
+            if name != alias
+        ]
+        with CaptureQueriesContext(
+            connections[alias]
+        ) as used:
+            with CaptureQueriesContext(others[0]) as unused:
+                response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(used.captured_queries)
+        self.assertFalse(unused.captured_queries)
+        return response
+
+    def test_router_outside_requests(self):
+        """Reads default to the primary"""
+        router = PrimaryReplicaRouter()
+        self.assertIn(
+            router.db_for_read(Tag),
+            (None, DEFAULT_DB_ALIAS),
+        )
+        self.assertEqual(
+            router.db_for_write(Tag), DEFAULT_DB_ALIAS
+        )
+
+    def test_use_replica_reads_own_writes(self):
+        """Reads return to the primary after a write"""
+        with use_replica():
+            self.assertEqual(Tag.objects.all().db, REPLICA)
+            Tag.objects.create(name="django")
+            self.assertEqual(
+                Tag.objects.all().db, DEFAULT_DB_ALIAS
+            )
+        self.assertEqual(
+            Tag.objects.all().db, DEFAULT_DB_ALIAS
+        )
+
+    def test_nested_requests(self):
+        """Restore the routing of an enclosing request"""
+        with use_replica():
+            with request_routing():
+                self.assertEqual(
+                    Tag.objects.all().db, DEFAULT_DB_ALIAS
+                )
+            self.assertEqual(Tag.objects.all().db, REPLICA)
+
+    def test_batch_reads_use_replica(self):
+        """Route each request of a batch on its own"""
+        with CaptureQueriesContext(
+            connections[REPLICA]
+        ) as replica:
+            response = self.client.get(
+                reverse("api-batch"),
+                {
+                    "url": reverse(
+                        "api-startup-detail",
+                        kwargs={"slug": self.startup.slug},
+                    )
+                },
+                HTTP_ACCEPT="application/json",
+            )
+        self.assertEqual(
+            response.json()["responses"][0]["status"], 200
+        )
+        self.assertTrue(replica.captured_queries)
+
+    def test_list_and_detail_views_use_replica(self):
+        """Read list and detail pages from replica"""
+        self.assert_reads_from(
+            REPLICA, reverse("startup_list")
+        )
+        self.assert_reads_from(
+            REPLICA, self.startup.get_absolute_url()
+        )
+
+    def test_viewset_reads_use_replica(self):
+        """Read API list and detail from replica"""
+        self.assert_reads_from(
+            REPLICA, reverse("api-startup-list")
+        )
+        self.assert_reads_from(
+            REPLICA,
+            reverse(
+                "api-startup-detail",
+                kwargs={"slug": self.startup.slug},
+            ),
+        )
+
+    def test_form_views_use_primary(self):
+        """Read from primary in form views"""
+        self.client.force_login(self.user)
+        self.assert_reads_from(
+            DEFAULT_DB_ALIAS, self.startup.get_update_url()
+        )
+
+    def test_writes_pin_client_to_primary(self):
+        """Reads after a write stay on the primary"""
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("tag_create"), {"name": "Django"}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(PIN_COOKIE_NAME, response.cookies)
+        self.assert_reads_from(
+            DEFAULT_DB_ALIAS, reverse("tag_list")
+        )
+
+
+class FakeConnection:
+    """Stand-in for a DB-API connection"""
+
+    def __init__(self):
+        """Open the connection"""
+        self.closed = False
+
+    def close(self):
+        """Close the connection"""
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Check the pool reuses, limits and checks connections"""
+
+    def test_reuse(self):
+        """Hand back the connection that was returned"""
+        pool = ConnectionPool(max_size=2)
+        conn = pool.checkout(FakeConnection)
+        pool.checkin(conn)
+        self.assertIs(pool.checkout(FakeConnection), conn)
+        stats = pool.stats()
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["in_use"], 1)
+
+    def test_limit(self):
+        """Time out when every connection is in use"""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.checkout(FakeConnection)
+        with self.assertRaises(PoolTimeout):
+            pool.checkout(FakeConnection)
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_wait_for_checkin(self):
+        """Wake waiting threads when a connection returns"""
+        pool = ConnectionPool(max_size=1, timeout=5)
+        conn = pool.checkout(FakeConnection)
+        Timer(0.05, pool.checkin, [conn]).start()
+        self.assertIs(pool.checkout(FakeConnection), conn)
+        self.assertGreater(pool.stats()["wait_max"], 0)
+
+    def test_failed_health_check(self):
+        """Replace connections that fail their check"""
+        pool = ConnectionPool(
+            check_after=0,
+            check=lambda conn: not conn.closed,
+        )
+        conn = pool.checkout(FakeConnection)
+        pool.checkin(conn)
+        conn.close()
+        self.assertIsNot(
+            pool.checkout(FakeConnection), conn
+        )
+        stats = pool.stats()
+        self.assertEqual(stats["failed_checks"], 1)
+        self.assertEqual(stats["size"], 1)
+
+    def test_failed_reset(self):
+        """Discard connections that cannot be reset"""
+        pool = ConnectionPool(reset=lambda conn: False)
+        conn = pool.checkout(FakeConnection)
+        pool.checkin(conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()["size"], 0)
+
+
+class FakePsycopgConnection(FakeConnection):
+    """Stand-in for a psycopg2 connection"""
+
+    isolation_level = 1
+
+    def __init__(self):
+        """Open the connection, idle"""
+        super().__init__()
+        self.status = TRANSACTION_STATUS_IDLE
+        self.answers = True
+
+    def get_transaction_status(self):
+        """Return whether a transaction is open"""
+        return self.status
+
+    def rollback(self):
+        """End the open transaction"""
+        self.status = TRANSACTION_STATUS_IDLE
+
+    @contextmanager
+    def cursor(self):
+        """Yield a cursor, which fails if the server is gone"""
+        yield self
+
+    def execute(self, sql):
+        """Answer queries, unless the server is gone"""
+        if not self.answers:
+            raise OperationalError("server closed")
+
+
+class PooledBackendTests(SimpleTestCase):
+    """Check the PostgreSQL backend borrows pooled connections"""
+
+    def setUp(self):
+        """Make a wrapper for a database of its own"""
+        self.wrapper = pooled.DatabaseWrapper(
+            {
+                "NAME": "pooled",
+                "OPTIONS": {},
+                "POOL": {"MAX_SIZE": 1, "CHECK_AFTER": 0},
+            },
+            alias="pooled",
+        )
+        self.addCleanup(
+            close_pool, pooled.pool_key("pooled", "pooled")
+        )
+        connect = patch.object(
+            postgresql.DatabaseWrapper,
+            "get_new_connection",
+            side_effect=lambda params: FakePsycopgConnection(),
+        )
+        self.connect = connect.start()
+        self.addCleanup(connect.stop)
+
+    def test_checkout_and_checkin(self):
+        """Hand connections back, rolled back, for reuse"""
+        conn = self.wrapper.get_new_connection({})
+        conn.status = TRANSACTION_STATUS_INTRANS
+        self.wrapper.connection = conn
+        self.wrapper._close()
+        self.assertFalse(conn.closed)
+        self.assertEqual(
+            conn.status, TRANSACTION_STATUS_IDLE
+        )
+        self.assertIs(
+            self.wrapper.get_new_connection({}), conn
+        )
+        self.assertEqual(self.connect.call_count, 1)
+        stats = self.wrapper.pool.stats()
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["in_use"], 1)
+
+    def test_health_check(self):
+        """Replace connections the server dropped"""
+        conn = self.wrapper.get_new_connection({})
+        self.wrapper.connection = conn
+        self.wrapper._close()
+        conn.answers = False
+        replacement = self.wrapper.get_new_connection({})
+        self.assertIsNot(replacement, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(
+            self.wrapper.pool.stats()["failed_checks"], 1
+        )
+
+    def test_closed_not_kept(self):
+        """Discard connections closed while checked out"""
+        conn = self.wrapper.get_new_connection({})
+        conn.close()
+        self.wrapper.connection = conn
+        self.wrapper._close()
+        self.assertEqual(
+            self.wrapper.pool.stats()["size"], 0
+        )
+
+    def test_listen_unpooled(self):
+        """Listen for events outside the pool"""
+        conn = FakePsycopgConnection()
+        reader, writer = socket.socketpair()
+        self.addCleanup(reader.close)
+        self.addCleanup(writer.close)
+        conn.fileno = reader.fileno
+
+        async def listen():
+            """Start listening, then stop"""
+            hub = EventHub(executor=InlineExecutor())
+            listener = await hub.listen()
+            hub.unlisten()
+            return listener
+
+        with self.listening(conn) as connect:
+            listener = asyncio.run(listen())
+        self.assertIs(listener, conn)
+        self.assertTrue(listener.autocommit)
+        self.assertTrue(listener.closed)
+        connect.assert_called_once_with(database="pooled")
+        self.assertEqual(self.connect.call_count, 0)
+        self.assertEqual(
+            self.wrapper.pool.stats()["checkouts"], 0
+        )
+
+    def test_listener_dropped(self):
+        """Poll, and listen again, once the listener drops"""
+        dropped = FakePsycopgConnection()
+        reader, writer = socket.socketpair()
+        self.addCleanup(reader.close)
+        self.addCleanup(writer.close)
+        dropped.fileno = reader.fileno
+        dropped.poll = Mock(
+            side_effect=self.wrapper.Database.OperationalError
+        )
+        replacement = FakePsycopgConnection()
+        replacement.fileno = writer.fileno
+        hub = EventHub(executor=InlineExecutor())
+
+        async def drop():
+            """Listen; read from the dead connection"""
+            hub.woken = asyncio.Event()
+            await hub.listen()
+            writer.send(b"x")
+            await asyncio.wait_for(hub.woken.wait(), 5)
+            self.assertIsNone(hub.listener)
+            hub.poll = partial(asyncio.sleep, 0, False)
+            running = asyncio.ensure_future(hub.run())
+            while hub.listener is None:
+                await asyncio.sleep(0)
+            running.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await running
+
+        with self.listening(
+            dropped, replacement
+        ) as connect, self.assertLogs("core.events"):
+            asyncio.run(drop())
+        self.assertTrue(dropped.closed)
+        self.assertEqual(connect.call_count, 2)
+        # run() listened again, and stopped when cancelled
+        self.assertTrue(replacement.closed)
+
+    @contextmanager
+    def listening(self, *conns):
+        """Connect listeners to conns, outside the pool"""
+        with patch(
+            "core.events.connections",
+            {"default": self.wrapper},
+        ), patch.object(
+            self.wrapper,
+            "get_connection_params",
+            return_value={"database": "pooled"},
+        ), patch.object(
+            self.wrapper.Database,
+            "connect",
+            side_effect=conns,
+        ) as connect:
+            yield connect
+
+
+@override_settings(TAG_CATALOG_MAX_AGE=0)
+class QueryCountMiddlewareTests(TestCase):
+    """Check queries are recorded by URL name"""
+
+    def test_record_by_url_name(self):
+        """Total queries for each URL name"""
+        # load the current Tags, as a warm process would have
+        catalog.snapshot()
+        endpoint_stats.reset()
+        self.client.get(reverse("tag_list"))
+        self.client.get(reverse("tag_list"))
+        stats = endpoint_stats.snapshot()["tag_list"]
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["queries"], 2)
+        self.assertEqual(stats["max_queries"], 1)
+
+    def test_one_counter(self):
+        """Count each query once, for all middleware"""
+        counters = []
+        count = QueryCounter.__call__
+
+        def counted(counter, *args):
+            """Note which counter saw the query"""
+            counters.append(counter)
+            return count(counter, *args)
+
+        with patch.object(
+            QueryCounter, "__call__", counted
+        ):
+            response = self.client.get(
+                reverse("startup_list")
+            )
+        self.assertEqual(len(set(map(id, counters))), 1)
+        self.assertEqual(
+            len(counters),
+            response.wsgi_request.query_counter.count,
+        )
+
+
+class ServerTimingTests(TestCase):
+    """Check per-phase timings reach headers and logs"""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a staff user and a Startup"""
+        cls.staff = get_user_model().objects.create_user(
+            "staff", password="staff", is_staff=True
+        )
+        Startup.objects.create(
+            name="JamBon Software",
+            slug="jambon-software",
+            description="Web consulting",
+            founded_date=date(2013, 1, 18),
+            contact="django@jambonsw.com",
+        )
+
+    def metrics(self, response):
+        """Return the metric names of Server-Timing"""
+        return {
+            metric.split(";")[0].strip()
+            for metric in response["Server-Timing"].split(
+                ","
+            )
+        }
+
+    def test_hidden_from_anonymous_users(self):
+        """Only staff see timings by default"""
+        response = self.client.get(reverse("startup_list"))
+        self.assertNotIn("Server-Timing", response)
+        self.assertNotIn("Cookie", response.get("Vary", ""))
+        with override_settings(SERVER_TIMING=True):
+            response = self.client.get(
+                reverse("startup_list")
+            )
+        self.assertIn("Server-Timing", response)
+
+    def test_html_phases(self):
+        """Time queries, templates and URLs"""
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("startup_list"))
+        self.assertLessEqual(
+            {"db", "template", "url", "total"},
+            self.metrics(response),
+        )
+
+    def test_api_phases(self):
+        """Time serialization of API responses"""
+        self.client.force_login(self.staff)
+        response = self.client.get(
+            reverse("api-startup-list"),
+            HTTP_ACCEPT="application/json",
+        )
+        self.assertLessEqual(
+            {"db", "serialize", "url", "total"},
+            self.metrics(response),
+        )
+
+    def test_url_hook(self):
+        """Time each way of reversing URLs"""
+        self.assertTrue(
+            getattr(
+                URLResolver._reverse_with_prefix,
+                "timed",
+                False,
+            ),
+            "Django no longer has the method timed by "
+            "core.timing.instrument_url_reversing",
+        )
+        template = Template("{% url 'startup_list' %}")
+        for reverse_url in (
+            partial(reverse, "startup_list"),
+            partial(drf_reverse, "startup_list"),
+            partial(template.render, Context()),
+        ):
+            with request_timer() as timer:
+                reverse_url()
+            self.assertEqual(timer.counts.get("url"), 1)
+
+    def test_logged(self):
+        """Log timings with the URL name"""
+        with self.assertLogs("core.timing", "INFO") as logs:
+            self.client.get(reverse("startup_list"))
+        record = logs.records[-1]
+        self.assertEqual(record.url_name, "startup_list")
+        self.assertGreaterEqual(
+            record.timings["db"]["count"], 1
+        )
+
+
+class ProfilerTests(TestCase):
+    """Check requests are profiled and profiles displayed"""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a staff user"""
+        cls.staff = get_user_model().objects.create_user(
+            "staff", password="staff", is_staff=True
+        )
+
+    def setUp(self):
+        """Store profiles in a temporary directory"""
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(
+            PROFILE_DIR=directory.name, PROFILE_KEEP=2
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.store = ProfileStore()
+
+    def test_header_needs_staff(self):
+        """Only staff can ask for a profile"""
+        self.client.get(
+            reverse("tag_list"), HTTP_X_PROFILE="1"
+        )
+        self.assertEqual(self.store.profiles(), [])
+        self.client.force_login(self.staff)
+        self.client.get(
+            reverse("tag_list"), HTTP_X_PROFILE="1"
+        )
+        (profile,) = self.store.profiles()
+        self.assertEqual(profile["url_name"], "tag_list")
+
+    def test_sample_rate(self):
+        """Profile a fraction of requests; keep the newest"""
+        with override_settings(PROFILE_SAMPLE_RATE=1.0):
+            for _ in range(3):
+                self.client.get(
+                    reverse("api-tag-list"),
+                    HTTP_ACCEPT="application/json",
+                )
+        self.client.get(reverse("api-tag-list"))
+        profiles = self.store.profiles()
+        self.assertEqual(len(profiles), 2)
+        self.assertEqual(
+            profiles[0]["url_name"], "api-tag-list"
+        )
+
+    def test_admin_pages(self):
+        """List profiles and show the hottest functions"""
+        self.client.force_login(self.staff)
+        self.client.get(
+            reverse("startup_list"), HTTP_X_PROFILE="1"
+        )
+        response = self.client.get(
+            reverse("admin_profile_list")
+        )
+        self.assertContains(response, "startup_list")
+        (profile,) = response.context["profiles"]
+        response = self.client.get(
+            reverse(
+                "admin_profile_detail",
+                kwargs={
+                    "url_name": profile["url_name"],
+                    "name": profile["name"],
+                },
+            ),
+            {"sort": "cumtime"},
+        )
+        self.assertContains(response, "render")
+        self.assertNotEqual(
+            response.context["stats"]["functions"], []
+        )
+        response = self.client.get(
+            reverse(
+                "admin_profile_detail",
+                kwargs={
+                    "url_name": "startup_list",
+                    "name": "missing.prof",
+                },
+            )
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_dot_names(self):
+        """Keep profiles of dotted URL names in the root"""
+        store = ProfileStore(self.store.directory / "inner")
+        name = store.save("..", Profile(), 0.01)
+        self.assertTrue(store.path("__", name))
+        # a file the dots would reach, outside the root
+        (self.store.directory / name).touch()
+        for url_name in (".", ".."):
+            self.assertIsNone(store.path(url_name, name))
+
+
+class MetricsTests(TestCase):
+    """Check metrics are recorded, shared and exported"""
+
+    def test_endpoint(self):
+        """Export request metrics to allowed clients"""
+        self.client.get(reverse("tag_list"))
+        self.assertEqual(
+            self.client.get(reverse("metrics")).status_code,
+            404,
+        )
+        with override_settings(METRICS_TOKEN="secret"):
+            response = self.client.get(
+                reverse("metrics"),
+                HTTP_AUTHORIZATION="Bearer secret",
+            )
+        self.assertContains(
+            response,
+            'http_requests_total{method="GET",'
+            'url_name="tag_list",status="200"}',
+        )
+        self.assertContains(
+            response,
+            "http_request_duration_seconds_bucket{"
+            'method="GET",url_name="tag_list",le="+Inf"}',
+        )
+        self.assertContains(
+            response,
+            'http_request_db_queries_bucket{method="GET",'
+            'url_name="tag_list",le="1"}',
+        )
+
+    def test_pool_stats(self):
+        """Export the occupancy and waits of each pool"""
+        pool = get_pool("metrics:pool")
+        self.addCleanup(close_pool, "metrics:pool")
+        pool.checkin(pool.checkout(FakeConnection))
+        pool.checkout(FakeConnection)
+        self.client.force_login(
+            get_user_model().objects.create_user(
+                "staff", is_staff=True
+            )
+        )
+        response = self.client.get(reverse("metrics"))
+        for line in [
+            'db_pool_connections{database="metrics:pool",'
+            'state="in_use"} 1.0',
+            'db_pool_connections{database="metrics:pool",'
+            'state="idle"} 0.0',
+            'db_pool_checkouts_total{database="metrics:pool"}'
+            " 2.0",
+            'db_pool_max_size{database="metrics:pool"} 4.0',
+        ]:
+            self.assertContains(response, line)
+
+    @override_settings(METRICS_POOL_INTERVAL=10)
+    def test_pool_stats_now_and_then(self):
+        """Publish pool statistics once per interval"""
+        with patch(
+            "core.metrics.publish_pool_stats"
+        ) as publish, patch(
+            "core.metrics._pool_stats_published", None
+        ), patch(
+            "core.metrics.monotonic",
+            side_effect=[100, 105, 111],
+        ):
+            for _ in range(3):
+                publish_pool_stats_now_and_then()
+        self.assertEqual(publish.call_count, 2)
+
+    def test_processes_share_directory(self):
+        """Add up the files of all processes"""
+        with TemporaryDirectory() as directory:
+            registry = Registry()
+            jobs = registry.counter("jobs_total", "Jobs.")
+            sizes = registry.histogram(
+                "job_size", "Sizes.", [1, 10]
+            )
+            labels = (("queue", "mail"),)
+            with override_settings(METRICS_DIR=directory):
+                jobs.inc(labels)
+                sizes.observe(labels, 5)
+                other = MmapStore(
+                    Path(directory) / "metrics_1.db",
+                    initial_size=64,
+                )
+                other.add(jobs.increments(labels, 2))
+                for number in range(20):
+                    other.add(
+                        jobs.increments(
+                            (("queue", number),)
+                        )
+                    )
+                other.close()
+                text = registry.render()
+                reopened = MmapStore(
+                    Path(directory) / "metrics_1.db"
+                )
+                self.assertEqual(len(reopened.items()), 21)
+                reopened.close()
+                registry.store.close()
+        self.assertIn('jobs_total{queue="mail"} 3.0', text)
+        self.assertIn(
+            'job_size_bucket{queue="mail",le="1"} 0.0', text
+        )
+        self.assertIn(
+            'job_size_bucket{queue="mail",le="10"} 1.0',
+            text,
+        )
+        self.assertIn(
+            'job_size_sum{queue="mail"} 5.0', text
+        )
+
+    def test_dead_processes(self):
+        """Keep counters but drop gauges of exited processes"""
+        process = subprocess.Popen(
+            [sys.executable, "-c", ""]
+        )
+        process.wait()
+        with TemporaryDirectory() as directory:
+            registry = Registry()
+            jobs = registry.counter("jobs_total", "Jobs.")
+            size = registry.gauge("pool_size", "Size.")
+            with override_settings(METRICS_DIR=directory):
+                registry.store.set(size.increments((), 2))
+                dead = MmapStore(
+                    Path(directory)
+                    / f"metrics_{process.pid}.db"
+                )
+                dead.add(jobs.increments((), 3))
+                dead.set(size.increments((), 5))
+                dead.close()
+                text = registry.render()
+                registry.store.close()
+        self.assertIn("jobs_total 3.0", text)
+        self.assertIn("pool_size 2.0", text)
+
+
+class BenchmarkTests(TestCase):
+    """Check benchmark data and route discovery"""
+
+    def test_seed_is_additive(self):
+        """Seed twice without clashing names"""
+        self.assertEqual(
+            seed(20),
+            {
+                "tags": 10,
+                "startups": 20,
+                "newslinks": 60,
+                "posts": 10,
+            },
+        )
+        seed(20)
+        self.assertEqual(Startup.objects.count(), 40)
+        self.assertFalse(Startup.objects.filter(tags=None))
+
+    def test_routes_cover_html_and_api(self):
+        """Find detail routes for every model"""
+        seed(10)
+        names = {name for name, path in routes()}
+        self.assertLessEqual(
+            {
+                "admin:organizer_newslink_changelist",
+                "api-post-detail",
+                "api-newslink-detail",
+                "newslink_update",
+                "post_detail",
+                "startup_detail",
+                "tag_detail",
+            },
+            names,
+        )
+        self.assertNotIn("admin:index", names)
+
+
+class TestLoadClient:
+    """Send load test requests through Django's test client"""
+
+    def __init__(self, client):
+        """Send requests with client"""
+        self.client = client
+        self.paths = []
+
+    def request(self, path, data=None, headers=None):
+        """Send a request; return (status, bytes received)"""
+        self.paths.append(path)
+        extra = {
+            "HTTP_" + name.upper().replace("-", "_"): value
+            for name, value in (headers or {}).items()
+        }
+        if data is None:
+            response = self.client.get(path, **extra)
+        else:
+            response = self.client.post(path, data, **extra)
+        return response.status_code, len(response.content)
+
+
+class LoadTestTests(TestCase):
+    """Check the scenarios of load tests and their mix"""
+
+    def test_scenarios(self):
+        """Request existing pages, answered as expected"""
+        seed(10)
+        self.client.force_login(
+            get_user_model().objects.create_superuser(
+                "admin", "admin@example.com", "s3cr3t!!"
+            )
+        )
+        client = TestLoadClient(self.client)
+        samples = Samples()
+        for name, scenario in SCENARIOS.items():
+            status, size = scenario.function(
+                client, samples
+            )
+            self.assertEqual(
+                status, scenario.expected, name
+            )
+            if status == 200:
+                self.assertGreater(size, 0, name)
+        # API lists take no page parameter
+        self.assertFalse(
+            [path for path in client.paths if "?" in path]
+        )
+
+    def test_mix(self):
+        """Weigh scenarios, leaving out those weighing 0"""
+        seed(10)
+        load_test = LoadTest(
+            "http://testserver",
+            weights={
+                "api_list": 30,
+                "newslink_create": 0,
+                "post_update": 0,
+            },
+        )
+        names, weights = load_test.mix()
+        self.assertNotIn("newslink_create", names)
+        self.assertNotIn("post_update", names)
+        self.assertEqual(
+            dict(zip(names, weights))["api_list"], 30
+        )
+        self.assertEqual(
+            dict(zip(names, weights))["tag_list"],
+            SCENARIOS["tag_list"].weight,
+        )
+        self.assertFalse(load_test.needs_login)
+
+
+class SlugAllocationTests(TestCase):
+    """Check batches of slugs match AutoSlugField's"""
+
+    def test_batch(self):
+        """Skip taken slugs, in one query"""
+        Tag.objects.create(name="c")
+        long = "x" * 31
+        tags = [
+            Tag(name=name)
+            for name in (
+                "c!",
+                "c?",
+                "python",
+                long,
+                long.upper(),
+            )
+        ]
+        with self.assertNumQueries(1):
+            allocate_slugs(tags)
+        self.assertEqual(
+            [tag.slug for tag in tags],
+            ["c-2", "c-3", "python", long, "x" * 29 + "-2"],
+        )
+
+    def test_save(self):
+        """Allocate on save, as AutoSlugField did"""
+        Tag.objects.create(name="web")
+        tag = Tag.objects.create(name="web!")
+        self.assertEqual(tag.slug, "web-2")
+        tag.name = "web?"
+        tag.save()
+        self.assertEqual(tag.slug, "web-2")
+
+
+class KeysetTests(TestCase):
+    """Check keyset pages cover every row once"""
+
+    def walk(self, paginate):
+        """Follow next cursors, then previous ones back"""
+        pages = [paginate()]
+        while pages[-1].next:
+            pages.append(paginate(after=pages[-1].next))
+        back = [pages[-1]]
+        while back[-1].previous:
+            back.append(paginate(before=back[-1].previous))
+        return (
+            [page.object_list for page in pages],
+            [page.object_list for page in reversed(back)],
+        )
+
+    def test_queryset(self):
+        """Page through rows with equal names by pk"""
+        for name in "bacab":
+            Startup.objects.create(
+                name=name,
+                slug=f"{name}-{Startup.objects.count()}",
+                description="",
+                founded_date=date(2018, 1, 1),
+                contact="a@example.com",
+                website="https://example.com",
+            )
+        keys = [("name", False), ("pk", False)]
+        forward, backward = self.walk(
+            lambda **kwargs: page_queryset(
+                Startup.objects.all(), keys, 2, **kwargs
+            )
+        )
+        names = [[s.name for s in page] for page in forward]
+        self.assertEqual(
+            names, [["a", "a"], ["b", "b"], ["c"]]
+        )
+        self.assertEqual(forward, backward)
+        with self.assertRaises(ValueError):
+            page_queryset(
+                Startup.objects.all(), keys, 2, after="x"
+            )
+
+    def test_sequence(self):
+        """Page through a sorted list by bisection"""
+        items = list("abcde")
+        forward, backward = self.walk(
+            lambda **kwargs: page_sequence(
+                items,
+                [(item,) for item in items],
+                2,
+                **kwargs,
+            )
+        )
+        self.assertEqual(
+            forward, [["a", "b"], ["c", "d"], ["e"]]
+        )
+        self.assertEqual(forward, backward)
+
+
+# changes are numbered once their transaction commits
+class ChangeLogTests(TransactionTestCase):
+    """Check the change log follows saves and deletes"""
+
+    def test_feed(self):
+        """List objects saved and deleted after a cursor"""
+        old = TagFactory(name="old")
+        old_pk = old.pk
+        response = self.client.get(
+            reverse("api-changes"),
+            HTTP_ACCEPT="application/json",
+        )
+        cursor = response.json()["next"]
+        tag = TagFactory(name="new")
+        startup = StartupFactory(name="JamBon", tags=[tag])
+        old.delete()
+        response = self.client.get(
+            reverse("api-changes"),
+            {"since": cursor},
+            HTTP_ACCEPT="application/json",
+        )
+        changes = response.json()
+        self.assertEqual(
+            [
+                s["name"]
+                for s in changes["saved"]["startup"]
+            ],
+            [startup.name],
+        )
+        self.assertEqual(
+            [t["name"] for t in changes["saved"]["tag"]],
+            ["new"],
+        )
+        self.assertEqual(
+            changes["deleted"], {"tag": [old_pk]}
+        )
+        self.assertFalse(changes["more"])
+        response = self.client.get(
+            reverse("api-changes"),
+            {"since": changes["next"]},
+            HTTP_ACCEPT="application/json",
+        )
+        self.assertEqual(response.json()["saved"], {})
+        response = self.client.get(
+            reverse("api-changes"),
+            {"since": "nope"},
+            HTTP_ACCEPT="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_relations(self):
+        """Log changes to relations, from either side"""
+        tag = TagFactory()
+        startups = StartupFactory.create_batch(
+            2, tags=[tag]
+        )
+        cursor = latest_cursor()
+        tag.startup_set.clear()
+        self.assertEqual(
+            sorted(changes_since(cursor).saved["startup"]),
+            sorted(startup.pk for startup in startups),
+        )
+
+    def test_batches(self):
+        """Return changes in batches, each object once"""
+        cursor = latest_cursor()
+        tag = TagFactory()
+        tag.save()
+        other = TagFactory()
+        batch = changes_since(cursor, size=2)
+        self.assertEqual(batch.saved, {"tag": [tag.pk]})
+        self.assertTrue(batch.more)
+        batch = changes_since(batch.cursor, size=2)
+        self.assertEqual(batch.saved, {"tag": [other.pk]})
+        self.assertFalse(batch.more)
+
+    def test_commit_order(self):
+        """Number changes as their transaction commits"""
+        cursor = latest_cursor()
+        with transaction.atomic():
+            tag = TagFactory()
+            # uncommitted: no client may move past it yet
+            self.assertEqual(
+                changes_since(cursor).saved, {}
+            )
+        batch = changes_since(cursor)
+        self.assertEqual(batch.saved, {"tag": [tag.pk]})
+        # a lower id, committed after a higher one
+        early = Change.objects.create(
+            kind="tag", object_id=tag.pk
+        )
+        later = TagFactory()
+        Change.objects.filter(pk=early.pk).update(
+            sequence=None
+        )
+        batch = changes_since(batch.cursor)
+        self.assertEqual(batch.saved, {"tag": [later.pk]})
+        self.assertEqual(number_changes(), 1)
+        self.assertEqual(
+            changes_since(batch.cursor).saved,
+            {"tag": [tag.pk]},
+        )
+
+    def test_rolled_back(self):
+        """Log nothing for changes rolled back"""
+        count = Change.objects.count()
+        with self.assertRaises(ZeroDivisionError):
+            with transaction.atomic():
+                TagFactory()
+                1 / 0
+        self.assertEqual(Change.objects.count(), count)
+
+    def test_compact(self):
+        """Keep the last change of each object"""
+        tag = TagFactory()
+        tag_pk = tag.pk
+        for _ in range(3):
+            tag.save()
+        cursor = latest_cursor()
+        tag.delete()
+        self.assertEqual(compact(), 4)
+        self.assertEqual(
+            changes_since(cursor).deleted, {"tag": [tag_pk]}
+        )
+        self.assertEqual(
+            compact(max_age=timedelta(days=-1)), 1
+        )
+        self.assertFalse(Change.objects.exists())
+        # the delete is forgotten: fetch everything again
+        with self.assertRaises(CursorExpired):
+            changes_since(cursor)
+        response = self.client.get(
+            reverse("api-changes"),
+            {"since": cursor},
+            HTTP_ACCEPT="application/json",
+        )
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(
+            response.json()["next"], latest_cursor()
+        )
+
+
+async def read_event(response):
+    """Return the fields of the next event of a stream"""
+    fields = {}
+    while True:
+        line = (await response.content.readline()).decode()
+        if line == "\n":
+            return fields
+        name, _, value = line.rstrip("\n").partition(": ")
+        fields[name] = value
+
+
+class EventStreamTests(TransactionTestCase):
+    """Check new objects are streamed to clients"""
+
+    def test_stream(self):
+        """Replay missed events, then push new ones"""
+        startup = StartupFactory(
+            slug="jambon", tags=[TagFactory(name="django")]
+        )
+        missed = latest_sequence()
+        NewsLinkFactory(startup=startup, title="Missed")
+        NewsLinkFactory(title="Elsewhere")
+        hub = EventHub(
+            poll_interval=3600, executor=InlineExecutor()
+        )
+        asyncio.run(self.follow(hub, missed))
+
+    async def follow(self, hub, missed):
+        """Connect with Last-Event-ID; read two events"""
+        client = TestClient(TestServer(make_app(hub)))
+        await client.start_server()
+        try:
+            response = await client.get(
+                "/events/",
+                params={"startup": "jambon"},
+                headers={"Last-Event-ID": str(missed)},
+            )
+            self.assertEqual(
+                await read_event(response),
+                {"retry": "3000"},
+            )
+            event = await read_event(response)
+            self.assertEqual(event["event"], "newslink")
+            data = json.loads(event["data"])
+            self.assertEqual(data["title"], "Missed")
+            self.assertEqual(data["tags"], ["django"])
+            PostFactory(
+                title="Elsewhere",
+                startups=[StartupFactory()],
+            )
+            PostFactory(
+                title="New",
+                startups=[
+                    Startup.objects.get(slug="jambon")
+                ],
+            )
+            await hub.poll()
+            event = await read_event(response)
+            self.assertEqual(event["event"], "post")
+            self.assertEqual(
+                json.loads(event["data"])["title"], "New"
+            )
+            self.assertGreater(int(event["id"]), missed)
+        finally:
+            await client.close()
+
+
+class BatchTests(TransactionTestCase):
+    """Check batches answer each API URL in turn"""
+
+    def setUp(self):
+        """Create a Startup with a Tag"""
+        self.startup = StartupFactory(
+            slug="jambon", tags=[TagFactory(name="django")]
+        )
+
+    def batch(self, urls, **params):
+        """Return the statuses and bodies of a batch"""
+        response = self.client.get(
+            reverse("api-batch"),
+            {"url": urls, **params},
+            HTTP_ACCEPT="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        return [
+            (answer["status"], answer["body"])
+            for answer in response.json()["responses"]
+        ]
+
+    def test_batch(self):
+        """Answer API URLs, and only those, in order"""
+        detail = reverse(
+            "api-startup-detail", kwargs={"slug": "jambon"}
+        )
+        tags = reverse(
+            "api-startup-tags", kwargs={"slug": "jambon"}
+        )
+        for parallel in ("", "1"):
+            answers = self.batch(
+                [
+                    detail,
+                    tags + "?format=json",
+                    detail,
+                    reverse(
+                        "api-startup-detail",
+                        kwargs={"slug": "x"},
+                    ),
+                    reverse("startup_list"),
+                    reverse("api-batch"),
+                ],
+                parallel=parallel,
+            )
+            self.assertEqual(
+                [status for status, _ in answers],
+                [200, 200, 200, 404, 404, 404],
+            )
+            self.assertEqual(
+                answers[0][1]["name"], self.startup.name
+            )
+            self.assertEqual(answers[0], answers[2])
+            self.assertEqual(
+                [tag["name"] for tag in answers[1][1]],
+                ["django"],
+            )
+
+    def test_middleware(self):
+        """Run each request through the middleware"""
+        endpoint_stats.reset()
+        detail = reverse(
+            "api-startup-detail", kwargs={"slug": "jambon"}
+        )
+        self.batch(
+            [detail, reverse("api-tag-list")], parallel="1"
+        )
+        stats = endpoint_stats.snapshot()
+        for url_name in (
+            "api-batch",
+            "api-startup-detail",
+            "api-tag-list",
+        ):
+            self.assertEqual(
+                stats[url_name]["requests"], 1, url_name
+            )
+
+    def test_sub_request(self):
+        """Build requests of their own, with the headers"""
+        request = RequestFactory().post(
+            reverse("api-batch"),
+            {"urls": []},
+            content_type="application/json",
+            HTTP_ACCEPT_ENCODING="gzip",
+            HTTP_COOKIE="sessionid=abc",
+        )
+        sub = sub_request(request, "/api/v1/tag/?page=2")
+        self.assertIsNot(sub, request)
+        self.assertEqual(
+            (sub.method, sub.path, sub.GET["page"]),
+            ("GET", "/api/v1/tag/", "2"),
+        )
+        self.assertEqual(sub.COOKIES, {"sessionid": "abc"})
+        self.assertEqual(
+            sub.META["HTTP_ACCEPT"], "application/json"
+        )
+        self.assertNotIn("HTTP_ACCEPT_ENCODING", sub.META)
+        self.assertEqual(sub.body, b"")
+
+    def test_limit(self):
+        """Refuse batches of too many URLs"""
+        response = self.client.post(
+            reverse("api-batch"),
+            {"urls": [reverse("api-tag-list")] * 21},
+            content_type="application/json",
+            HTTP_ACCEPT="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class CompressionTests(TestCase):
+    """Check responses are compressed when worth it"""
+
+    def test_negotiate(self):
+        """Pick the encoding the client prefers"""
+        best = "br" if brotli else "gzip"
+        self.assertEqual(
+            negotiate("gzip, deflate, br"), best
+        )
+        self.assertEqual(
+            negotiate("br;q=0.5, gzip"), "gzip"
+        )
+        self.assertEqual(negotiate("*"), best)
+        self.assertIsNone(negotiate("identity"))
+        self.assertIsNone(negotiate("gzip;q=0"))
+        self.assertIsNone(negotiate(""))
+
+    def test_api(self):
+        """Compress large JSON, not small"""
+        StartupFactory.create_batch(10)
+        url = reverse("api-startup-list")
+        response = self.client.get(
+            url,
+            HTTP_ACCEPT="application/json",
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertEqual(
+            response["Content-Encoding"], "gzip"
+        )
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(
+            json.loads(gzip.decompress(response.content)),
+            self.client.get(
+                url, HTTP_ACCEPT="application/json"
+            ).json(),
+        )
+        response = self.client.get(
+            reverse("api-tag-list"),
+            HTTP_ACCEPT="application/json",
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertFalse(
+            response.has_header("Content-Encoding")
+        )
+
+    def test_streaming(self):
+        """Compress streams chunk by chunk"""
+        chunks = [b"x" * 2000, b"y" * 2000]
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(
+                iter(chunks), content_type="text/plain"
+            )
+        )
+        response = middleware(
+            RequestFactory().get(
+                "/", HTTP_ACCEPT_ENCODING="gzip"
+            )
+        )
+        body = list(response.streaming_content)
+        self.assertEqual(len(body), 3)
+        self.assertEqual(
+            gzip.decompress(b"".join(body)),
+            b"".join(chunks),
+        )
+
+
+class RendererTests(SimpleTestCase):
+    """Check the API renderers agree with DRF's"""
+
+    data = {
+        "name": "Jam\u2028Bon",
+        "founded": date(2013, 1, 18),
+        "tags": [{"slug": "django"}],
+    }
+
+    def test_json(self):
+        """Render the same bytes as DRF's JSONRenderer"""
+        self.assertEqual(
+            FastJSONRenderer().render(self.data),
+            JSONRenderer().render(self.data),
+        )
+        self.assertEqual(
+            FastJSONRenderer().render(
+                self.data, "application/json; indent=2"
+            ),
+            JSONRenderer().render(
+                self.data, "application/json; indent=2"
+            ),
+        )
+
+    @skipUnless(msgpack, "Install msgpack")
+    def test_msgpack(self):
+        """Pack values as JSON would encode them"""
+        self.assertEqual(
+            msgpack.unpackb(
+                MessagePackRenderer().render(self.data),
+                raw=False,
+            ),
+            json.loads(
+                FastJSONRenderer().render(self.data)
+            ),
+        )
+
+    def test_production_settings(self):
+        """Keep the renderers in production settings"""
+        with patch.dict(sys.modules):
+            for name in list(sys.modules):
+                if name.startswith("config.settings."):
+                    del sys.modules[name]
+            production = import_module(
+                "config.settings.production"
+            )
+        rest_framework = production.REST_FRAMEWORK
+        self.assertEqual(
+            rest_framework["DEFAULT_RENDERER_CLASSES"][0],
+            "core.renderers.FastJSONRenderer",
+        )
+        self.assertEqual(
+            rest_framework["DEFAULT_PERMISSION_CLASSES"],
+            (
+                "rest_framework.permissions"
+                ".IsAuthenticatedOrReadOnly",
+            ),
+        )
+        if msgpack:
+            self.assertIn(
+                "core.renderers.MessagePackRenderer",
+                rest_framework["DEFAULT_RENDERER_CLASSES"],
+            )
+
+
+class SitemapTests(TransactionTestCase):
+    """Check the sitemap is written, and rewritten, by shard"""
+
+    def setUp(self):
+        """Write the sitemap to a temporary directory"""
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(
+            MEDIA_ROOT=directory.name,
+            SITEMAP_BASE_URL="https://example.com",
+            SITEMAP_SHARD_SIZE=2,
+            SITEMAP_DELAY=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.root = Path(directory.name) / "sitemaps"
+
+    def read(self, section, pk):
+        """Return the shard of section holding pk"""
+        section = SECTIONS[section]
+        path = self.root / shard_name(
+            section, section.shard_of(pk)
+        )
+        return gzip.decompress(path.read_bytes()).decode()
+
+    def test_write(self):
+        """List every page, and serve the index"""
+        startups = StartupFactory.create_batch(3)
+        post = PostFactory()
+        with patch("core.sitemaps.CHUNK_SIZE", 1):
+            written = write_sitemaps()
+        for startup in startups:
+            self.assertIn(
+                "<loc>https://example.com"
+                f"{startup.get_absolute_url()}</loc>",
+                self.read("startup", startup.pk),
+            )
+        self.assertIn(
+            f"{post.get_absolute_url()}</loc>"
+            f"<lastmod>{post.pub_date.isoformat()}</lastmod>",
+            self.read("post", post.pk),
+        )
+        index = (self.root / "sitemap.xml").read_text()
+        self.assertEqual(index.count("<sitemap>"), written)
+        response = self.client.get(
+            "/sitemap.xml", HTTP_ACCEPT_ENCODING="gzip"
+        )
+        self.assertEqual(
+            response["Content-Encoding"], "gzip"
+        )
+        self.assertEqual(
+            gzip.decompress(
+                b"".join(response.streaming_content)
+            ).decode(),
+            index,
+        )
+        response = self.client.get(
+            "/sitemap.xml",
+            HTTP_IF_MODIFIED_SINCE=response[
+                "Last-Modified"
+            ],
+        )
+        self.assertEqual(response.status_code, 304)
+        name = shard_name(
+            SECTIONS["post"],
+            SECTIONS["post"].shard_of(post.pk),
+        )
+        response = self.client.get(f"/{name}")
+        self.assertEqual(
+            response["Content-Type"], "application/gzip"
+        )
+        self.assertFalse(
+            response.has_header("Content-Encoding")
+        )
+        self.assertEqual(
+            b"".join(response.streaming_content),
+            (self.root / name).read_bytes(),
+        )
+
+    def test_rewrite_shard(self):
+        """Rewrite the shard of a changed object, in a job"""
+        startup = StartupFactory()
+        key = "sitemap:startup:{}".format(
+            SECTIONS["startup"].shard_of(startup.pk)
+        )
+        startup.slug = "renamed"
+        startup.save()
+        job = Job.objects.get(key=key)
+        run_job(job)
+        self.assertIn(
+            "/startup/renamed/</loc>",
+            self.read("startup", startup.pk),
+        )
+        name = shard_name(
+            SECTIONS["startup"],
+            SECTIONS["startup"].shard_of(startup.pk),
+        )
+        self.assertIn(
+            f"https://example.com/{name}",
+            (self.root / "sitemap.xml").read_text(),
+        )
@@ -0,0 +1,140 @@
+"""Store the HTML and excerpt of text fields
+
+Templates rendered post.text|linebreaks and
+post.text|truncatewords:20 on every request, and list pages
+loaded whole texts to show twenty words. HTMLField and
+ExcerptField compute both from another field of the model
+whenever a row is saved, including by bulk_create(), so that
+pages read them ready-made, and lists load the excerpt only.
+
+queryset.update() does not compute them: run the
+render_text management command afterwards, or after changing
+how text is rendered. The migrations that add the fields
+render existing rows with render_rows().
+"""
+from django.db.models import Q, TextField
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+from .bulk import bulk_update
+
+
+def render_html(text):
+    """Return text as HTML paragraphs, like |linebreaks"""
+    return linebreaks(text, autoescape=True)
+
+
+def excerpt(text, words=20):
+    """Return the first words of text, like |truncatewords"""
+    return Truncator(text).words(words, truncate=" …")
+
+
+class DerivedTextField(TextField):
+    """A read-only text field computed from another on save"""
+
+    def __init__(self, source, **kwargs):
+        """Compute the value from the field named source"""
+        kwargs.setdefault("blank", True)
+        kwargs.setdefault("default", "")
+        kwargs.setdefault("editable", False)
+        super().__init__(**kwargs)
+        self.source = source
+
+    def deconstruct(self):
+        """Keep source in migrations"""
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["source"] = self.source
+        return name, path, args, kwargs
+
+    def compute(self, text):
+        """Return the value of the field for text"""
+        raise NotImplementedError
+
+    def pre_save(self, model_instance, add):
+        """Compute the value before each save"""
+        value = self.compute(
+            getattr(model_instance, self.source)
+        )
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+class HTMLField(DerivedTextField):
+    """The source field as HTML paragraphs"""
+
+    def compute(self, text):
+        """Render text as HTML"""
+        return render_html(text)
+
+
+class ExcerptField(DerivedTextField):
+    """The first words of the source field, as plain text"""
+
+    def __init__(self, source, words=20, **kwargs):
+        """Keep the first words of source"""
+        super().__init__(source, **kwargs)
+        self.words = words
+
+    def deconstruct(self):
+        """Keep words in migrations"""
+        name, path, args, kwargs = super().deconstruct()
+        if self.words != 20:
+            kwargs["words"] = self.words
+        return name, path, args, kwargs
+
+    def compute(self, text):
+        """Keep the first words of text"""
+        return excerpt(text, self.words)
+
+
+def derived_fields(model):
+    """Return the DerivedTextFields of model"""
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if isinstance(field, DerivedTextField)
+    ]
+
+
+def render_rows(model, everything=False, batch_size=500):
+    """Compute the derived fields of model's rows
+
+    Unless everything is True, only rows with an empty
+    derived field and a non-empty source are computed.
+    Returns the number of rows updated.
+    """
+    fields = derived_fields(model)
+    if not fields:
+        return 0
+    queryset = model._default_manager.order_by("pk")
+    if not everything:
+        missing = Q()
+        for field in fields:
+            missing |= Q(**{field.attname: ""}) & ~Q(
+                **{field.source: ""}
+            )
+        queryset = queryset.filter(missing)
+    sources = sorted({field.source for field in fields})
+    count = 0
+    last = None
+    while True:
+        batch = queryset
+        if last is not None:
+            batch = batch.filter(pk__gt=last)
+        rows = list(
+            batch.values_list("pk", *sources)[:batch_size]
+        )
+        if not rows:
+            return count
+        values = {}
+        for pk, *texts in rows:
+            text = dict(zip(sources, texts))
+            values[pk] = {
+                field.attname: field.compute(
+                    text[field.source]
+                )
+                for field in fields
+            }
+        bulk_update(model, values)
+        count += len(rows)
+        last = rows[-1][0]
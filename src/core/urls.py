@@ -0,0 +1,18 @@
+"""URL Configuration for Core App"""
+from django.contrib import admin
+from django.urls import path
+
+from .views import ProfileDetail, ProfileList
+
+urlpatterns = [
+    path(
+        "profiles/",
+        admin.site.admin_view(ProfileList.as_view()),
+        name="admin_profile_list",
+    ),
+    path(
+        "profiles/<str:url_name>/<str:name>/",
+        admin.site.admin_view(ProfileDetail.as_view()),
+        name="admin_profile_detail",
+    ),
+]
@@ -0,0 +1,159 @@
+"""Version stamps of cached data, shared by all processes
+
+Each process keeps its own copy of some small, hot data
+(such as organizer.catalog's Tags) in a VersionedCache.
+Saving the data bumps its stamp in the same transaction; a
+process whose copy was built at another stamp rebuilds it.
+
+Stamps are random rather than counters: a rolled back bump
+can never be mistaken for a later one.
+"""
+from functools import partial
+from threading import Lock
+from time import monotonic
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Version
+
+_bumps = {}  # name: on_commit callback bumping it
+
+
+def current(name):
+    """Return the stamp of name, or "" if never bumped"""
+    return (
+        Version.objects.filter(name=name)
+        .values_list("stamp", flat=True)
+        .first()
+        or ""
+    )
+
+
+def stamped(name):
+    """Return the stamp of name and when it was bumped
+
+    Returns ("", None) if name was never bumped.
+    """
+    return Version.objects.filter(name=name).values_list(
+        "stamp", "changed"
+    ).first() or ("", None)
+
+
+def bump(name):
+    """Give name a new stamp; return it"""
+    fields = {
+        "stamp": uuid4().hex,
+        "changed": timezone.now(),
+    }
+    if Version.objects.filter(name=name).update(**fields):
+        return fields["stamp"]
+    try:
+        with transaction.atomic():
+            Version.objects.create(name=name, **fields)
+    except IntegrityError:
+        # another transaction created it first
+        Version.objects.filter(name=name).update(**fields)
+    return fields["stamp"]
+
+
+def bump_on_commit(name):
+    """Bump name once the transaction commits, once
+
+    The Version row is then locked only for the bump, rather
+    than until the end of the transaction: writers do not
+    wait on each other for it.
+    """
+    bumping = _bumps.setdefault(name, partial(bump, name))
+    connection = transaction.get_connection()
+    if not any(
+        function is bumping
+        for _savepoints, function in connection.run_on_commit
+    ):
+        transaction.on_commit(bumping)
+
+
+class VersionedCache:
+    """Data kept in each process, rebuilt as its stamp changes
+
+    Subclasses implement build(). get() compares the stamp
+    of the copy with the database's at most every max_age
+    seconds (the setting named max_age_setting). New copies
+    are built whole, then swapped in, so readers never see a
+    partial one.
+    """
+
+    def __init__(self, name, max_age_setting):
+        """Cache the data versioned under name"""
+        self.name = name
+        self.max_age_setting = max_age_setting
+        self._value = None
+        self._stamp = None
+        self._checked = None
+        self._lock = Lock()
+
+    def build(self):
+        """Return a new copy of the data"""
+        raise NotImplementedError
+
+    def get(self):
+        """Return a current copy of the data"""
+        value = self._value
+        checked = self._checked
+        if (
+            value is not None
+            and checked is not None
+            and monotonic() - checked
+            < getattr(settings, self.max_age_setting)
+        ):
+            return value
+        with self._lock:
+            if self._value is not value:
+                # another thread refreshed it meanwhile
+                return self._value
+            # read the stamp first: data changed in between
+            # makes the next check rebuild again, rather than
+            # keep a copy labelled newer than its rows
+            stamp = current(self.name)
+            if self._value is None or self._stamp != stamp:
+                self._value = self.build()
+                self._stamp = stamp
+            self._checked = monotonic()
+            return self._value
+
+    def expire(self):
+        """Check the stamp on the next get() call"""
+        self._checked = None
+
+    def changed(self, update=None):
+        """Record that the data changed, in every process
+
+        update(value), if given, returns the local copy with
+        the change applied. It replaces the copy if the copy
+        was current, saving a rebuild.
+        """
+        before = (
+            None if update is None else current(self.name)
+        )
+        stamp = bump(self.name)
+        with self._lock:
+            if (
+                update is not None
+                and self._value is not None
+                and self._stamp == before
+            ):
+                self._value = update(self._value)
+                self._stamp = stamp
+            else:
+                self._checked = None
+
+    def changed_on_commit(self, update=None):
+        """Call changed() once the transaction commits
+
+        The Version row is then locked only for the bump,
+        rather than until the end of the transaction: writers
+        of the data do not wait on each other for it.
+        """
+        transaction.on_commit(lambda: self.changed(update))
@@ -0,0 +1,185 @@
+"""Views for the Core App"""
+from django.conf import settings
+from django.contrib import admin
+from django.db.models import Q
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views.generic import TemplateView, View
+
+from .keyset import AFTER_VAR, BEFORE_VAR, page_queryset
+from .metrics import publish_pool_stats, registry
+from .profiling import ProfileStore
+
+
+class AdminContextMixin:
+    """Provide the context admin templates expect"""
+
+    title = None
+
+    def get_context_data(self, **kwargs):
+        """Add the admin site's context"""
+        kwargs.setdefault("title", self.title)
+        return super().get_context_data(
+            **admin.site.each_context(self.request),
+            **kwargs,
+        )
+
+
+class KeysetPaginationMixin:
+    """Page a ListView with cursors, not page numbers
+
+    Set keys, the sort of the list as (path, descending)
+    pairs ending with a unique one, and context_object_name.
+    Templates get next_url and previous_url, None on the
+    last and first pages; see core.keyset.
+    """
+
+    keys = None
+    page_size = 50
+
+    def paginate_keyset(self, object_list, after, before):
+        """Return the KeysetPage of object_list"""
+        return page_queryset(
+            object_list,
+            self.keys,
+            self.page_size,
+            after,
+            before,
+        )
+
+    def get_context_data(self, **kwargs):
+        """Show the page after or before the cursor"""
+        try:
+            page = self.paginate_keyset(
+                kwargs.pop("object_list", self.object_list),
+                self.request.GET.get(AFTER_VAR),
+                self.request.GET.get(BEFORE_VAR),
+            )
+        except ValueError:
+            raise Http404("Invalid cursor")
+        return super().get_context_data(
+            object_list=page.object_list,
+            next_url=self.cursor_url(AFTER_VAR, page.next),
+            previous_url=self.cursor_url(
+                BEFORE_VAR, page.previous
+            ),
+            **kwargs,
+        )
+
+    def cursor_url(self, name, cursor):
+        """Return the query string of a page, or None"""
+        if cursor is None:
+            return None
+        query = self.request.GET.copy()
+        query.pop(AFTER_VAR, None)
+        query.pop(BEFORE_VAR, None)
+        query[name] = cursor
+        return f"?{query.urlencode()}"
+
+
+class ProfileList(AdminContextMixin, TemplateView):
+    """List stored request profiles"""
+
+    template_name = "core/profile_list.html"
+    title = "Request profiles"
+
+    def get_context_data(self, **kwargs):
+        """Add the profiles, newest first"""
+        return super().get_context_data(
+            profiles=ProfileStore().profiles(),
+            header=settings.PROFILE_HEADER,
+            **kwargs,
+        )
+
+
+class ProfileDetail(AdminContextMixin, TemplateView):
+    """Display the hottest functions of a profile"""
+
+    template_name = "core/profile_detail.html"
+    sorts = ("tottime", "cumtime")
+
+    def get_context_data(self, **kwargs):
+        """Load the profile's statistics"""
+        store = ProfileStore()
+        path = store.path(
+            self.kwargs["url_name"], self.kwargs["name"]
+        )
+        if path is None:
+            raise Http404("No such profile")
+        sort = self.request.GET.get("sort")
+        if sort not in self.sorts:
+            sort = self.sorts[0]
+        return super().get_context_data(
+            stats=store.hottest(path, sort=sort),
+            sort=sort,
+            title=f"Profile of {self.kwargs['url_name']}",
+            **kwargs,
+        )
+
+
+class MetricsView(View):
+    """Export metrics in Prometheus text format
+
+    Open to staff, to everyone when DEBUG is on, and to
+    scrapers sending "Authorization: Bearer METRICS_TOKEN".
+    """
+
+    content_type = (
+        "text/plain; version=0.0.4; charset=utf-8"
+    )
+
+    def get(self, request, *args, **kwargs):
+        """Render the metrics of all processes"""
+        if not self.allowed(request):
+            raise Http404
+        publish_pool_stats()
+        return HttpResponse(
+            registry.render(),
+            content_type=self.content_type,
+        )
+
+    @staticmethod
+    def allowed(request):
+        """May this client read the metrics?"""
+        if settings.DEBUG or request.user.is_staff:
+            return True
+        token = settings.METRICS_TOKEN
+        return bool(token) and constant_time_compare(
+            request.META.get("HTTP_AUTHORIZATION", ""),
+            f"Bearer {token}",
+        )
+
+
+class AutocompleteView(View):
+    """Suggest objects whose fields start with ?q=
+
+    Subclasses set queryset and, from prefixes(), the
+    lookups to match, such as name__istartswith. Each needs
+    an index that serves it: LIKE 'prefix%' for startswith,
+    UPPER(field) LIKE 'PREFIX%' for istartswith. Responds
+    with {"results": [{"id": pk, "text": str(object)}, ...]}.
+    """
+
+    queryset = None
+    limit = 20
+
+    def prefixes(self, term):
+        """Return {field lookup: prefix} to match"""
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        """Return the first matches for the search term"""
+        term = request.GET.get("q", "").strip()
+        condition = Q()
+        for lookup, prefix in self.prefixes(term).items():
+            if prefix:
+                condition |= Q(**{lookup: prefix})
+        results = []
+        if condition:
+            results = [
+                {"id": obj.pk, "text": str(obj)}
+                for obj in self.queryset.filter(condition)[
+                    : self.limit
+                ]
+            ]
+        return JsonResponse({"results": results})
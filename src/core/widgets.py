@@ -0,0 +1,69 @@
+"""Form widgets shared by the project's apps"""
+from django.core.exceptions import ValidationError
+from django.forms.widgets import SelectMultiple
+from django.urls import reverse
+
+
+class AutocompleteSelectMultiple(SelectMultiple):
+    """Choose objects by searching for them
+
+    Only the selected objects are rendered, with at most one
+    query; core/autocomplete.js fetches others from the
+    AutocompleteView named by url_name as the user types.
+    The form field still checks submitted primary keys with
+    a single IN query.
+    """
+
+    template_name = "core/widgets/autocomplete.html"
+
+    class Media:
+        js = ("core/autocomplete.js",)
+
+    def __init__(self, url_name, attrs=None):
+        """Search with the view named url_name"""
+        super().__init__(attrs)
+        self.url_name = url_name
+
+    def get_context(self, name, value, attrs):
+        """Add the URL of the search view"""
+        context = super().get_context(name, value, attrs)
+        context["widget"]["url"] = reverse(self.url_name)
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        """Build options for the selected objects only"""
+        pk_field = self.choices.queryset.model._meta.pk
+        pks = []
+        for pk in value:
+            try:
+                pks.append(pk_field.to_python(pk))
+            except ValidationError:
+                continue
+        options = [
+            self.create_option(
+                name, pk, label, True, index, attrs=attrs
+            )
+            for index, (pk, label) in enumerate(
+                self.selected_choices(pks) if pks else []
+            )
+        ]
+        return [(None, options, 0)]
+
+    def selected_choices(self, pks):
+        """Return (value, label) of the objects with pks
+
+        Choice iterators with a selected() method, such as
+        organizer.catalog.TagChoiceIterator, answer without a
+        query.
+        """
+        if hasattr(self.choices, "selected"):
+            return self.choices.selected(pks)
+        return [
+            (
+                obj.pk,
+                self.choices.field.label_from_instance(obj),
+            )
+            for obj in self.choices.queryset.filter(
+                pk__in=pks
+            )
+        ]
@@ -0,0 +1,61 @@
+"""Configuration of Jobs Admin panel"""
+from django.contrib import admin, messages
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Configure Job panel"""
+
+    actions = ["retry"]
+    date_hierarchy = "created"
+    list_display = (
+        "task",
+        "status",
+        "priority",
+        "run_at",
+        "attempts",
+        "finished",
+    )
+    list_filter = ("status", "task")
+    search_fields = ("=key",)
+
+    def retry(self, request, queryset):
+        """Queue the selected jobs to run now
+
+        Running jobs are left alone, and so are jobs whose key
+        is queued already, by another job or an earlier one of
+        the selection: one job per key is queued.
+        """
+        queued = skipped = 0
+        for pk in (
+            queryset.exclude(status=Job.RUNNING)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        ):
+            try:
+                with transaction.atomic():
+                    queued += (
+                        Job.objects.filter(pk=pk)
+                        .exclude(status=Job.RUNNING)
+                        .update(
+                            status=Job.QUEUED,
+                            run_at=timezone.now(),
+                            attempts=0,
+                        )
+                    )
+            except IntegrityError:
+                skipped += 1
+        self.message_user(request, f"Queued {queued} jobs.")
+        if skipped:
+            self.message_user(
+                request,
+                f"Skipped {skipped} jobs: a job with the "
+                "same key is queued.",
+                messages.WARNING,
+            )
+
+    retry.short_description = "Run selected jobs again"
@@ -0,0 +1,47 @@
+"""Delete finished background jobs"""
+from datetime import timedelta
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from ...queue import prune_jobs
+
+
+class Command(BaseCommand):
+    """Delete jobs done or failed some days ago
+
+    Run on a schedule: the queue keeps every job otherwise.
+
+    python3 manage.py prune_jobs --max-age 7
+    """
+
+    help = "Delete finished background jobs."
+
+    def add_arguments(self, parser):
+        """Define command-line arguments"""
+        parser.add_argument(
+            "--max-age",
+            type=float,
+            default=7,
+            help="Delete jobs finished this many days ago",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Jobs to delete per query",
+        )
+
+    def handle(self, *args, **options):
+        """Delete the jobs and report"""
+        start = perf_counter()
+        deleted = prune_jobs(
+            timedelta(days=options["max_age"]),
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{deleted} jobs deleted "
+                f"in {perf_counter() - start:.1f}s"
+            )
+        )
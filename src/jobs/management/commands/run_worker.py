@@ -0,0 +1,105 @@
+"""Run background jobs"""
+import signal
+from datetime import timedelta
+from multiprocessing import Process
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from ...queue import TASKS, Worker
+
+
+class Command(BaseCommand):
+    """Claim and run queued jobs until stopped
+
+    Runs --threads worker threads in each of --processes
+    processes. Threads suit tasks that wait on the network or
+    the database; processes suit tasks that compute. Stop
+    with SIGTERM or Ctrl-C: jobs in progress are finished.
+
+    python3 manage.py run_worker --processes 2 --threads 4
+    """
+
+    help = "Run queued background jobs."
+
+    def add_arguments(self, parser):
+        """Define command-line arguments"""
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=4,
+            help="Worker threads per process",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Worker processes",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds between looks for due jobs",
+        )
+        parser.add_argument(
+            "--stale-timeout",
+            type=float,
+            default=60,
+            help="Queue jobs running this many minutes again",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no jobs are due",
+        )
+
+    def handle(self, *args, **options):
+        """Start the workers and wait for them"""
+        self.stdout.write(
+            f"Tasks: {', '.join(sorted(TASKS)) or 'none'}"
+        )
+        worker = Worker(
+            poll_interval=options["poll_interval"],
+            stale_timeout=timedelta(
+                minutes=options["stale_timeout"]
+            ),
+        )
+        arguments = (
+            worker,
+            options["threads"],
+            options["burst"],
+        )
+        if options["processes"] <= 1:
+            run(*arguments)
+            return
+        # children must not share the parent's connections
+        connections.close_all()
+        children = [
+            Process(target=run, args=arguments)
+            for _number in range(options["processes"])
+        ]
+        for child in children:
+            child.start()
+
+        def stop_children(signum, frame):
+            """Pass the signal on to every worker process"""
+            for child in children:
+                child.terminate()
+
+        signal.signal(signal.SIGTERM, stop_children)
+        signal.signal(signal.SIGINT, stop_children)
+        for child in children:
+            child.join()
+
+
+def run(worker, threads, burst):
+    """Run worker threads until a signal stops them
+
+    Jobs in progress are finished before the threads exit.
+    """
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(
+            signum, lambda signum, frame: worker.stop.set()
+        )
+    worker.run(threads, burst)
@@ -0,0 +1,40 @@
+# Generated by Django 2.1.15 on 2026-10-19 18:20
+
+from django.db import migrations
+from django.db.models import Min
+
+
+def fail_duplicates(apps, schema_editor):
+    """Keep the first queued job of each key"""
+    Job = apps.get_model("jobs", "Job")
+    queued = Job.objects.filter(status="queued").exclude(
+        key=""
+    )
+    first = (
+        queued.values("key")
+        .annotate(first=Min("pk"))
+        .values_list("first", flat=True)
+    )
+    queued.exclude(pk__in=list(first)).update(
+        status="failed", error="Duplicate of a queued job"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("jobs", "0001_initial")]
+
+    operations = [
+        migrations.RunPython(
+            fail_duplicates, migrations.RunPython.noop
+        ),
+        # Index(condition=...) needs Django 2.2
+        migrations.RunSQL(
+            [
+                "CREATE UNIQUE INDEX jobs_job_queued_key_uniq "
+                'ON jobs_job ("key") '
+                "WHERE status = 'queued' AND \"key\" <> ''"
+            ],
+            ["DROP INDEX jobs_job_queued_key_uniq"],
+        ),
+    ]
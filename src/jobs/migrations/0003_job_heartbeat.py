@@ -0,0 +1,37 @@
+# Generated by Django 2.1.15 on 2026-10-19 20:05
+
+from django.db import migrations, models
+
+CREATE_QUEUED_KEY_INDEX = (
+    "CREATE UNIQUE INDEX jobs_job_queued_key_uniq "
+    'ON jobs_job ("key") '
+    "WHERE status = 'queued' AND \"key\" <> ''"
+)
+DROP_QUEUED_KEY_INDEX = (
+    "DROP INDEX IF EXISTS jobs_job_queued_key_uniq"
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("jobs", "0002_unique_queued_key")]
+
+    # SQLite copies the table to add or remove a column,
+    # without the index Django does not know of
+    operations = [
+        migrations.RunSQL(
+            [DROP_QUEUED_KEY_INDEX],
+            [CREATE_QUEUED_KEY_INDEX],
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="heartbeat",
+            field=models.DateTimeField(
+                blank=True, null=True
+            ),
+        ),
+        migrations.RunSQL(
+            [CREATE_QUEUED_KEY_INDEX],
+            [DROP_QUEUED_KEY_INDEX],
+        ),
+    ]
@@ -0,0 +1,72 @@
+"""Django data models for background jobs
+
+Django Model Documentation:
+https://docs.djangoproject.com/en/2.1/topics/db/models/
+"""
+import json
+
+from django.db.models import (
+    CharField,
+    DateTimeField,
+    Index,
+    Model,
+    PositiveSmallIntegerField,
+    SmallIntegerField,
+    TextField,
+)
+from django.utils import timezone
+
+
+class Job(Model):
+    """A call of a registered task, run by a worker"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    )
+
+    task = CharField(max_length=255)
+    # keyword arguments of the task, as JSON
+    arguments = TextField(default="{}")
+    # higher priorities run first
+    priority = SmallIntegerField(default=0)
+    run_at = DateTimeField(default=timezone.now)
+    status = CharField(
+        max_length=7, choices=STATUS_CHOICES, default=QUEUED
+    )
+    attempts = PositiveSmallIntegerField(default=0)
+    max_attempts = PositiveSmallIntegerField(default=3)
+    # a queued job with the same key is not enqueued again;
+    # a partial unique index (migration 0002) enforces it
+    key = CharField(max_length=255, blank=True)
+    worker = CharField(max_length=255, blank=True)
+    started = DateTimeField(null=True, blank=True)
+    # updated by the worker while it runs the job
+    heartbeat = DateTimeField(null=True, blank=True)
+    finished = DateTimeField(null=True, blank=True)
+    error = TextField(blank=True)
+    created = DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # claim(): queued jobs by priority, then due
+            Index(
+                fields=["status", "-priority", "run_at"],
+                name="jobs_job_ready_idx",
+            ),
+            Index(fields=["key"], name="jobs_job_key_idx"),
+        ]
+        ordering = ["-created"]
+
+    def __str__(self):
+        return f"{self.task} ({self.status})"
+
+    def get_arguments(self):
+        """Return the keyword arguments of the task"""
+        return json.loads(self.arguments)
@@ -0,0 +1,464 @@
+"""Run tasks in the background, from a queue in the database
+
+Tasks are functions registered with @task, usually in the
+tasks.py module of an app. Enqueue calls with enqueue() (or
+enqueue_on_commit() in signal handlers and views: the job is
+only inserted if the transaction commits, after it commits).
+Workers started by the run_worker management command claim
+due jobs, highest priority first, and run them.
+
+    @task(max_attempts=5, retry_delay=60)
+    def reindex(pk):
+        ...
+
+    reindex.enqueue({"pk": 42}, priority=10)
+
+Failed jobs are retried with exponential back-off until
+max_attempts is reached. While a job runs, its worker
+process updates its heartbeat every minute. Jobs whose
+worker died are queued again once their heartbeat is older
+than the worker's stale timeout, or fail if they have no
+attempts left. prune_jobs() deletes jobs finished long ago.
+
+A unique index allows one queued job per key: a job that
+would be queued again while another with its key is queued
+fails instead, leaving the work to the queued job.
+
+On PostgreSQL, workers claim jobs with SELECT ... FOR UPDATE
+SKIP LOCKED, so they never wait on each other. Databases
+without SKIP LOCKED (SQLite) claim a job by updating its
+status only if it is still queued.
+
+PostgreSQL SKIP LOCKED Documentation:
+https://www.postgresql.org/docs/current/sql-select.html#SQL-FOR-UPDATE-SHARE
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+from functools import partial
+from time import monotonic, sleep
+
+from django.db import (
+    DatabaseError,
+    IntegrityError,
+    close_old_connections,
+    connection,
+    transaction,
+)
+from django.db.models import F, Q
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+OUTCOME_RETRY_DELAYS = [0.1, 0.5, 2]  # seconds
+STALE_CHECK_INTERVAL = 60  # seconds
+HEARTBEAT_INTERVAL = 60  # seconds
+TASKS = {}
+
+
+class Task:
+    """A function that workers may run"""
+
+    def __init__(
+        self, function, name, max_attempts, retry_delay
+    ):
+        """Register function under name"""
+        self.function = function
+        self.name = name
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def __call__(self, **arguments):
+        """Run the task now, in this process"""
+        return self.function(**arguments)
+
+    def enqueue(self, arguments=None, **options):
+        """Insert a job running this task"""
+        return enqueue(self.name, arguments, **options)
+
+    def enqueue_on_commit(self, arguments=None, **options):
+        """Insert a job running this task, on commit"""
+        return enqueue_on_commit(
+            self.name, arguments, **options
+        )
+
+    def retry_at(self, attempts, now):
+        """Return when to retry after attempts failures"""
+        return now + timedelta(
+            seconds=self.retry_delay * 2 ** (attempts - 1)
+        )
+
+
+def task(
+    function=None,
+    *,
+    name=None,
+    max_attempts=3,
+    retry_delay=30,
+):
+    """Register a function as a task
+
+    The name defaults to the module and function name;
+    retry_delay is the seconds before the first retry, and
+    doubles with each attempt.
+    """
+    if function is None:
+        return partial(
+            task,
+            name=name,
+            max_attempts=max_attempts,
+            retry_delay=retry_delay,
+        )
+    registered = Task(
+        function,
+        name
+        or f"{function.__module__}.{function.__name__}",
+        max_attempts,
+        retry_delay,
+    )
+    TASKS[registered.name] = registered
+    return registered
+
+
+def _pk_argument(instance):
+    """Pass the primary key of a saved object to a task"""
+    return {"pk": instance.pk}
+
+
+def enqueue(
+    name,
+    arguments=None,
+    *,
+    priority=0,
+    run_at=None,
+    delay=None,
+    key="",
+):
+    """Insert a job running task name with arguments
+
+    The job runs at run_at, or delay (a timedelta) from now,
+    or as soon as possible. If key is given and a job with
+    the same key is still queued, no job is added and the
+    queued one is returned.
+    """
+    registered = TASKS[name]
+    if run_at is None:
+        run_at = timezone.now() + (delay or timedelta())
+    while True:
+        if key:
+            queued = Job.objects.filter(
+                key=key, status=Job.QUEUED
+            ).first()
+            if queued is not None:
+                return queued
+        try:
+            with transaction.atomic():
+                return Job.objects.create(
+                    task=name,
+                    arguments=json.dumps(arguments or {}),
+                    priority=priority,
+                    run_at=run_at,
+                    max_attempts=registered.max_attempts,
+                    key=key,
+                )
+        except IntegrityError:
+            # another process queued a job with the key
+            if not key:
+                raise
+
+
+def enqueue_on_commit(name, arguments=None, **options):
+    """Enqueue a job once the current transaction commits
+
+    Costs nothing until then, and nothing at all if the
+    transaction is rolled back.
+    """
+    transaction.on_commit(
+        lambda: enqueue(name, arguments, **options)
+    )
+
+
+def enqueue_on_save(
+    model, name, arguments=_pk_argument, **options
+):
+    """Enqueue task name after each save of model
+
+    arguments(instance) returns the arguments of the task.
+    Saves of the same object while its job is queued share
+    the job. Loading fixtures enqueues nothing.
+    """
+    uid = f"{name}:{model._meta.label}"
+
+    def saved(sender, instance, raw=False, **kwargs):
+        """Enqueue the task once the save commits"""
+        if not raw:
+            enqueue_on_commit(
+                name,
+                arguments(instance),
+                key=f"{name}:{instance.pk}",
+                **options,
+            )
+
+    post_save.connect(
+        saved, sender=model, weak=False, dispatch_uid=uid
+    )
+
+
+def claim(worker, now=None):
+    """Mark the next due job as running; return it or None"""
+    now = now or timezone.now()
+    due = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=now
+    ).order_by("-priority", "run_at", "pk")
+    changes = dict(
+        status=Job.RUNNING,
+        worker=worker,
+        started=now,
+        heartbeat=now,
+        attempts=F("attempts") + 1,
+    )
+    if (
+        connection.features.has_select_for_update_skip_locked
+    ):
+        with transaction.atomic():
+            pk = (
+                due.select_for_update(skip_locked=True)
+                .values_list("pk", flat=True)
+                .first()
+            )
+            if pk is None:
+                return None
+            Job.objects.filter(pk=pk).update(**changes)
+        return Job.objects.get(pk=pk)
+    # claim the first job no other worker claimed first; a
+    # failure to read it back undoes the claim
+    for pk in due.values_list("pk", flat=True)[:10]:
+        with transaction.atomic():
+            if Job.objects.filter(
+                pk=pk, status=Job.QUEUED
+            ).update(**changes):
+                return Job.objects.get(pk=pk)
+    return None
+
+
+def run_job(job):
+    """Run a claimed job and record the outcome"""
+    registered = TASKS.get(job.task)
+    try:
+        if registered is None:
+            raise LookupError(f"Unknown task {job.task}")
+        registered(**job.get_arguments())
+    except Exception:
+        now = timezone.now()
+        job.error = traceback.format_exc()
+        if (
+            registered is not None
+            and job.attempts < job.max_attempts
+        ):
+            job.status = Job.QUEUED
+            job.run_at = registered.retry_at(
+                job.attempts, now
+            )
+        else:
+            job.status = Job.FAILED
+            job.finished = now
+        logger.exception(
+            "Job %s (%s) failed", job.pk, job.task
+        )
+    else:
+        job.status = Job.DONE
+        job.finished = timezone.now()
+        job.error = ""
+    fields = ["status", "run_at", "finished", "error"]
+    # the job has run: retry rather than lose the outcome
+    for delay in OUTCOME_RETRY_DELAYS:
+        try:
+            with transaction.atomic():
+                job.save(update_fields=fields)
+            break
+        except IntegrityError:
+            # a job with the same key was queued meanwhile
+            job.status = Job.FAILED
+            job.finished = timezone.now()
+        except DatabaseError:
+            sleep(delay)
+    else:
+        job.save(update_fields=fields)
+    return job
+
+
+def beat(prefix, now=None):
+    """Update the heartbeat of the jobs workers run
+
+    prefix starts the names of the workers, such as those of
+    a process. Returns the number of jobs updated.
+    """
+    return Job.objects.filter(
+        status=Job.RUNNING, worker__startswith=prefix
+    ).update(heartbeat=now or timezone.now())
+
+
+def requeue_stale(timeout):
+    """Queue jobs without a heartbeat for timeout again
+
+    Their worker was killed before recording the outcome.
+    Jobs without attempts left, or whose key is queued
+    again, fail instead. Returns the number of jobs queued.
+    """
+    now = timezone.now()
+    cutoff = now - timeout
+    stale = Job.objects.filter(status=Job.RUNNING).filter(
+        Q(heartbeat__lt=cutoff)
+        | Q(heartbeat__isnull=True, started__lt=cutoff)
+    )
+    failed = dict(
+        status=Job.FAILED,
+        finished=now,
+        error="Abandoned by its worker",
+    )
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        **failed
+    )
+    queued = 0
+    for pk in stale.values_list("pk", flat=True):
+        try:
+            with transaction.atomic():
+                queued += Job.objects.filter(
+                    pk=pk, status=Job.RUNNING
+                ).update(status=Job.QUEUED, run_at=now)
+        except IntegrityError:
+            Job.objects.filter(pk=pk).update(**failed)
+    return queued
+
+
+def prune_jobs(max_age, batch_size=1000):
+    """Delete jobs done or failed more than max_age ago
+
+    Deletes batch_size jobs per query. Returns the number of
+    jobs deleted.
+    """
+    finished = Job.objects.filter(
+        status__in=[Job.DONE, Job.FAILED],
+        finished__lt=timezone.now() - max_age,
+    )
+    deleted = 0
+    while True:
+        pks = list(
+            finished.order_by("pk").values_list(
+                "pk", flat=True
+            )[:batch_size]
+        )
+        if not pks:
+            return deleted
+        deleted += Job.objects.filter(pk__in=pks).delete()[
+            0
+        ]
+
+
+class Worker:
+    """Claim and run jobs until told to stop"""
+
+    def __init__(
+        self, poll_interval=1.0, stale_timeout=None
+    ):
+        """Configure how often to look for due jobs
+
+        Running jobs whose heartbeat is older than
+        stale_timeout (a timedelta, default: 1 hour) are
+        assumed to have been abandoned.
+        """
+        self.poll_interval = poll_interval
+        self.stale_timeout = stale_timeout or timedelta(
+            hours=1
+        )
+        self.stop = threading.Event()
+
+    @staticmethod
+    def process_name():
+        """Identify the current process, ending the name"""
+        return f"{socket.gethostname()}:{os.getpid()}:"
+
+    @classmethod
+    def name(cls):
+        """Identify the current thread in claimed jobs"""
+        return (
+            f"{cls.process_name()}"
+            f"{threading.current_thread().name}"
+        )
+
+    def run_once(self):
+        """Run one due job; return it or None"""
+        close_old_connections()
+        job = claim(self.name())
+        if job is not None:
+            run_job(job)
+        return job
+
+    def loop(self, burst=False):
+        """Run jobs; in burst mode, stop when none are due"""
+        try:
+            while not self.stop.is_set():
+                try:
+                    if self.run_once() is not None:
+                        continue
+                except DatabaseError as error:
+                    # e.g. SQLite locked by another worker
+                    logger.warning(
+                        "Cannot claim: %s", error
+                    )
+                else:
+                    if burst:
+                        break
+                self.stop.wait(self.poll_interval)
+        finally:
+            connection.close()
+
+    def run(self, threads=1, burst=False):
+        """Run jobs in several threads until stopped
+
+        Meanwhile, update the heartbeat of the jobs running,
+        and look for jobs of dead workers, every minute.
+        """
+        requeued = requeue_stale(self.stale_timeout)
+        if requeued:
+            logger.warning("Queued %s stale jobs", requeued)
+        workers = [
+            threading.Thread(
+                target=self.loop,
+                args=(burst,),
+                name=f"worker-{number}",
+            )
+            for number in range(1, threads + 1)
+        ]
+        for thread in workers:
+            thread.start()
+        checked = beaten = monotonic()
+        while any(thread.is_alive() for thread in workers):
+            self.stop.wait(self.poll_interval)
+            if monotonic() - beaten >= HEARTBEAT_INTERVAL:
+                close_old_connections()
+                try:
+                    beat(self.process_name())
+                except DatabaseError as error:
+                    logger.warning(
+                        "Cannot update heartbeats: %s",
+                        error,
+                    )
+                beaten = monotonic()
+            if (
+                monotonic() - checked
+                >= STALE_CHECK_INTERVAL
+            ):
+                close_old_connections()
+                requeue_stale(self.stale_timeout)
+                checked = monotonic()
+        for thread in workers:
+            thread.join()
+        connection.close()
@@ -0,0 +1,298 @@
+"""Tests for the Jobs App"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from organizer.factories import NewsLinkFactory
+
+from .models import Job
+from .queue import (
+    Worker,
+    beat,
+    claim,
+    enqueue,
+    prune_jobs,
+    requeue_stale,
+    run_job,
+    task,
+)
+
+CALLS = []
+
+
+@task(name="jobs.tests.record")
+def record(value):
+    """Remember value"""
+    CALLS.append(value)
+
+
+@task(name="jobs.tests.fail", max_attempts=2)
+def fail():
+    """Raise an error"""
+    raise ValueError("failed")
+
+
+class QueueTests(TestCase):
+    """Check jobs are claimed, run and retried"""
+
+    def setUp(self):
+        """Forget the calls of earlier tests"""
+        CALLS.clear()
+
+    def test_claim_order(self):
+        """Claim due jobs, highest priority first"""
+        low = enqueue("jobs.tests.record", {"value": 1})
+        high = enqueue(
+            "jobs.tests.record", {"value": 2}, priority=5
+        )
+        enqueue(
+            "jobs.tests.record",
+            {"value": 3},
+            priority=9,
+            delay=timedelta(hours=1),
+        )
+        self.assertEqual(claim("test").pk, high.pk)
+        job = claim("test")
+        self.assertEqual(job.pk, low.pk)
+        self.assertEqual(
+            (job.status, job.attempts, job.worker),
+            (Job.RUNNING, 1, "test"),
+        )
+        self.assertIsNone(claim("test"))
+        run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(CALLS, [1])
+
+    def test_retry_then_fail(self):
+        """Retry later, until max_attempts is reached"""
+        job = enqueue("jobs.tests.fail")
+        with self.assertLogs("jobs.queue", "ERROR"):
+            run_job(claim("test"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn("ValueError", job.error)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIsNone(claim("test"))
+        with self.assertLogs("jobs.queue", "ERROR"):
+            run_job(claim("test", now=job.run_at))
+        job.refresh_from_db()
+        self.assertEqual(
+            (job.status, job.attempts), (Job.FAILED, 2)
+        )
+
+    def test_key(self):
+        """Share a queued job between enqueues with a key"""
+        first = enqueue(
+            "jobs.tests.record", {"value": 1}, key="a"
+        )
+        second = enqueue(
+            "jobs.tests.record", {"value": 1}, key="a"
+        )
+        self.assertEqual(first.pk, second.pk)
+        claim("test")
+        third = enqueue(
+            "jobs.tests.record", {"value": 1}, key="a"
+        )
+        self.assertNotEqual(first.pk, third.pk)
+
+    def test_key_unique(self):
+        """Allow one queued job per key"""
+        first = enqueue("jobs.tests.record", key="a")
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Job.objects.create(
+                    task="jobs.tests.record", key="a"
+                )
+        # other statuses and empty keys are not unique
+        Job.objects.create(
+            task="jobs.tests.record",
+            key="a",
+            status=Job.DONE,
+        )
+        enqueue("jobs.tests.record")
+        enqueue("jobs.tests.record")
+        self.assertEqual(
+            enqueue("jobs.tests.record", key="a").pk,
+            first.pk,
+        )
+
+    def test_retry_conflict(self):
+        """Fail rather than retry if the key is queued"""
+        job = enqueue("jobs.tests.fail", key="a")
+        claim("test")
+        queued = enqueue("jobs.tests.fail", key="a")
+        with self.assertLogs("jobs.queue", "ERROR"):
+            run_job(Job.objects.get(pk=job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn("ValueError", job.error)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.QUEUED)
+
+    def test_requeue_stale(self):
+        """Queue abandoned jobs again, if they may retry"""
+        retried = enqueue("jobs.tests.fail")
+        spent = enqueue("jobs.tests.record")
+        spent.max_attempts = 1
+        spent.save()
+        conflict = enqueue("jobs.tests.record", key="a")
+        for _ in range(3):
+            claim("test")
+        enqueue("jobs.tests.record", key="a")
+        Job.objects.update(
+            started=timezone.now() - timedelta(hours=2),
+            heartbeat=timezone.now() - timedelta(hours=2),
+        )
+        self.assertEqual(
+            requeue_stale(timedelta(hours=1)), 1
+        )
+        statuses = {
+            job.pk: job.status
+            for job in Job.objects.filter(
+                pk__in=[retried.pk, spent.pk, conflict.pk]
+            )
+        }
+        self.assertEqual(
+            statuses,
+            {
+                retried.pk: Job.QUEUED,
+                spent.pk: Job.FAILED,
+                conflict.pk: Job.FAILED,
+            },
+        )
+
+    def test_heartbeat(self):
+        """Leave jobs whose worker is alive running"""
+        enqueue("jobs.tests.record")
+        enqueue("jobs.tests.record")
+        alive = claim("host:1:worker-1")
+        dead = claim("host:12:worker-1")
+        Job.objects.update(
+            started=timezone.now() - timedelta(hours=2),
+            heartbeat=timezone.now() - timedelta(hours=2),
+        )
+        self.assertEqual(beat("host:1:"), 1)
+        self.assertEqual(
+            requeue_stale(timedelta(hours=1)), 1
+        )
+        alive.refresh_from_db()
+        dead.refresh_from_db()
+        self.assertEqual(alive.status, Job.RUNNING)
+        self.assertEqual(dead.status, Job.QUEUED)
+
+    def test_prune(self):
+        """Delete jobs finished long ago"""
+        old = timezone.now() - timedelta(days=8)
+        for status in (Job.DONE, Job.FAILED):
+            Job.objects.create(
+                task="jobs.tests.record",
+                status=status,
+                finished=old,
+            )
+        recent = Job.objects.create(
+            task="jobs.tests.record",
+            status=Job.DONE,
+            finished=timezone.now(),
+        )
+        queued = enqueue("jobs.tests.record")
+        self.assertEqual(
+            prune_jobs(timedelta(days=7), batch_size=1), 2
+        )
+        self.assertCountEqual(
+            Job.objects.values_list("pk", flat=True),
+            [recent.pk, queued.pk],
+        )
+
+
+class JobAdminTests(TestCase):
+    """Check jobs are run again from the admin"""
+
+    def setUp(self):
+        """Log in as staff"""
+        self.client.force_login(
+            get_user_model().objects.create_superuser(
+                "admin", "admin@example.com", "s3cr3t!!"
+            )
+        )
+
+    def test_retry(self):
+        """Queue one job per key; report the others"""
+        queued = enqueue("jobs.tests.record", key="a")
+        jobs = [
+            Job.objects.create(
+                task="jobs.tests.record",
+                key=key,
+                status=Job.FAILED,
+            )
+            for key in ("a", "b", "b", "")
+        ]
+        response = self.client.post(
+            reverse("admin:jobs_job_changelist"),
+            {
+                "action": "retry",
+                "_selected_action": [
+                    job.pk for job in jobs
+                ],
+            },
+            follow=True,
+        )
+        self.assertEqual(
+            [
+                str(message)
+                for message in response.context["messages"]
+            ],
+            [
+                "Queued 2 jobs.",
+                "Skipped 2 jobs: a job with the same key "
+                "is queued.",
+            ],
+        )
+        self.assertEqual(
+            list(
+                Job.objects.filter(
+                    status=Job.QUEUED
+                ).values_list("pk", flat=True)
+            ),
+            sorted(
+                [queued.pk, jobs[1].pk, jobs[3].pk],
+                reverse=True,
+            ),
+        )
+
+
+class WorkerTests(TransactionTestCase):
+    """Check workers run jobs and saves enqueue them"""
+
+    def setUp(self):
+        """Forget the calls of earlier tests"""
+        CALLS.clear()
+
+    def test_burst(self):
+        """Run every due job once, in several threads"""
+        for value in range(6):
+            enqueue("jobs.tests.record", {"value": value})
+        Worker(poll_interval=0.01).run(
+            threads=3, burst=True
+        )
+        self.assertEqual(sorted(CALLS), list(range(6)))
+        self.assertEqual(
+            Job.objects.filter(status=Job.DONE).count(), 6
+        )
+
+    def test_save_enqueues(self):
+        """Enqueue one job per saved NewsLink"""
+        newslink = NewsLinkFactory()
+        newslink.save()
+        self.assertEqual(
+            list(
+                Job.objects.filter(
+                    task="organizer.tasks.refresh_newslink"
+                ).values_list("arguments", "status")
+            ),
+            [(f'{{"pk": {newslink.pk}}}', Job.QUEUED)],
+        )
@@ -1,21 +1,48 @@
 """Configuration of Organizer Admin panel"""
 from django.contrib import admin
 
-from .models import NewsLink, Startup, Tag
+from core.changelist import LargeTableAdminMixin
 
-admin.site.register(NewsLink)
+from .dedupe import link_hash
+from .models import NewsFeed, NewsLink, Startup, Tag
+
+admin.site.register(NewsFeed)
+
+
+@admin.register(NewsLink)
+class NewsLinkAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    """Configure NewsLink panel"""
+
+    autocomplete_fields = ("startup",)
+    list_display = ("title", "startup", "pub_date")
+    list_select_related = ("startup",)
+    search_fields = ("title__startswith", "slug__exact")
+
+    def get_search_results(self, request, queryset, term):
+        """Find articles by URL with the link hash index"""
+        if term.strip().startswith(("http://", "https://")):
+            return (
+                queryset.filter(link_hash=link_hash(term)),
+                False,
+            )
+        return super().get_search_results(
+            request, queryset, term
+        )
 
 
 @admin.register(Tag)
-class TagAdmin(admin.ModelAdmin):
+class TagAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """Configure Tag panel"""
 
     list_display = ("name", "slug")
+    search_fields = ("name__startswith", "slug__exact")
 
 
 @admin.register(Startup)
-class StartupAdmin(admin.ModelAdmin):
+class StartupAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """Configure Startup panel"""
 
+    autocomplete_fields = ("tags",)
     list_display = ("name", "slug")
     prepopulated_fields = {"slug": ("name",)}
+    search_fields = ("name__startswith", "slug__exact")
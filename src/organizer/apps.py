@@ -3,3 +3,17 @@ from django.apps import AppConfig
 
 class OrganizerConfig(AppConfig):
     name = "organizer"
+
+    def ready(self):
+        # connect the signals keeping these current
+        from core.changes import track_changes
+
+        from . import (  # noqa: F401
+            catalog,
+            sitemaps,
+            syndication,
+            tag_index,
+        )
+
+        for kind in ("tag", "startup", "newslink"):
+            track_changes(self.get_model(kind), kind)
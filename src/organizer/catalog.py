@@ -0,0 +1,214 @@
+"""Keep every Tag in memory, in each process
+
+Tags are few, rarely change and are shown on almost every
+page. catalog.snapshot() returns an immutable Snapshot of all
+Tags: their primary key, name, slug and the URLs of their
+pages, computed once. Tag lists, form choices and links to
+Tags read the snapshot instead of the database.
+
+Saving or deleting a Tag bumps the "tags" version stamp (see
+core.versions) in the same transaction. Each process
+compares its snapshot's stamp with the database's at most
+every TAG_CATALOG_MAX_AGE seconds, and builds a new snapshot
+when they differ; the process that saved rebuilds at once.
+Snapshots are built whole, then swapped in, so readers never
+see a partial one.
+
+Tag.objects.bulk_create() sends no signals: call
+catalog.changed() after it.
+"""
+from collections import namedtuple
+from types import MappingProxyType
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.forms import ModelMultipleChoiceField
+from django.forms.models import ModelChoiceIterator
+from django.urls import reverse
+from django.utils.functional import cached_property
+
+from core.versions import VersionedCache
+
+from .models import Tag
+
+VERSION = "tags"
+SLUG_MARKER = "SLUG-MARKER"
+
+
+class TagEntry(
+    namedtuple(
+        "TagEntry", ["pk", "name", "slug", "url", "api_url"]
+    )
+):
+    """A Tag, as stored in a Snapshot"""
+
+    __slots__ = ()
+
+    def __str__(self):
+        return self.name
+
+    def get_absolute_url(self):
+        """Return URL to detail page of Tag"""
+        return self.url
+
+
+def _url_formatter(name):
+    """Return a function building URL name from a slug
+
+    Reverses the URL once, instead of once per Tag.
+    """
+    url = reverse(name, kwargs={"slug": SLUG_MARKER})
+    head, _marker, tail = url.partition(SLUG_MARKER)
+    return lambda slug: f"{head}{slug}{tail}"
+
+
+class Snapshot:
+    """All Tags at one version, ordered by name"""
+
+    def __init__(self, rows):
+        """Build entries from (pk, name, slug) rows"""
+        url = _url_formatter("tag_detail")
+        api_url = _url_formatter("api-tag-detail")
+        self.entries = tuple(
+            TagEntry(
+                pk, name, slug, url(slug), api_url(slug)
+            )
+            for pk, name, slug in sorted(
+                rows, key=lambda row: row[1]
+            )
+        )
+        # for core.keyset.page_sequence()
+        self.sort_keys = tuple(
+            (entry.name,) for entry in self.entries
+        )
+        self.by_pk = MappingProxyType(
+            {entry.pk: entry for entry in self.entries}
+        )
+        self.by_slug = MappingProxyType(
+            {entry.slug: entry for entry in self.entries}
+        )
+        self._position = MappingProxyType(
+            {
+                entry.pk: position
+                for position, entry in enumerate(
+                    self.entries
+                )
+            }
+        )
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, pk):
+        """Return the entry of the Tag with pk, or None"""
+        return self.by_pk.get(pk)
+
+    def tags(self, pks):
+        """Return the entries of pks, ordered by name
+
+        Unknown primary keys are left out.
+        """
+        return sorted(
+            (
+                self.by_pk[pk]
+                for pk in set(pks)
+                if pk in self.by_pk
+            ),
+            key=lambda entry: self._position[entry.pk],
+        )
+
+
+class TagCatalog(VersionedCache):
+    """Hand out the current Snapshot, rebuilding as needed"""
+
+    def __init__(self):
+        """Version the snapshot as VERSION"""
+        super().__init__(VERSION, "TAG_CATALOG_MAX_AGE")
+
+    def build(self):
+        """Read every Tag into a new Snapshot"""
+        return Snapshot(
+            Tag.objects.values_list("pk", "name", "slug")
+        )
+
+    def snapshot(self):
+        """Return a current Snapshot of all Tags"""
+        return self.get()
+
+
+catalog = TagCatalog()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(sender, **kwargs):
+    """Bump the stamp with the save or delete"""
+    catalog.changed()
+
+
+def related_tags(instance, field="tags"):
+    """Return the entries of the Tags related to instance
+
+    Reads the primary keys from the join table only; the
+    names and URLs come from the snapshot.
+    """
+    relation = instance._meta.get_field(field)
+    through = relation.remote_field.through
+    pks = list(
+        through.objects.filter(
+            **{relation.m2m_field_name(): instance.pk}
+        ).values_list(
+            f"{relation.m2m_reverse_field_name()}_id",
+            flat=True,
+        )
+    )
+    snapshot = catalog.snapshot()
+    if any(pk not in snapshot.by_pk for pk in pks):
+        # a Tag added by another process since the last check
+        catalog.expire()
+        snapshot = catalog.snapshot()
+    return snapshot.tags(pks)
+
+
+class TagChoiceIterator(ModelChoiceIterator):
+    """Iterate over the choices of a field from the snapshot
+
+    Fields choosing among all Tags only: the queryset of the
+    field is ignored.
+    """
+
+    @cached_property
+    def snapshot(self):
+        """Read one snapshot for the life of the iterator"""
+        return catalog.snapshot()
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for entry in self.snapshot:
+            yield (entry.pk, entry.name)
+
+    def __len__(self):
+        return len(self.snapshot) + (
+            self.field.empty_label is not None
+        )
+
+    def selected(self, pks):
+        """Return (value, label) of the choices in pks"""
+        return [
+            (entry.pk, entry.name)
+            for entry in self.snapshot.tags(pks)
+        ]
+
+
+class TagMultipleChoiceField(ModelMultipleChoiceField):
+    """Choose Tags; list the choices from the snapshot
+
+    Submitted primary keys are still checked against the
+    database, with one query.
+    """
+
+    iterator = TagChoiceIterator
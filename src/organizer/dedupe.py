@@ -0,0 +1,75 @@
+"""Recognize links that point to the same article
+
+The same article is often linked with different URLs: with
+or without "www.", tracking parameters or a fragment, with
+parameters in a different order. normalize_url() reduces
+such variants to one URL, and link_hash() turns it into the
+fixed-length key stored in NewsLink.link_hash.
+
+Parameters such as "ref" or "source" often pick the content
+of the page, so only known tracking parameters are dropped.
+Migrations keep copies of these functions as they were:
+after changing them, add a migration hashing links again.
+"""
+from hashlib import sha1
+from urllib.parse import (
+    parse_qsl,
+    urlencode,
+    urlsplit,
+    urlunsplit,
+)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+TRACKING_PARAMETERS = {
+    "fbclid",
+    "gclid",
+    "mc_cid",
+    "mc_eid",
+}
+
+
+def domain(url):
+    """Return the host of url, without "www." or port"""
+    host = (urlsplit(url.strip()).hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host
+
+
+def normalize_url(url):
+    """Return the canonical form of an article URL
+
+    >>> normalize_url("HTTP://www.Example.com:80/a/?utm_source=x&b=2&a=1#top")
+    'http://example.com/a?a=1&b=2'
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = domain(url)
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+    path = parts.path.rstrip("/")
+    query = urlencode(
+        sorted(
+            (name, value)
+            for name, value in parse_qsl(
+                parts.query, keep_blank_values=True
+            )
+            if not name.startswith("utm_")
+            and name not in TRACKING_PARAMETERS
+        )
+    )
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def link_hash(url):
+    """Return the dedupe key of an article URL
+
+    Sites serve the same page over HTTP and HTTPS, so the
+    scheme is left out.
+    """
+    rest = normalize_url(url).partition("://")[2]
+    return sha1(rest.encode()).hexdigest()
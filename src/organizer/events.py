@@ -0,0 +1,44 @@
+"""Stream new NewsLinks to dashboards; see core.events"""
+from core.events import register_stream
+
+from .catalog import catalog
+from .models import NewsLink, Startup
+
+
+@register_stream("newslink")
+def describe_newslinks(pks):
+    """Return the event data of NewsLinks, by primary key
+
+    NewsLinks have the Tags of their Startup.
+    """
+    newslinks = list(
+        NewsLink.objects.filter(pk__in=pks).select_related(
+            "startup"
+        )
+    )
+    tagged = {}
+    for startup_pk, tag_pk in (
+        Startup.tags.through.objects.filter(
+            startup_id__in={n.startup_id for n in newslinks}
+        )
+        .values_list("startup_id", "tag_id")
+        .iterator()
+    ):
+        tagged.setdefault(startup_pk, []).append(tag_pk)
+    snapshot = catalog.snapshot()
+    return {
+        newslink.pk: {
+            "title": newslink.title,
+            "link": newslink.link,
+            "pub_date": newslink.pub_date,
+            "url": newslink.get_absolute_url(),
+            "startups": [newslink.startup.slug],
+            "tags": [
+                entry.slug
+                for entry in snapshot.tags(
+                    tagged.get(newslink.startup_id, [])
+                )
+            ],
+        }
+        for newslink in newslinks
+    }
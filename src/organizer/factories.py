@@ -0,0 +1,62 @@
+"""Factories to create Organizer data in tests
+
+factory_boy Documentation:
+https://factoryboy.readthedocs.io/en/latest/
+"""
+from factory import (
+    Faker,
+    LazyAttribute,
+    Sequence,
+    SubFactory,
+    post_generation,
+)
+from factory.django import DjangoModelFactory
+
+from .models import NewsLink, Startup, Tag
+
+
+class TagFactory(DjangoModelFactory):
+    """Create Tags with unique names"""
+
+    name = Sequence(lambda n: f"tag {n}")
+
+    class Meta:
+        model = Tag
+
+
+class StartupFactory(DjangoModelFactory):
+    """Create Startups; pass tags=[...] to relate Tags"""
+
+    name = Sequence(lambda n: f"startup {n}")
+    slug = LazyAttribute(
+        lambda startup: startup.name.replace(" ", "-")
+    )
+    description = Faker("paragraph")
+    founded_date = Faker("date_this_decade")
+    contact = Faker("email")
+    website = Faker("url")
+
+    class Meta:
+        model = Startup
+
+    @post_generation
+    def tags(self, create, extracted, **kwargs):
+        """Relate the Tags passed in, if any"""
+        if create and extracted:
+            self.tags.add(*extracted)
+
+
+class NewsLinkFactory(DjangoModelFactory):
+    """Create NewsLinks (and Startups, if not provided)"""
+
+    title = Faker("sentence", nb_words=4)
+    slug = Sequence(lambda n: f"article-{n}")
+    pub_date = Faker("date_this_year")
+    # unique: a Startup links to an article once
+    link = Sequence(
+        lambda n: f"https://news.example.com/article-{n}"
+    )
+    startup = SubFactory(StartupFactory)
+
+    class Meta:
+        model = NewsLink
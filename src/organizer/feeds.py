@@ -0,0 +1,449 @@
+"""Create NewsLinks from the items of RSS and Atom feeds
+
+ingest_feeds() downloads every NewsFeed concurrently (with
+If-None-Match and If-Modified-Since, so unchanged feeds cost
+a 304) and parses each one as it arrives, item by item. An
+item becomes a NewsLink for each Startup it matches:
+
+- its link is on the domain of the Startup's website, or
+- the Startup's whole name, as written (case included),
+  appears in its title or summary: "Monkey Software"
+  matches neither "monkey" nor "Monkey Business".
+
+Items whose link hash (see organizer.dedupe) is already
+linked to the Startup are skipped, so feeds may be ingested
+as often as needed. New NewsLinks are bulk inserted; a batch
+that conflicts with a NewsLink inserted meanwhile, or with
+the slug of another, is inserted row by row, skipping the
+rows in conflict. Inserted NewsLinks are logged in the
+change log (see core.changes), and bump the version of the
+news feeds, as saves would.
+
+RSS 2.0 Specification: https://www.rssboard.org/rss-specification
+Atom Specification: https://tools.ietf.org/html/rfc4287
+"""
+import asyncio
+import re
+from collections import namedtuple
+from datetime import date
+from email.utils import parsedate_to_datetime
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+import aiohttp
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.html import strip_tags
+from django.utils.text import slugify
+
+from core.bulk import batches, bulk_update
+from core.changes import log_created
+from core.versions import bump_on_commit
+
+from .dedupe import domain, link_hash
+from .linkcheck import (
+    USER_AGENT,
+    HostLimiter,
+    PublicConnector,
+)
+from .models import NewsFeed, NewsLink, Startup
+from .syndication import VERSION as NEWS_FEEDS
+
+MAX_FEED_BYTES = 5 * 1024 * 1024
+MAX_NAME_WORDS = 4
+ITEM_TAGS = {"item", "entry"}
+WORD_RE = re.compile(r"\w+")
+
+FeedItem = namedtuple(
+    "FeedItem", ["title", "link", "pub_date", "summary"]
+)
+FeedResult = namedtuple(
+    "FeedResult",
+    ["status", "etag", "last_modified", "items"],
+)
+
+
+def _local_name(tag):
+    """Strip the namespace from an element tag"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _parse_date(text):
+    """Parse RSS (RFC 822) or Atom (RFC 3339) dates"""
+    text = (text or "").strip()
+    if not text:
+        return None
+    try:
+        return parsedate_to_datetime(text).date()
+    except (TypeError, ValueError):
+        pass
+    try:
+        parsed = parse_datetime(text)
+    except ValueError:
+        return None
+    return parsed.date() if parsed else None
+
+
+def _item(element):
+    """Build a FeedItem from an RSS item or Atom entry"""
+    fields = {}
+    link = ""
+    for child in element:
+        name = _local_name(child.tag)
+        if name == "link":
+            # Atom: <link rel="alternate" href="..."/>
+            href = child.get("href")
+            if href is None:
+                link = link or (child.text or "").strip()
+            elif (
+                child.get("rel", "alternate") == "alternate"
+            ):
+                link = href.strip()
+        else:
+            fields.setdefault(name, child.text or "")
+    return FeedItem(
+        title=strip_tags(fields.get("title", "")).strip(),
+        link=link,
+        pub_date=_parse_date(
+            fields.get("pubDate")
+            or fields.get("published")
+            or fields.get("updated")
+        ),
+        summary=strip_tags(
+            fields.get("description")
+            or fields.get("summary")
+            or ""
+        ),
+    )
+
+
+class FeedParser:
+    """Parse a feed incrementally, as chunks arrive
+
+    parser = FeedParser()
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    items.extend(parser.close())
+
+    Elements are discarded once read, so memory use does not
+    grow with the size of the feed.
+    """
+
+    def __init__(self):
+        """Start a new document"""
+        self._parser = XMLPullParser(
+            events=("start", "end")
+        )
+        self._open = []  # elements whose end is not parsed
+
+    def feed(self, data):
+        """Parse data; return the items it completed"""
+        self._parser.feed(data)
+        return self._read_events()
+
+    def close(self):
+        """Finish the document; return the last items"""
+        self._parser.close()
+        return self._read_events()
+
+    def _read_events(self):
+        """Return items whose end tag has been parsed"""
+        items = []
+        for event, element in self._parser.read_events():
+            if event == "start":
+                self._open.append(element)
+                continue
+            self._open.pop()
+            if _local_name(element.tag) in ITEM_TAGS:
+                item = _item(element)
+                if item.link:
+                    items.append(item)
+                if self._open:
+                    self._open[-1].remove(element)
+        return items
+
+
+async def fetch_feed(
+    session, limiter, url, etag="", modified=""
+):
+    """Download and parse one feed; return a FeedResult"""
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if modified:
+        headers["If-Modified-Since"] = modified
+    host = domain(url)
+    async with limiter.slot(host):
+        async with session.get(
+            url, headers=headers
+        ) as response:
+            if response.status != 200:
+                return FeedResult(
+                    response.status, etag, modified, []
+                )
+            parser = FeedParser()
+            items = []
+            size = 0
+            async for chunk in response.content.iter_chunked(
+                64 * 1024
+            ):
+                size += len(chunk)
+                if size > MAX_FEED_BYTES:
+                    raise ValueError(f"{url} is too large")
+                items.extend(parser.feed(chunk))
+            items.extend(parser.close())
+            return FeedResult(
+                response.status,
+                response.headers.get("ETag", "")[:255],
+                response.headers.get("Last-Modified", "")[
+                    :63
+                ],
+                items,
+            )
+
+
+async def fetch_feeds(
+    feeds, concurrency=10, per_host=2, timeout=30.0
+):
+    """Fetch {url: (etag, modified)}; return {url: result}
+
+    A feed that cannot be fetched or parsed, or that is on
+    a private address (see linkcheck.PublicConnector), has a
+    result with status 0 and no items.
+    """
+    limiter = HostLimiter(per_host, interval=0)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with aiohttp.ClientSession(
+        connector=PublicConnector(),
+        headers={"User-Agent": USER_AGENT},
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    ) as session:
+
+        async def fetch(url, etag, modified):
+            """Fetch url, turning failures into status 0"""
+            async with semaphore:
+                try:
+                    return (
+                        url,
+                        await fetch_feed(
+                            session,
+                            limiter,
+                            url,
+                            etag,
+                            modified,
+                        ),
+                    )
+                except (
+                    aiohttp.ClientError,
+                    asyncio.TimeoutError,
+                    ParseError,
+                    ValueError,
+                ):
+                    return (
+                        url,
+                        FeedResult(0, etag, modified, []),
+                    )
+
+        results = await asyncio.gather(
+            *(
+                fetch(url, etag, modified)
+                for url, (etag, modified) in feeds.items()
+            )
+        )
+    return dict(results)
+
+
+class StartupMatcher:
+    """Find the Startups a feed item is about"""
+
+    def __init__(self, startups):
+        """Index (pk, name, website) of Startups"""
+        self.by_name = {}
+        self.by_domain = {}
+        for pk, name, website in startups:
+            words = tuple(WORD_RE.findall(name))
+            if words and len(words) <= MAX_NAME_WORDS:
+                self.by_name.setdefault(words, set()).add(
+                    pk
+                )
+            if website:
+                self.by_domain.setdefault(
+                    domain(website), set()
+                ).add(pk)
+
+    @classmethod
+    def from_database(cls):
+        """Index every Startup"""
+        return cls(
+            Startup.objects.values_list(
+                "pk", "name", "website"
+            ).iterator()
+        )
+
+    def match(self, item):
+        """Return the primary keys of matching Startups"""
+        found = set(
+            self.by_domain.get(domain(item.link), ())
+        )
+        words = WORD_RE.findall(
+            f"{item.title} {item.summary}"
+        )
+        for size in range(1, MAX_NAME_WORDS + 1):
+            for start in range(len(words) - size + 1):
+                found |= self.by_name.get(
+                    tuple(words[start : start + size]),
+                    set(),
+                )
+        return found
+
+
+def _newslink(item, startup_pk, key):
+    """Build an unsaved NewsLink for a feed item"""
+    title = item.title[:63] or domain(item.link)
+    # the hash keeps slugs unique per Startup
+    slug = f"{slugify(title)[:54]}-{key[:8]}".lstrip("-")
+    return NewsLink(
+        title=title,
+        slug=slug,
+        pub_date=item.pub_date or date.today(),
+        link=item.link[:255],
+        link_hash=key,
+        startup_id=startup_pk,
+    )
+
+
+def new_newslinks(items, matcher, batch_size=500):
+    """Return NewsLinks for items not yet linked"""
+    candidates = {}
+    for item in items:
+        key = link_hash(item.link)
+        for startup_pk in matcher.match(item):
+            candidates.setdefault((startup_pk, key), item)
+    existing = set()
+    keys = {key for _startup_pk, key in candidates}
+    for batch in batches(keys, batch_size):
+        existing.update(
+            NewsLink.objects.filter(
+                link_hash__in=batch
+            ).values_list("startup_id", "link_hash")
+        )
+    return [
+        _newslink(item, startup_pk, key)
+        for (startup_pk, key), item in candidates.items()
+        if (startup_pk, key) not in existing
+    ]
+
+
+def _create(newslinks):
+    """Insert and log NewsLinks, setting their primary keys"""
+    NewsLink.objects.bulk_create(newslinks)
+    if any(newslink.pk is None for newslink in newslinks):
+        # only PostgreSQL returns the ids of bulk inserts
+        pks = {
+            (startup_id, hashed): pk
+            for pk, startup_id, hashed in (
+                NewsLink.objects.filter(
+                    link_hash__in={
+                        newslink.link_hash
+                        for newslink in newslinks
+                    }
+                ).values_list("pk", "startup", "link_hash")
+            )
+        }
+        for newslink in newslinks:
+            newslink.pk = pks[
+                newslink.startup_id, newslink.link_hash
+            ]
+    log_created(NewsLink, newslinks)
+
+
+def insert_newslinks(newslinks, batch_size=500):
+    """Insert NewsLinks, skipping conflicts; return them
+
+    Each batch is inserted in a savepoint: if it conflicts,
+    its rows are inserted one by one, in savepoints too, so a
+    conflict only loses its own row.
+    """
+    inserted = []
+    for batch in batches(newslinks, batch_size):
+        try:
+            with transaction.atomic():
+                _create(batch)
+        except IntegrityError:
+            for newslink in batch:
+                try:
+                    with transaction.atomic():
+                        _create([newslink])
+                except IntegrityError:
+                    newslink.pk = None
+                    continue
+                inserted.append(newslink)
+        else:
+            inserted.extend(batch)
+    return inserted
+
+
+def ingest_feeds(
+    feeds=None,
+    matcher=None,
+    batch_size=500,
+    **fetch_options,
+):
+    """Fetch feeds and add NewsLinks for new items
+
+    feeds is a queryset of NewsFeeds (default: all). Options
+    are passed to fetch_feeds(). Returns counts of feeds
+    fetched, unchanged and failed, items read and NewsLinks
+    created.
+    """
+    feeds = list(
+        feeds
+        if feeds is not None
+        else NewsFeed.objects.all()
+    )
+    results = asyncio.run(
+        fetch_feeds(
+            {
+                feed.url: (feed.etag, feed.last_modified)
+                for feed in feeds
+            },
+            **fetch_options,
+        )
+    )
+    items = [
+        item
+        for result in results.values()
+        for item in result.items
+    ]
+    matcher = matcher or StartupMatcher.from_database()
+    newslinks = new_newslinks(items, matcher, batch_size)
+    now = timezone.now()
+    with transaction.atomic():
+        newslinks = insert_newslinks(newslinks, batch_size)
+        if newslinks:
+            bump_on_commit(NEWS_FEEDS)
+        bulk_update(
+            NewsFeed,
+            {
+                feed.pk: {
+                    "etag": results[feed.url].etag,
+                    "last_modified": results[
+                        feed.url
+                    ].last_modified,
+                    "fetched": now,
+                }
+                for feed in feeds
+            },
+        )
+    statuses = [
+        result.status for result in results.values()
+    ]
+    return {
+        "fetched": statuses.count(200),
+        "unchanged": statuses.count(304),
+        "failed": len(statuses)
+        - statuses.count(200)
+        - statuses.count(304),
+        "items": len(items),
+        "created": len(newslinks),
+    }
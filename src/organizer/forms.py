@@ -3,6 +3,10 @@ from django.core.exceptions import ValidationError
 from django.forms import ModelForm
 from django.forms.widgets import HiddenInput
 
+from core.widgets import AutocompleteSelectMultiple
+
+from .catalog import TagMultipleChoiceField
+from .dedupe import link_hash
 from .models import NewsLink, Startup, Tag
 
 
@@ -50,6 +54,12 @@ class StartupForm(
     class Meta:
         model = Startup
         fields = "__all__"
+        field_classes = {"tags": TagMultipleChoiceField}
+        widgets = {
+            "tags": AutocompleteSelectMultiple(
+                "tag_autocomplete"
+            )
+        }
 
 
 class NewsLinkForm(ModelForm):
@@ -68,3 +78,19 @@ class NewsLinkForm(ModelForm):
                 f"Slug may not be '{slug}'."
             )
         return slug
+
+    def clean(self):
+        """Refuse a second link of the Startup to an article"""
+        cleaned_data = super().clean()
+        link = cleaned_data.get("link")
+        startup = cleaned_data.get("startup")
+        if link and startup:
+            duplicates = NewsLink.objects.filter(
+                startup=startup, link_hash=link_hash(link)
+            ).exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise ValidationError(
+                    "The startup already links to this "
+                    "article."
+                )
+        return cleaned_data
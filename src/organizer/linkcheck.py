@@ -0,0 +1,320 @@
+"""Check that NewsLink and Startup URLs still work
+
+check_links() picks the links checked longest ago (or never),
+requests them concurrently with asyncio, and records the
+HTTP status, ETag and time of each check with one UPDATE per
+batch. Run it from the check_links management command, on a
+schedule.
+
+Requests are polite: each host gets a few connections at a
+time and a minimum interval between requests, and links
+with a stored ETag are re-checked with If-None-Match, so an
+unchanged page costs the remote server a 304.
+
+Links are entered by users, so requests only go to public
+addresses: a link to a loopback, private or link-local
+address (the database, a cloud metadata service) is refused,
+as is a redirect to one. See PublicConnector.
+
+aiohttp Client Documentation:
+https://docs.aiohttp.org/en/stable/client_reference.html
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from ipaddress import ip_address, ip_network
+from time import monotonic
+from urllib.parse import urlsplit
+
+import aiohttp
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.bulk import bulk_update
+
+from .models import NewsLink, Startup
+
+NO_RESPONSE = 0  # status recorded for errors and timeouts
+NOT_MODIFIED = 304
+USER_AGENT = "StartupOrganizerLinkChecker/1.0"
+
+# name: (model, URL field); status, etag and checked fields
+# are named after the URL field
+TARGETS = {
+    "newslink": (NewsLink, "link"),
+    "startup": (Startup, "website"),
+}
+
+
+def is_broken(status):
+    """Return True if a recorded status means a dead link"""
+    return status is not None and (
+        status == NO_RESPONSE or status >= 400
+    )
+
+
+def is_public(address, allowed_networks=()):
+    """May requests go to the IP address given as a string?
+
+    Loopback, private, link-local, multicast and reserved
+    addresses may not, unless in one of allowed_networks.
+    """
+    try:
+        address = ip_address(address)
+    except ValueError:  # e.g. IPv6 with a scope
+        return False
+    if any(
+        address in network for network in allowed_networks
+    ):
+        return True
+    return address.is_global and not address.is_multicast
+
+
+class PublicConnector(aiohttp.TCPConnector):
+    """Connect to public addresses only, even after redirects
+
+    Hosts are resolved once per connection, here, and only
+    the public addresses found are connected to: a host cannot
+    resolve to a public address for the check, then to a
+    private one for the connection. Networks listed in
+    OUTBOUND_ALLOWED_NETWORKS are allowed too.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Read the networks allowed despite being private"""
+        super().__init__(*args, **kwargs)
+        self.allowed_networks = [
+            ip_network(network)
+            for network in settings.OUTBOUND_ALLOWED_NETWORKS
+        ]
+
+    async def _resolve_host(self, host, port, traces=None):
+        """Resolve host, keeping public addresses only
+
+        aiohttp resolves the host of every connection here,
+        for redirects too; IP addresses are returned as is.
+        """
+        hosts = await super()._resolve_host(
+            host, port, traces=traces
+        )
+        public = [
+            info
+            for info in hosts
+            if is_public(
+                info["host"], self.allowed_networks
+            )
+        ]
+        if not public:
+            # aiohttp raises it as a ClientConnectorError
+            raise OSError(f"No public address for {host}")
+        return public
+
+
+class HostLimiter:
+    """Limit connections and request rate per host"""
+
+    def __init__(self, concurrency=2, interval=0.5):
+        """Allow concurrency requests, interval s apart"""
+        self.concurrency = concurrency
+        self.interval = interval
+        self._next_start = {}
+        self._semaphores = {}
+
+    def reset(self):
+        """Forget semaphores bound to a finished event loop"""
+        self._semaphores = {}
+
+    @asynccontextmanager
+    async def slot(self, host):
+        """Wait until a request to host is allowed"""
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[
+                host
+            ] = asyncio.Semaphore(self.concurrency)
+        async with semaphore:
+            now = monotonic()
+            start = max(
+                now, self._next_start.get(host, now)
+            )
+            self._next_start[host] = start + self.interval
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+class LinkChecker:
+    """Request many URLs concurrently, politely"""
+
+    def __init__(
+        self,
+        concurrency=50,
+        per_host=2,
+        host_interval=0.5,
+        timeout=10.0,
+    ):
+        """Configure limits; timeout is per URL, in seconds"""
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.limiter = HostLimiter(per_host, host_interval)
+
+    def run(self, urls):
+        """Check {url: etag}; return {url: (status, etag)}"""
+        return asyncio.run(self.check_all(urls))
+
+    async def check_all(self, urls):
+        """Check {url: etag} concurrently"""
+        self.limiter.reset()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        async with aiohttp.ClientSession(
+            connector=PublicConnector(),
+            headers={"User-Agent": USER_AGENT},
+            timeout=aiohttp.ClientTimeout(
+                total=self.timeout
+            ),
+        ) as session:
+
+            async def check(url, etag):
+                """Check url once the limits allow"""
+                host = urlsplit(url).hostname or ""
+                # wait for the host before taking one of the
+                # global slots, so slow hosts do not hog them
+                async with self.limiter.slot(host):
+                    async with semaphore:
+                        return (
+                            url,
+                            await self.check(
+                                session, url, etag
+                            ),
+                        )
+
+            results = await asyncio.gather(
+                *(
+                    check(url, etag)
+                    for url, etag in urls.items()
+                )
+            )
+        return dict(results)
+
+    async def check(self, session, url, etag=""):
+        """Return the status and ETag of url"""
+        headers = {"If-None-Match": etag} if etag else {}
+        try:
+            status, new_etag = await self._request(
+                session, "HEAD", url, headers
+            )
+            if status in (405, 501):  # HEAD not supported
+                status, new_etag = await self._request(
+                    session, "GET", url, headers
+                )
+        except (
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+            ValueError,
+        ):
+            return NO_RESPONSE, etag
+        if status == NOT_MODIFIED:
+            return status, new_etag or etag
+        return status, new_etag
+
+    @staticmethod
+    async def _request(session, method, url, headers):
+        """Send one request, following redirects"""
+        async with session.request(
+            method,
+            url,
+            headers=headers,
+            allow_redirects=True,
+            max_redirects=5,
+        ) as response:
+            return (
+                response.status,
+                response.headers.get("ETag", "")[:255],
+            )
+
+
+def check_links(
+    targets=None,
+    max_age=None,
+    batch_size=500,
+    limit=None,
+    checker=None,
+    pks=None,
+):
+    """Check links not checked within max_age
+
+    targets are keys of TARGETS (default: all); max_age is a
+    timedelta (default: 7 days). If pks is given, only rows
+    with those primary keys are checked, however recently.
+    Returns, for each target, the number of links checked
+    and how many are broken.
+    """
+    max_age = max_age or timedelta(days=7)
+    checker = checker or LinkChecker()
+    return {
+        name: _check_target(
+            *TARGETS[name],
+            checker,
+            max_age,
+            batch_size,
+            limit,
+            pks,
+        )
+        for name in targets or TARGETS
+    }
+
+
+def _check_target(
+    model, field, checker, max_age, batch_size, limit, pks
+):
+    """Check the stale links of one model, in batches"""
+    status_field = f"{field}_status"
+    etag_field = f"{field}_etag"
+    checked_field = f"{field}_checked"
+    # links given by pk are checked whenever they were last
+    cutoff = timezone.now() - (
+        max_age if pks is None else timedelta()
+    )
+    stale = model.objects.filter(
+        Q(**{f"{checked_field}__isnull": True})
+        | Q(**{f"{checked_field}__lt": cutoff})
+    )
+    if pks is not None:
+        stale = stale.filter(pk__in=pks)
+    stale = stale.order_by(
+        F(checked_field).asc(nulls_first=True), "pk"
+    )
+    counts = {"checked": 0, "broken": 0}
+    while limit is None or counts["checked"] < limit:
+        size = (
+            batch_size
+            if limit is None
+            else min(batch_size, limit - counts["checked"])
+        )
+        rows = list(
+            stale.values_list(
+                "pk", field, etag_field, status_field
+            )[:size]
+        )
+        if not rows:
+            break
+        # rows sharing a URL are checked once
+        results = checker.run(
+            {url: etag for _pk, url, etag, _status in rows}
+        )
+        now = timezone.now()
+        values = {}
+        for pk, url, _etag, old_status in rows:
+            status, etag = results[url]
+            if status == NOT_MODIFIED:
+                status = old_status or 200
+            values[pk] = {
+                status_field: status,
+                etag_field: etag,
+                checked_field: now,
+            }
+            counts["broken"] += is_broken(status)
+        bulk_update(model, values)
+        counts["checked"] += len(rows)
+    return counts
@@ -0,0 +1,96 @@
+"""Check NewsLink and Startup URLs"""
+from datetime import timedelta
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from ...linkcheck import TARGETS, LinkChecker, check_links
+
+
+class Command(BaseCommand):
+    """Record whether links still work
+
+    Run on a schedule; each run checks the links checked
+    longest ago, or never.
+
+    python3 manage.py check_links --max-age 7 --limit 50000
+    """
+
+    help = "Check NewsLink and Startup URLs concurrently."
+
+    def add_arguments(self, parser):
+        """Define command-line arguments"""
+        parser.add_argument(
+            "--only",
+            action="append",
+            choices=sorted(TARGETS),
+            dest="targets",
+            help="Check only these links (repeatable)",
+        )
+        parser.add_argument(
+            "--max-age",
+            type=float,
+            default=7,
+            help="Re-check links checked this many days ago",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            help="Most links of each kind to check",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Links to check between database writes",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Most requests in flight",
+        )
+        parser.add_argument(
+            "--per-host",
+            type=int,
+            default=2,
+            help="Most requests in flight to one host",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0.5,
+            help="Seconds between requests to one host",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=10.0,
+            help="Seconds to wait for each link",
+        )
+
+    def handle(self, *args, **options):
+        """Check stale links and report"""
+        start = perf_counter()
+        counts = check_links(
+            targets=options["targets"],
+            max_age=timedelta(days=options["max_age"]),
+            batch_size=options["batch_size"],
+            limit=options["limit"],
+            checker=LinkChecker(
+                concurrency=options["concurrency"],
+                per_host=options["per_host"],
+                host_interval=options["interval"],
+                timeout=options["timeout"],
+            ),
+        )
+        for name, count in counts.items():
+            self.stdout.write(
+                f"{name}: {count['checked']} checked, "
+                f"{count['broken']} broken"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done in {perf_counter() - start:.1f}s"
+            )
+        )
@@ -0,0 +1,74 @@
+"""Store Open Graph previews of NewsLinks"""
+from datetime import timedelta
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from ...previews import fetch_previews
+
+
+class Command(BaseCommand):
+    """Fetch previews missing or older than --max-age
+
+    Run on a schedule; each run refreshes the previews
+    fetched longest ago, or never.
+
+    python3 manage.py fetch_previews --max-age 30 --limit 5000
+    """
+
+    help = "Fetch Open Graph previews of NewsLinks."
+
+    def add_arguments(self, parser):
+        """Define command-line arguments"""
+        parser.add_argument(
+            "--max-age",
+            type=float,
+            default=30,
+            help="Refresh previews fetched this many days ago",
+        )
+        parser.add_argument(
+            "--limit", type=int, help="Most links to fetch"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Links to fetch between database writes",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=20,
+            help="Most requests in flight",
+        )
+        parser.add_argument(
+            "--per-host",
+            type=int,
+            default=2,
+            help="Most requests in flight to one host",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=10.0,
+            help="Seconds to wait for each link",
+        )
+
+    def handle(self, *args, **options):
+        """Fetch stale previews and report"""
+        start = perf_counter()
+        counts = fetch_previews(
+            max_age=timedelta(days=options["max_age"]),
+            batch_size=options["batch_size"],
+            limit=options["limit"],
+            concurrency=options["concurrency"],
+            per_host=options["per_host"],
+            timeout=options["timeout"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{counts['fetched']} links fetched, "
+                f"{counts['previewed']} with previews, "
+                f"in {perf_counter() - start:.1f}s"
+            )
+        )
@@ -0,0 +1,69 @@
+"""Create NewsLinks from RSS and Atom feeds"""
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from ...feeds import ingest_feeds
+from ...models import NewsFeed
+
+
+class Command(BaseCommand):
+    """Fetch every NewsFeed and link new items to Startups
+
+    Feeds are added in the admin, or with --add.
+
+    python3 manage.py ingest_feeds --add https://example.com/rss
+    """
+
+    help = "Fetch news feeds and create NewsLinks."
+
+    def add_arguments(self, parser):
+        """Define command-line arguments"""
+        parser.add_argument(
+            "--add",
+            action="append",
+            default=[],
+            metavar="URL",
+            help="Register a feed before fetching",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=10,
+            help="Most feeds downloaded at once",
+        )
+        parser.add_argument(
+            "--per-host",
+            type=int,
+            default=2,
+            help="Most feeds downloaded at once from one host",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=30.0,
+            help="Seconds to wait for each feed",
+        )
+
+    def handle(self, *args, **options):
+        """Ingest the feeds and report"""
+        start = perf_counter()
+        for url in options["add"]:
+            NewsFeed.objects.get_or_create(url=url)
+        counts = ingest_feeds(
+            concurrency=options["concurrency"],
+            per_host=options["per_host"],
+            timeout=options["timeout"],
+        )
+        self.stdout.write(
+            f"{counts['fetched']} feeds fetched, "
+            f"{counts['unchanged']} unchanged, "
+            f"{counts['failed']} failed; "
+            f"{counts['items']} items read"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {counts['created']} NewsLinks "
+                f"in {perf_counter() - start:.1f}s"
+            )
+        )
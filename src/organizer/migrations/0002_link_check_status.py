@@ -0,0 +1,53 @@
+# Generated by Django 2.1.15 on 2026-10-19 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("organizer", "0001_initial")]
+
+    operations = [
+        migrations.AddField(
+            model_name="newslink",
+            name="link_checked",
+            field=models.DateTimeField(
+                db_index=True, editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="newslink",
+            name="link_etag",
+            field=models.CharField(
+                blank=True, editable=False, max_length=255
+            ),
+        ),
+        migrations.AddField(
+            model_name="newslink",
+            name="link_status",
+            field=models.PositiveSmallIntegerField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="startup",
+            name="website_checked",
+            field=models.DateTimeField(
+                db_index=True, editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="startup",
+            name="website_etag",
+            field=models.CharField(
+                blank=True, editable=False, max_length=255
+            ),
+        ),
+        migrations.AddField(
+            model_name="startup",
+            name="website_status",
+            field=models.PositiveSmallIntegerField(
+                editable=False, null=True
+            ),
+        ),
+    ]
@@ -0,0 +1,131 @@
+# Generated by Django 2.1.15 on 2026-10-19 14:47
+
+from hashlib import sha1
+from urllib.parse import (
+    parse_qsl,
+    urlencode,
+    urlsplit,
+    urlunsplit,
+)
+
+from django.db import migrations, models
+
+from core.bulk import bulk_update
+
+# organizer.dedupe, frozen: existing links are hashed as
+# they were when this migration was written
+DEFAULT_PORTS = {"http": 80, "https": 443}
+TRACKING_PARAMETERS = {
+    "fbclid",
+    "gclid",
+    "mc_cid",
+    "mc_eid",
+}
+
+
+def link_hash(url):
+    """Return the dedupe key of an article URL"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if netloc.startswith("www."):
+        netloc = netloc[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+    query = urlencode(
+        sorted(
+            (name, value)
+            for name, value in parse_qsl(
+                parts.query, keep_blank_values=True
+            )
+            if not name.startswith("utm_")
+            and name not in TRACKING_PARAMETERS
+        )
+    )
+    normalized = urlunsplit(
+        (scheme, netloc, parts.path.rstrip("/"), query, "")
+    )
+    rest = normalized.partition("://")[2]
+    return sha1(rest.encode()).hexdigest()
+
+
+def hash_links(apps, schema_editor):
+    """Compute the dedupe key of existing NewsLinks"""
+    NewsLink = apps.get_model("organizer", "NewsLink")
+    links = NewsLink.objects.values_list("pk", "link")
+    bulk_update(
+        NewsLink,
+        {
+            pk: {"link_hash": link_hash(link)}
+            for pk, link in links.iterator()
+        },
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("organizer", "0002_link_check_status")]
+
+    operations = [
+        migrations.CreateModel(
+            name="NewsFeed",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "url",
+                    models.URLField(
+                        max_length=255, unique=True
+                    ),
+                ),
+                (
+                    "etag",
+                    models.CharField(
+                        blank=True,
+                        editable=False,
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "last_modified",
+                    models.CharField(
+                        blank=True,
+                        editable=False,
+                        max_length=63,
+                    ),
+                ),
+                (
+                    "fetched",
+                    models.DateTimeField(
+                        editable=False, null=True
+                    ),
+                ),
+            ],
+            options={"ordering": ["url"]},
+        ),
+        migrations.AddField(
+            model_name="newslink",
+            name="link_hash",
+            field=models.CharField(
+                db_index=True,
+                default="",
+                editable=False,
+                max_length=40,
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(
+            hash_links, migrations.RunPython.noop
+        ),
+    ]
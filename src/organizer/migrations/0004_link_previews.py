@@ -0,0 +1,48 @@
+# Generated by Django 2.1.15 on 2026-10-19 14:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("organizer", "0003_news_feeds")]
+
+    operations = [
+        migrations.AddField(
+            model_name="newslink",
+            name="preview_description",
+            field=models.TextField(
+                blank=True, default="", editable=False
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="newslink",
+            name="preview_fetched",
+            field=models.DateTimeField(
+                db_index=True, editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="newslink",
+            name="preview_image",
+            field=models.URLField(
+                blank=True,
+                default="",
+                editable=False,
+                max_length=500,
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="newslink",
+            name="preview_title",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                max_length=255,
+            ),
+            preserve_default=False,
+        ),
+    ]
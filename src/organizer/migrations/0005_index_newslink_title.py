@@ -0,0 +1,18 @@
+# Generated by Django 2.1.15 on 2026-10-19 14:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("organizer", "0004_link_previews")]
+
+    operations = [
+        migrations.AlterField(
+            model_name="newslink",
+            name="title",
+            field=models.CharField(
+                db_index=True, max_length=63
+            ),
+        )
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.1.15 on 2026-10-19 15:09
+
+from django.db import migrations
+
+import core.slugs
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("organizer", "0005_index_newslink_title")
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="tag",
+            name="slug",
+            field=core.slugs.BatchAutoSlugField(
+                blank=True,
+                editable=False,
+                help_text="A label for URL config.",
+                max_length=31,
+                populate_from=["name"],
+            ),
+        )
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.1.15 on 2026-10-19 15:10
+
+from django.db import migrations
+
+import core.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("organizer", "0006_batch_tag_slugs")]
+
+    operations = [
+        migrations.AddField(
+            model_name="startup",
+            name="description_html",
+            field=core.text.HTMLField(
+                blank=True,
+                default="",
+                editable=False,
+                source="description",
+            ),
+        ),
+        migrations.AddField(
+            model_name="startup",
+            name="excerpt",
+            field=core.text.ExcerptField(
+                blank=True,
+                default="",
+                editable=False,
+                source="description",
+            ),
+        ),
+    ]
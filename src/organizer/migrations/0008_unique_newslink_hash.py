@@ -0,0 +1,60 @@
+# Generated by Django 2.1.15 on 2026-10-19 18:02
+
+import logging
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+logger = logging.getLogger("organizer.migrations")
+
+
+def delete_duplicates(apps, schema_editor):
+    """Keep the first NewsLink of a Startup to an article
+
+    Each NewsLink deleted is logged, with its link, as it
+    cannot be restored.
+    """
+    NewsLink = apps.get_model("organizer", "NewsLink")
+    duplicated = (
+        NewsLink.objects.values("startup", "link_hash")
+        .annotate(count=Count("pk"), first=Min("pk"))
+        .filter(count__gt=1)
+    )
+    for group in list(duplicated):
+        duplicates = NewsLink.objects.filter(
+            startup=group["startup"],
+            link_hash=group["link_hash"],
+        ).exclude(pk=group["first"])
+        for pk, title, link in duplicates.values_list(
+            "pk", "title", "link"
+        ):
+            logger.warning(
+                "Deleting NewsLink %s (%r, %s) of Startup "
+                "%s, a duplicate of NewsLink %s",
+                pk,
+                title,
+                link,
+                group["startup"],
+                group["first"],
+            )
+        duplicates.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("organizer", "0007_startup_rendered_text")
+    ]
+
+    operations = [
+        migrations.RunPython(
+            delete_duplicates, migrations.RunPython.noop
+        ),
+        migrations.AlterUniqueTogether(
+            name="newslink",
+            unique_together={
+                ("slug", "startup"),
+                ("startup", "link_hash"),
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.1.15 on 2026-10-19 19:40
+
+from django.db import migrations
+
+from core.text import render_rows
+
+
+def render_startups(apps, schema_editor):
+    """Fill the HTML and excerpts of existing startups"""
+    render_rows(apps.get_model("organizer", "Startup"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("organizer", "0008_unique_newslink_hash")
+    ]
+
+    operations = [
+        migrations.RunPython(
+            render_startups, migrations.RunPython.noop
+        )
+    ]
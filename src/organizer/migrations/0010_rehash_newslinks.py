@@ -0,0 +1,83 @@
+# Generated by Django 2.1.15 on 2026-10-19 20:30
+
+from hashlib import sha1
+from urllib.parse import (
+    parse_qsl,
+    urlencode,
+    urlsplit,
+    urlunsplit,
+)
+
+from django.db import migrations
+
+from core.bulk import bulk_update
+
+# organizer.dedupe, frozen, once "ref" and "source" were
+# kept
+DEFAULT_PORTS = {"http": 80, "https": 443}
+TRACKING_PARAMETERS = {
+    "fbclid",
+    "gclid",
+    "mc_cid",
+    "mc_eid",
+}
+
+
+def link_hash(url):
+    """Return the dedupe key of an article URL"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if netloc.startswith("www."):
+        netloc = netloc[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+    query = urlencode(
+        sorted(
+            (name, value)
+            for name, value in parse_qsl(
+                parts.query, keep_blank_values=True
+            )
+            if not name.startswith("utm_")
+            and name not in TRACKING_PARAMETERS
+        )
+    )
+    normalized = urlunsplit(
+        (scheme, netloc, parts.path.rstrip("/"), query, "")
+    )
+    rest = normalized.partition("://")[2]
+    return sha1(rest.encode()).hexdigest()
+
+
+def hash_links_again(apps, schema_editor):
+    """Hash links again, keeping "ref" and "source"
+
+    Hashes only split, so the NewsLinks of a Startup keep
+    distinct hashes.
+    """
+    NewsLink = apps.get_model("organizer", "NewsLink")
+    changed = {}
+    for pk, link, old in NewsLink.objects.values_list(
+        "pk", "link", "link_hash"
+    ).iterator():
+        hashed = link_hash(link)
+        if hashed != old:
+            changed[pk] = {"link_hash": hashed}
+    bulk_update(NewsLink, changed)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("organizer", "0009_render_startup_text")
+    ]
+
+    operations = [
+        migrations.RunPython(
+            hash_links_again, migrations.RunPython.noop
+        )
+    ]
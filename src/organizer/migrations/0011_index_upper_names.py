@@ -0,0 +1,42 @@
+# Generated by Django 2.1.15 on 2026-10-19 21:10
+
+from django.db import migrations
+
+# the expression PostgreSQL matches for name__istartswith
+INDEXES = {
+    "organizer_tag_name_upper_like": "organizer_tag",
+    "organizer_startup_name_upper_like": "organizer_startup",
+}
+
+
+def create_indexes(apps, schema_editor):
+    """Serve UPPER(name) LIKE 'PREFIX%' from an index
+
+    SQLite's LIKE ignores case already, and uses no index.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for index, table in INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX {index} ON {table} "
+            '(UPPER("name"::text) text_pattern_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    """Drop the indexes of create_indexes"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for index in INDEXES:
+        schema_editor.execute(
+            f"DROP INDEX IF EXISTS {index}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("organizer", "0010_rehash_newslinks")]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes)
+    ]
@@ -23,23 +23,29 @@ from django.db.models import (
     CASCADE,
     CharField,
     DateField,
+    DateTimeField,
     EmailField,
     ForeignKey,
     ManyToManyField,
     Model,
+    PositiveSmallIntegerField,
     SlugField,
     TextField,
     URLField,
 )
 from django.urls import reverse
-from django_extensions.db.fields import AutoSlugField
+
+from core.slugs import BatchAutoSlugField
+from core.text import ExcerptField, HTMLField
+
+from .dedupe import link_hash
 
 
 class Tag(Model):
     """Labels to help categorize data"""
 
     name = CharField(max_length=31, unique=True)
-    slug = AutoSlugField(
+    slug = BatchAutoSlugField(
         help_text="A label for URL config.",
         max_length=31,
         populate_from=["name"],
@@ -80,12 +86,24 @@ class Startup(Model):
         help_text="A label for URL config.",
     )
     description = TextField()
+    description_html = HTMLField("description")
+    excerpt = ExcerptField("description")
     founded_date = DateField("date founded")
     contact = EmailField()
     website = URLField(
         max_length=255  # https://tools.ietf.org/html/rfc3986
     )
     tags = ManyToManyField(Tag)
+    # recorded by organizer.linkcheck
+    website_status = PositiveSmallIntegerField(
+        null=True, editable=False
+    )
+    website_etag = CharField(
+        max_length=255, blank=True, editable=False
+    )
+    website_checked = DateTimeField(
+        null=True, editable=False, db_index=True
+    )
 
     class Meta:
         get_latest_by = "founded_date"
@@ -123,23 +141,58 @@ class Startup(Model):
 class NewsLink(Model):
     """Link to external sources about a Startup"""
 
-    title = CharField(max_length=63)
+    title = CharField(max_length=63, db_index=True)
     slug = SlugField(max_length=63)
     pub_date = DateField("date published")
     link = URLField(
         max_length=255  # https://tools.ietf.org/html/rfc3986
     )
     startup = ForeignKey(Startup, on_delete=CASCADE)
+    # recorded by organizer.linkcheck
+    link_status = PositiveSmallIntegerField(
+        null=True, editable=False
+    )
+    link_etag = CharField(
+        max_length=255, blank=True, editable=False
+    )
+    link_checked = DateTimeField(
+        null=True, editable=False, db_index=True
+    )
+    # finds other NewsLinks to the same article; see dedupe
+    link_hash = CharField(
+        max_length=40, db_index=True, editable=False
+    )
+    # Open Graph metadata, stored by organizer.previews
+    preview_title = CharField(
+        max_length=255, blank=True, editable=False
+    )
+    preview_description = TextField(
+        blank=True, editable=False
+    )
+    preview_image = URLField(
+        max_length=500, blank=True, editable=False
+    )
+    preview_fetched = DateTimeField(
+        null=True, editable=False, db_index=True
+    )
 
     class Meta:
         get_latest_by = "pub_date"
         ordering = ["-pub_date"]
-        unique_together = ("slug", "startup")
+        unique_together = (
+            ("slug", "startup"),
+            ("startup", "link_hash"),
+        )
         verbose_name = "news article"
 
     def __str__(self):
         return f"{self.startup}: {self.title}"
 
+    def save(self, *args, **kwargs):
+        """Compute the dedupe key of the link"""
+        self.link_hash = link_hash(self.link)
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         """Return URL to detail page of Startup"""
         return reverse(
@@ -166,3 +219,23 @@ class NewsLink(Model):
                 "newslink_slug": self.slug,
             },
         )
+
+
+class NewsFeed(Model):
+    """RSS or Atom feed of articles to link to Startups"""
+
+    url = URLField(max_length=255, unique=True)
+    # recorded by organizer.feeds
+    etag = CharField(
+        max_length=255, blank=True, editable=False
+    )
+    last_modified = CharField(
+        max_length=63, blank=True, editable=False
+    )
+    fetched = DateTimeField(null=True, editable=False)
+
+    class Meta:
+        ordering = ["url"]
+
+    def __str__(self):
+        return self.url
@@ -0,0 +1,238 @@
+"""Store Open Graph previews of NewsLink articles
+
+fetch_previews() picks the NewsLinks whose preview is missing
+or older than a time to live, downloads the start of each
+article concurrently with asyncio, and reads its Open Graph
+title, description and image (falling back to <title> and
+<meta name="description">). Previews are written with one
+UPDATE per batch. Run it from the fetch_previews management
+command, on a schedule.
+
+Pages and serializers only read the stored fields: no
+request waits for another site. As for link checks, private
+addresses are refused (see organizer.linkcheck), so no page
+of an internal service is fetched and published.
+
+The Open Graph protocol: https://ogp.me/
+"""
+import asyncio
+import codecs
+from datetime import timedelta
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+import aiohttp
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.bulk import bulk_update
+
+from .linkcheck import (
+    USER_AGENT,
+    HostLimiter,
+    PublicConnector,
+)
+from .models import NewsLink
+
+MAX_HEAD_BYTES = 256 * 1024
+MAX_DESCRIPTION = 1000
+PROPERTIES = {
+    "og:title": "title",
+    "og:description": "description",
+    "og:image": "image",
+    "og:image:url": "image",
+    "og:image:secure_url": "image",
+}
+
+
+class HeadParser(HTMLParser):
+    """Read preview metadata from the <head> of a page"""
+
+    def __init__(self):
+        """Start with no metadata"""
+        super().__init__(convert_charrefs=True)
+        self.found = {}
+        self.fallback = {}
+        self.done = False
+        self._in_title = False
+        self._title = []
+
+    def handle_starttag(self, tag, attrs):
+        """Record <meta> tags; stop at <body>"""
+        if tag == "body":
+            self.done = True
+        elif tag == "title":
+            self._in_title = True
+        elif tag == "meta":
+            attrs = dict(attrs)
+            content = (attrs.get("content") or "").strip()
+            name = PROPERTIES.get(
+                (attrs.get("property") or "").lower()
+            )
+            if name and content:
+                self.found.setdefault(name, content)
+            elif (
+                attrs.get("name") or ""
+            ).lower() == "description" and content:
+                self.fallback.setdefault(
+                    "description", content
+                )
+
+    def handle_endtag(self, tag):
+        """Finish the title; stop at </head>"""
+        if tag == "title":
+            self._in_title = False
+            self.fallback.setdefault(
+                "title",
+                " ".join("".join(self._title).split()),
+            )
+        elif tag == "head":
+            self.done = True
+
+    def handle_data(self, data):
+        """Collect the text of <title>"""
+        if self._in_title:
+            self._title.append(data)
+
+    def preview(self, base_url):
+        """Return {title, description, image} for the page"""
+        values = dict(self.fallback, **self.found)
+        image = urljoin(base_url, values.get("image", ""))
+        if urlsplit(image).scheme not in ("http", "https"):
+            image = ""
+        return {
+            "preview_title": values.get("title", "")[:255],
+            "preview_description": values.get(
+                "description", ""
+            )[:MAX_DESCRIPTION],
+            "preview_image": image
+            if len(image) <= 500
+            else "",
+        }
+
+
+async def fetch_preview(session, limiter, url):
+    """Return the preview fields of url, or None"""
+    async with limiter.slot(urlsplit(url).hostname or ""):
+        async with session.get(
+            url, allow_redirects=True, max_redirects=5
+        ) as response:
+            if (
+                response.status != 200
+                or response.content_type != "text/html"
+            ):
+                return None
+            decoder = codecs.getincrementaldecoder(
+                response.charset or "utf-8"
+            )(errors="replace")
+            parser = HeadParser()
+            size = 0
+            async for chunk in response.content.iter_chunked(
+                16 * 1024
+            ):
+                size += len(chunk)
+                parser.feed(decoder.decode(chunk))
+                if parser.done or size >= MAX_HEAD_BYTES:
+                    break
+            return parser.preview(str(response.url))
+
+
+async def fetch_all(
+    urls, concurrency=20, per_host=2, timeout=10.0
+):
+    """Fetch previews of urls; return {url: fields}
+
+    URLs that fail have a value of None.
+    """
+    limiter = HostLimiter(per_host, interval=0)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with aiohttp.ClientSession(
+        connector=PublicConnector(),
+        headers={"User-Agent": USER_AGENT},
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    ) as session:
+
+        async def fetch(url):
+            """Fetch url, turning failures into None"""
+            async with semaphore:
+                try:
+                    return (
+                        url,
+                        await fetch_preview(
+                            session, limiter, url
+                        ),
+                    )
+                except (
+                    aiohttp.ClientError,
+                    asyncio.TimeoutError,
+                    LookupError,  # unknown charset
+                    ValueError,
+                ):
+                    return url, None
+
+        results = await asyncio.gather(
+            *(fetch(url) for url in set(urls))
+        )
+    return dict(results)
+
+
+def fetch_previews(
+    max_age=None,
+    batch_size=200,
+    limit=None,
+    pks=None,
+    **fetch_options,
+):
+    """Store previews not fetched within max_age
+
+    max_age is a timedelta (default: 30 days); options are
+    passed to fetch_all(). If pks is given, only NewsLinks
+    with those primary keys are fetched, however recently.
+    A failed fetch keeps the old preview until the next
+    attempt, max_age later. Returns the number of links
+    fetched and how many have a preview.
+    """
+    max_age = max_age or timedelta(days=30)
+    cutoff = timezone.now() - (
+        max_age if pks is None else timedelta()
+    )
+    stale = NewsLink.objects.filter(
+        Q(preview_fetched__isnull=True)
+        | Q(preview_fetched__lt=cutoff)
+    )
+    if pks is not None:
+        stale = stale.filter(pk__in=pks)
+    stale = stale.order_by(
+        F("preview_fetched").asc(nulls_first=True), "pk"
+    )
+    counts = {"fetched": 0, "previewed": 0}
+    while limit is None or counts["fetched"] < limit:
+        size = (
+            batch_size
+            if limit is None
+            else min(batch_size, limit - counts["fetched"])
+        )
+        rows = list(stale.values_list("pk", "link")[:size])
+        if not rows:
+            break
+        results = asyncio.run(
+            fetch_all(
+                [url for _pk, url in rows], **fetch_options
+            )
+        )
+        now = timezone.now()
+        failed = {}
+        values = {}
+        for pk, url in rows:
+            fields = results[url]
+            if fields is None:
+                failed[pk] = {"preview_fetched": now}
+            else:
+                values[pk] = dict(
+                    fields, preview_fetched=now
+                )
+        bulk_update(NewsLink, values)
+        bulk_update(NewsLink, failed)
+        counts["fetched"] += len(rows)
+        counts["previewed"] += len(values)
+    return counts
@@ -11,12 +11,43 @@ from rest_framework.serializers import (
     HyperlinkedRelatedField,
     ModelSerializer,
     SerializerMethodField,
+    ValidationError,
 )
 
+from core.serializers import TimedSerializerMixin
+
+from .catalog import catalog
+from .dedupe import link_hash
 from .models import NewsLink, Startup, Tag
 
 
-class TagSerializer(HyperlinkedModelSerializer):
+class TagHyperlinkField(HyperlinkedRelatedField):
+    """Link to Tags with the URLs of the catalog
+
+    Related Tags need only be loaded with their primary key:
+    Tag.objects.only("pk").
+    """
+
+    def __init__(self, **kwargs):
+        """Link to the API detail pages of Tags"""
+        kwargs.setdefault("lookup_field", "slug")
+        kwargs.setdefault("view_name", "api-tag-detail")
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        """Build the URL from the snapshot, if possible"""
+        entry = catalog.snapshot().get(value.pk)
+        if entry is None:
+            return super().to_representation(value)
+        request = self.context.get("request")
+        if request is None:
+            return entry.api_url
+        return request.build_absolute_uri(entry.api_url)
+
+
+class TagSerializer(
+    TimedSerializerMixin, HyperlinkedModelSerializer
+):
     """Serialize Tag data"""
 
     class Meta:
@@ -30,19 +61,16 @@ class TagSerializer(HyperlinkedModelSerializer):
         }
 
 
-class StartupSerializer(HyperlinkedModelSerializer):
+class StartupSerializer(
+    TimedSerializerMixin, HyperlinkedModelSerializer
+):
     """Serialize Startup data"""
 
-    tags = HyperlinkedRelatedField(
-        lookup_field="slug",
-        many=True,
-        read_only=True,
-        view_name="api-tag-detail",
-    )
+    tags = TagHyperlinkField(many=True, read_only=True)
 
     class Meta:
         model = Startup
-        fields = "__all__"
+        exclude = ("website_etag", "description_html")
         extra_kwargs = {
             "url": {
                 "lookup_field": "slug",
@@ -51,7 +79,20 @@ class StartupSerializer(HyperlinkedModelSerializer):
         }
 
 
-class NewsLinkSerializer(ModelSerializer):
+class StartupListSerializer(StartupSerializer):
+    """Serialize Startup data for lists: no description"""
+
+    class Meta(StartupSerializer.Meta):
+        exclude = (
+            "website_etag",
+            "description",
+            "description_html",
+        )
+
+
+class NewsLinkSerializer(
+    TimedSerializerMixin, ModelSerializer
+):
     """Serialize NewsLink data"""
 
     url = SerializerMethodField()
@@ -63,7 +104,7 @@ class NewsLinkSerializer(ModelSerializer):
 
     class Meta:
         model = NewsLink
-        exclude = ("id",)
+        exclude = ("id", "link_etag")
 
     def get_url(self, newslink):
         """Build full URL for NewsLink API detail"""
@@ -75,3 +116,23 @@ class NewsLinkSerializer(ModelSerializer):
             ),
             request=self.context["request"],
         )
+
+    def validate(self, data):
+        """Refuse a second link of the Startup to an article"""
+        link = data.get(
+            "link", getattr(self.instance, "link", None)
+        )
+        startup = data.get(
+            "startup",
+            getattr(self.instance, "startup", None),
+        )
+        if link and startup:
+            duplicates = NewsLink.objects.filter(
+                startup=startup, link_hash=link_hash(link)
+            ).exclude(pk=getattr(self.instance, "pk", None))
+            if duplicates.exists():
+                raise ValidationError(
+                    "The startup already links to this "
+                    "article."
+                )
+        return data
@@ -0,0 +1,25 @@
+"""The pages of Tags and Startups, listed in the sitemap
+
+See core.sitemaps.
+"""
+from core.sitemaps import Section, register_section
+
+from .models import Startup, Tag
+
+
+@register_section
+class TagSection(Section):
+    """Each Tag's page"""
+
+    name = "tag"
+    model = Tag
+    url_name = "tag_detail"
+
+
+@register_section
+class StartupSection(Section):
+    """Each Startup's page"""
+
+    name = "startup"
+    model = Startup
+    url_name = "startup_detail"
@@ -0,0 +1,77 @@
+"""RSS and Atom feeds of the NewsLinks of each Startup
+
+Feeds are cached until a NewsLink or Startup changes; see
+core.syndication.
+"""
+from django.shortcuts import get_object_or_404
+
+from core.syndication import (
+    AtomFeedMixin,
+    CachedFeed,
+    bump_on_change,
+    pubdate,
+)
+
+from .models import NewsLink, Startup
+
+VERSION = "feeds:newslinks"
+
+
+class StartupNewsFeed(CachedFeed):
+    """The newest NewsLinks of a Startup"""
+
+    version = VERSION
+
+    def get_object(self, request, slug):
+        """Find the Startup, without its description"""
+        return get_object_or_404(
+            Startup.objects.only("name", "slug"), slug=slug
+        )
+
+    def title(self, obj):
+        """Title the feed after the Startup"""
+        return f"News about {obj.name}"
+
+    def description(self, obj):
+        """Describe the feed"""
+        return f"Articles about {obj.name}"
+
+    def link(self, obj):
+        """Link to the Startup's page"""
+        return obj.get_absolute_url()
+
+    def items(self, obj):
+        """Load the newest NewsLinks of the Startup"""
+        return (
+            NewsLink.objects.filter(startup=obj)
+            .only("title", "link", "pub_date", "startup_id")
+            .order_by("-pub_date", "-pk")[: self.max_items]
+        )
+
+    def item_title(self, item):
+        """Title each item after its NewsLink"""
+        return item.title
+
+    def item_description(self, item):
+        """Leave items without a description"""
+        return ""
+
+    def item_link(self, item):
+        """Link to the article itself"""
+        return item.link
+
+    def item_guid(self, item):
+        """Identify each item by its article's URL"""
+        return item.link
+
+    def item_pubdate(self, item):
+        """Date each item with its NewsLink"""
+        return pubdate(item.pub_date)
+
+
+class AtomStartupNewsFeed(AtomFeedMixin, StartupNewsFeed):
+    """The newest NewsLinks of a Startup, in Atom"""
+
+
+bump_on_change(VERSION, NewsLink)
+bump_on_change(VERSION, Startup)
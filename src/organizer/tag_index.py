@@ -0,0 +1,368 @@
+"""Filter objects by their Tags in memory, with bitmaps
+
+Each process keeps, for a model related to Tags (Startup,
+Post), the primary keys of the objects labelled with each
+Tag. Expressions such as "fintech,ai|ml,-b2b" (fintech AND
+(ai OR ml) AND NOT b2b) are answered with set algebra on
+those, then one pk__in query fetches the matching rows.
+
+Sets are bitmaps: Python integers whose bit n is set if the
+object with primary key n is in the set, so that AND, OR and
+NOT run in C over whole machine words. A bitmap takes as many
+bits as the highest primary key, so Tags on few objects keep
+a frozenset of primary keys instead, turned into a bitmap
+only when a filter uses them.
+
+m2m_changed, post_save and post_delete signals update the
+index of the process that saved, and bump its version stamp
+so that other processes rebuild theirs (see core.versions),
+once the transaction commits. Bulk inserts send no signals:
+call index.changed() after.
+"""
+from collections import namedtuple
+from functools import partial
+from types import MappingProxyType
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+)
+
+from core.versions import VersionedCache
+
+from .catalog import catalog
+from .models import Startup
+
+# keep a bitmap, not a set, for Tags on at least 1/256th of
+# the primary keys; a set takes ~350 bits per member
+DENSE_RATIO = 256
+
+TagFilterResult = namedtuple(
+    "TagFilterResult", ["pks", "facets"]
+)
+
+
+def bitmap(pks):
+    """Return the bitmap of primary keys pks"""
+    pks = list(pks)
+    if not pks:
+        return 0
+    bits = bytearray(max(pks) // 8 + 1)
+    for pk in pks:
+        bits[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(bits, "little")
+
+
+def members(bits):
+    """Return the primary keys in a bitmap, in order"""
+    digits = bin(bits)[:1:-1]  # lowest bit first
+    found = []
+    index = digits.find("1")
+    while index != -1:
+        found.append(index)
+        index = digits.find("1", index + 1)
+    return found
+
+
+def count(bits):
+    """Return the number of primary keys in a bitmap"""
+    return bin(bits).count("1")
+
+
+def parse(expression):
+    """Split a filter into AND-ed groups of OR-ed terms
+
+    Terms are (slug, negated) pairs:
+
+    >>> parse("fintech,ai|-ml")
+    [[('fintech', False)], [('ai', False), ('ml', True)]]
+    """
+    groups = []
+    for group in expression.split(","):
+        terms = []
+        for term in group.split("|"):
+            term = term.strip()
+            negated = term.startswith("-")
+            slug = term.lstrip("-")
+            if slug:
+                terms.append((slug, negated))
+        if terms:
+            groups.append(terms)
+    return groups
+
+
+class TagBitmaps:
+    """The objects of each Tag, at one version
+
+    sets maps Tag primary keys to a bitmap or a frozenset of
+    object primary keys; universe is the bitmap of every
+    object.
+    """
+
+    def __init__(self, universe, sets):
+        """Keep the sets; never change them"""
+        self.universe = universe
+        self.sets = MappingProxyType(sets)
+
+    def bits(self, tag_pk):
+        """Return the bitmap of the objects of a Tag"""
+        found = self.sets.get(tag_pk, 0)
+        if isinstance(found, frozenset):
+            return bitmap(found)
+        return found
+
+    def evaluate(self, groups, slugs):
+        """Return the bitmap of objects matching groups
+
+        slugs maps Tag slugs to primary keys; unknown slugs
+        match nothing.
+        """
+        result = self.universe
+        for terms in groups:
+            matched = 0
+            for slug, negated in terms:
+                tag_pk = slugs.get(slug)
+                bits = (
+                    0
+                    if tag_pk is None
+                    else self.bits(tag_pk)
+                )
+                if negated:
+                    bits = self.universe & ~bits
+                matched |= bits
+            result &= matched
+        return result
+
+    def facets(self, result):
+        """Count the objects of result with each Tag"""
+        counts = {}
+        result_set = None
+        for tag_pk, found in self.sets.items():
+            if isinstance(found, frozenset):
+                if result_set is None:
+                    result_set = frozenset(members(result))
+                number = len(found & result_set)
+            else:
+                number = count(found & result)
+            if number:
+                counts[tag_pk] = number
+        return counts
+
+    def added(self, pk):
+        """Return a copy with a new object, without Tags"""
+        return self.with_sets(
+            {}, universe=self.universe | bitmap([pk])
+        )
+
+    def removed(self, pk, universe=True):
+        """Return a copy without an object's Tags
+
+        Unless universe is False, the object is gone too.
+        """
+        return self.with_sets(
+            {
+                tag_pk: _remove(found, [pk])
+                for tag_pk, found in self.sets.items()
+            },
+            universe=self.universe & ~bitmap([pk])
+            if universe
+            else None,
+        )
+
+    def with_sets(self, changes, universe=None):
+        """Return a copy with some sets replaced
+
+        Empty sets are dropped.
+        """
+        sets = dict(self.sets)
+        for tag_pk, found in changes.items():
+            if found:
+                sets[tag_pk] = found
+            else:
+                sets.pop(tag_pk, None)
+        return TagBitmaps(
+            self.universe if universe is None else universe,
+            sets,
+        )
+
+
+def _relate(value, action, reverse, pk, pk_set):
+    """Return value with an m2m_changed action applied
+
+    pk is the object's primary key, or the Tag's if reverse
+    (as for tag.startup_set.add()).
+    """
+    if action == "post_clear":
+        if reverse:
+            return value.with_sets({pk: None})
+        return value.removed(pk, universe=False)
+    change = _add if action == "post_add" else _remove
+    if reverse:
+        changes = {pk: change(value.sets.get(pk), pk_set)}
+    else:
+        changes = {
+            tag_pk: change(value.sets.get(tag_pk), [pk])
+            for tag_pk in pk_set
+        }
+    return value.with_sets(changes)
+
+
+def _compact(pks, highest):
+    """Store pks as a bitmap if dense, else as a frozenset"""
+    if len(pks) * DENSE_RATIO >= highest:
+        return bitmap(pks)
+    return frozenset(pks)
+
+
+def _add(found, pks):
+    """Return the set found with pks added"""
+    if isinstance(found, frozenset) or found is None:
+        return (found or frozenset()) | frozenset(pks)
+    return found | bitmap(pks)
+
+
+def _remove(found, pks):
+    """Return the set found without pks"""
+    if found is None:
+        return None
+    if isinstance(found, frozenset):
+        return found - frozenset(pks)
+    return found & ~bitmap(pks)
+
+
+class TagIndex(VersionedCache):
+    """Tag bitmaps of the objects of model, kept current
+
+    field names the ManyToManyField to Tag.
+    """
+
+    def __init__(self, model, field="tags"):
+        """Follow changes to the Tags of model's objects"""
+        relation = model._meta.get_field(field)
+        label = f"{model._meta.label_lower}.{field}"
+        super().__init__(
+            f"tag-index:{label}", "TAG_INDEX_MAX_AGE"
+        )
+        self.model = model
+        self.through = relation.remote_field.through
+        self.source = f"{relation.m2m_field_name()}_id"
+        self.target = (
+            f"{relation.m2m_reverse_field_name()}_id"
+        )
+        m2m_changed.connect(
+            self.relations_changed,
+            sender=self.through,
+            weak=False,
+            dispatch_uid=f"{label}:m2m",
+        )
+        post_save.connect(
+            self.saved,
+            sender=model,
+            weak=False,
+            dispatch_uid=f"{label}:save",
+        )
+        post_delete.connect(
+            self.deleted,
+            sender=model,
+            weak=False,
+            dispatch_uid=f"{label}:delete",
+        )
+        post_delete.connect(
+            self.tag_deleted,
+            sender=relation.related_model,
+            weak=False,
+            dispatch_uid=f"{label}:tag-delete",
+        )
+
+    def build(self):
+        """Read every relation into new bitmaps"""
+        pks = list(
+            self.model._default_manager.values_list(
+                "pk", flat=True
+            )
+        )
+        highest = max(pks, default=0)
+        by_tag = {}
+        for pk, tag_pk in self.through.objects.values_list(
+            self.source, self.target
+        ).iterator():
+            by_tag.setdefault(tag_pk, []).append(pk)
+        return TagBitmaps(
+            bitmap(pks),
+            {
+                tag_pk: _compact(tagged, highest)
+                for tag_pk, tagged in by_tag.items()
+            },
+        )
+
+    def filter(self, expression):
+        """Return the pks matching expression, with facets
+
+        Facets map the slugs of Tags to the number of
+        matching objects with the Tag.
+        """
+        bitmaps = self.get()
+        snapshot = catalog.snapshot()
+        result = bitmaps.evaluate(
+            parse(expression),
+            {entry.slug: entry.pk for entry in snapshot},
+        )
+        facets = {}
+        for tag_pk, number in bitmaps.facets(
+            result
+        ).items():
+            entry = snapshot.get(tag_pk)
+            if entry is not None:
+                facets[entry.slug] = number
+        return TagFilterResult(members(result), facets)
+
+    def relations_changed(
+        self,
+        sender,
+        instance,
+        action,
+        reverse,
+        pk_set,
+        **kwargs,
+    ):
+        """Apply Tags added to or removed from objects"""
+        if action in (
+            "post_add",
+            "post_remove",
+            "post_clear",
+        ):
+            self.changed_on_commit(
+                partial(
+                    _relate,
+                    action=action,
+                    reverse=reverse,
+                    pk=instance.pk,
+                    pk_set=frozenset(pk_set or ()),
+                )
+            )
+
+    def saved(self, sender, instance, created, **kwargs):
+        """Count a new object in the universe"""
+        if created:
+            self.changed_on_commit(
+                partial(TagBitmaps.added, pk=instance.pk)
+            )
+
+    def deleted(self, sender, instance, **kwargs):
+        """Forget a deleted object"""
+        self.changed_on_commit(
+            partial(TagBitmaps.removed, pk=instance.pk)
+        )
+
+    def tag_deleted(self, sender, instance, **kwargs):
+        """Forget the objects of a deleted Tag"""
+        self.changed_on_commit(
+            partial(
+                TagBitmaps.with_sets,
+                changes={instance.pk: None},
+            )
+        )
+
+
+startup_index = TagIndex(Startup)
@@ -0,0 +1,56 @@
+"""Background tasks of the Organizer App
+
+Saving a Startup or NewsLink queues a check of its URL (and
+for NewsLinks, a fetch of the article preview); the job runs
+in a worker after the save commits. The scheduled commands
+(check_links, fetch_previews, ingest_feeds) are tasks too.
+"""
+from datetime import timedelta
+
+from jobs.queue import enqueue_on_save, task
+
+from .feeds import ingest_feeds as _ingest_feeds
+from .linkcheck import check_links as _check_links
+from .models import NewsLink, Startup
+from .previews import fetch_previews as _fetch_previews
+
+
+@task
+def check_links(targets=None, max_age_days=7, limit=None):
+    """Check links not checked within max_age_days"""
+    return _check_links(
+        targets=targets,
+        max_age=timedelta(days=max_age_days),
+        limit=limit,
+    )
+
+
+@task
+def fetch_previews(max_age_days=30, limit=None):
+    """Fetch previews older than max_age_days"""
+    return _fetch_previews(
+        max_age=timedelta(days=max_age_days), limit=limit
+    )
+
+
+@task(max_attempts=1)
+def ingest_feeds():
+    """Fetch every NewsFeed"""
+    return _ingest_feeds()
+
+
+@task
+def refresh_newslink(pk):
+    """Check the link of a NewsLink and fetch its preview"""
+    _check_links(targets=["newslink"], pks=[pk])
+    _fetch_previews(pks=[pk])
+
+
+@task
+def check_startup(pk):
+    """Check the website of a Startup"""
+    _check_links(targets=["startup"], pks=[pk])
+
+
+enqueue_on_save(NewsLink, refresh_newslink.name)
+enqueue_on_save(Startup, check_startup.name)
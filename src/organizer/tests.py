@@ -1,3 +1,1114 @@
-from django.test import TestCase
+"""Tests for the Organizer App"""
+from datetime import date
+from functools import partial
+from importlib import import_module
+from pathlib import Path
+from time import sleep
+from unittest.mock import patch
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from core import versions
+from core.models import Change
+from core.testing import QueryBudgetMixin, StandInServer
+
+from .catalog import VERSION, catalog
+from .dedupe import link_hash, normalize_url
+from .factories import (
+    NewsLinkFactory,
+    StartupFactory,
+    TagFactory,
+)
+from .feeds import (
+    FeedItem,
+    FeedParser,
+    StartupMatcher,
+    ingest_feeds,
+    insert_newslinks,
+)
+from .forms import NewsLinkForm, StartupForm
+from .linkcheck import NO_RESPONSE, LinkChecker, check_links
+from .models import NewsFeed, NewsLink, Tag
+from .previews import fetch_previews
+from .syndication import VERSION as NEWS_FEEDS
+from .tag_index import bitmap, members, parse, startup_index
+from .viewsets import StartupViewSet
+
+TESTDATA = Path(__file__).parent / "testdata"
+
+JSON = {"HTTP_ACCEPT": "application/json"}
+
+
+# count queries with a warm Tag catalog, as in production
+@override_settings(TAG_CATALOG_MAX_AGE=60)
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Check Organizer views avoid N+1 queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a Tag, Startup and NewsLink to display"""
+        cls.tag = TagFactory()
+        cls.startup = StartupFactory(tags=[cls.tag])
+        cls.newslink = NewsLinkFactory(startup=cls.startup)
+        cls.user = get_user_model().objects.create_user(
+            "budget", password="s3cr3t!!"
+        )
+
+    def grow(self):
+        """Add Tags, Startups and NewsLinks to each other"""
+        tags = TagFactory.create_batch(3)
+        self.startup.tags.add(*tags)
+        NewsLinkFactory.create_batch(
+            3, startup=self.startup
+        )
+        for startup in StartupFactory.create_batch(
+            3, tags=[self.tag, *tags]
+        ):
+            NewsLinkFactory.create_batch(2, startup=startup)
+
+    def test_tag_views(self):
+        """Display Tags in constant queries"""
+        self.assert_query_budget(0, reverse("tag_list"))
+        self.assert_query_budget(
+            2, self.tag.get_absolute_url()
+        )
+
+    def test_startup_views(self):
+        """Display Startups in constant queries"""
+        self.assert_query_budget(1, reverse("startup_list"))
+        self.assert_query_budget(
+            3, self.startup.get_absolute_url()
+        )
+
+    def test_newslink_views(self):
+        """Redirect to NewsLink's Startup in one query"""
+        url = reverse(
+            "newslink_detail",
+            kwargs={
+                "startup_slug": self.startup.slug,
+                "newslink_slug": self.newslink.slug,
+            },
+        )
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_form_views(self):
+        """Display forms in constant queries"""
+        self.client.force_login(self.user)
+        self.assert_query_budget(2, reverse("tag_create"))
+        self.assert_query_budget(
+            3, self.tag.get_update_url()
+        )
+        self.assert_query_budget(
+            2, reverse("startup_create")
+        )
+        self.assert_query_budget(
+            5, self.startup.get_update_url()
+        )
+        self.assert_query_budget(
+            4, self.startup.get_newslink_create_url()
+        )
+        self.assert_query_budget(
+            4, self.newslink.get_update_url()
+        )
+
+    def test_admin_changelists(self):
+        """List Organizer objects in the admin in constant queries"""
+        self.client.force_login(
+            get_user_model().objects.create_superuser(
+                "admin", "admin@example.com", "s3cr3t!!"
+            )
+        )
+        for name in ("tag", "startup", "newslink"):
+            self.assert_query_budget(
+                5,
+                reverse(
+                    f"admin:organizer_{name}_changelist"
+                ),
+            )
+
+    def test_tag_api(self):
+        """List and retrieve Tags in one query"""
+        self.assert_query_budget(
+            1, reverse("api-tag-list"), **JSON
+        )
+        self.assert_query_budget(
+            1,
+            reverse(
+                "api-tag-detail",
+                kwargs={"slug": self.tag.slug},
+            ),
+            **JSON,
+        )
+
+    def test_startup_api(self):
+        """List and retrieve Startups in constant queries"""
+        kwargs = {"slug": self.startup.slug}
+        self.assert_query_budget(
+            2, reverse("api-startup-list"), **JSON
+        )
+        self.assert_query_budget(
+            2,
+            reverse("api-startup-detail", kwargs=kwargs),
+            **JSON,
+        )
+        self.assert_query_budget(
+            2,
+            reverse("api-startup-tags", kwargs=kwargs),
+            **JSON,
+        )
+
+    def test_newslink_api(self):
+        """List and retrieve NewsLinks in one query"""
+        self.assert_query_budget(
+            1, reverse("api-newslink-list"), **JSON
+        )
+        self.assert_query_budget(
+            1,
+            reverse(
+                "api-newslink-detail",
+                kwargs={
+                    "startup_slug": self.startup.slug,
+                    "newslink_slug": self.newslink.slug,
+                },
+            ),
+            **JSON,
+        )
+
+
+def page(method, headers):
+    """Answer with a page that has an ETag"""
+    if headers.get("If-None-Match") == '"v1"':
+        return 304, {"ETag": '"v1"'}, b""
+    return 200, {"ETag": '"v1"'}, b"<html></html>"
+
+
+def no_head(method, headers):
+    """Refuse HEAD requests, like some servers do"""
+    if method == "HEAD":
+        return 405, {}, b""
+    return 200, {}, b"<html></html>"
+
+
+def slow(method, headers):
+    """Answer after the checker's timeout
+
+    aiohttp rounds timeouts up to whole seconds.
+    """
+    sleep(2)
+    return 200, {}, b""
+
+
+def moved(location, method, headers):
+    """Redirect to location"""
+    return 302, {"Location": location}, b""
+
+
+def busy(method, headers):
+    """Answer slowly enough for requests to overlap"""
+    sleep(0.05)
+    return 200, {}, b""
+
+
+@override_settings(
+    OUTBOUND_ALLOWED_NETWORKS=["127.0.0.1/32"]
+)
+class LinkCheckTests(TestCase):
+    """Check links are checked and results recorded"""
+
+    def checker(self, **kwargs):
+        """Return a fast LinkChecker for tests"""
+        return LinkChecker(
+            **dict(
+                {"host_interval": 0, "timeout": 0.5},
+                **kwargs,
+            )
+        )
+
+    def test_statuses_recorded(self):
+        """Record status, ETag and time of each link"""
+        routes = {
+            "/page": page,
+            "/no-head": no_head,
+            "/slow": slow,
+        }
+        with StandInServer(routes) as server:
+            startup = StartupFactory(
+                website=server.url("/page")
+            )
+            links = {
+                path: NewsLinkFactory(
+                    startup=startup, link=server.url(path)
+                )
+                for path in (
+                    "/page",
+                    "/no-head",
+                    "/slow",
+                    "/gone",
+                )
+            }
+            counts = check_links(checker=self.checker())
+        self.assertEqual(
+            counts,
+            {
+                "newslink": {"checked": 4, "broken": 2},
+                "startup": {"checked": 1, "broken": 0},
+            },
+        )
+        statuses = dict(
+            NewsLink.objects.values_list(
+                "link", "link_status"
+            )
+        )
+        self.assertEqual(
+            [
+                statuses[links[path].link]
+                for path in (
+                    "/page",
+                    "/no-head",
+                    "/slow",
+                    "/gone",
+                )
+            ],
+            [200, 200, 0, 404],
+        )
+        startup.refresh_from_db()
+        self.assertEqual(startup.website_etag, '"v1"')
+        self.assertIsNotNone(startup.website_checked)
+
+    def test_private_addresses(self):
+        """Refuse private addresses, also after redirects"""
+        with StandInServer(
+            {"/page": page}, host="127.0.0.2"
+        ) as private:
+            routes = {
+                "/moved": partial(
+                    moved, private.url("/page")
+                )
+            }
+            with StandInServer(routes) as server:
+                urls = {
+                    private.url("/page"): "",
+                    server.url("/moved"): "",
+                }
+                refused = self.checker().run(urls)
+                with override_settings(
+                    OUTBOUND_ALLOWED_NETWORKS=[
+                        "127.0.0.0/8"
+                    ]
+                ):
+                    allowed = self.checker().run(urls)
+        self.assertEqual(
+            set(refused.values()), {(NO_RESPONSE, "")}
+        )
+        self.assertEqual(
+            set(allowed.values()), {(200, '"v1"')}
+        )
+        self.assertEqual(len(private.requests), 2)
+
+    def test_recheck_with_etag(self):
+        """Re-check stale links with If-None-Match"""
+        with StandInServer({"/page": page}) as server:
+            link = NewsLinkFactory(link=server.url("/page"))
+            check_links(
+                ["newslink"], checker=self.checker()
+            )
+            # fresh links are skipped
+            check_links(
+                ["newslink"], checker=self.checker()
+            )
+            self.assertEqual(len(server.requests), 1)
+            NewsLink.objects.update(link_checked=None)
+            check_links(
+                ["newslink"], checker=self.checker()
+            )
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual(
+            server.requests[-1][2]["If-None-Match"], '"v1"'
+        )
+        link.refresh_from_db()
+        self.assertEqual(link.link_status, 200)
+
+    def test_per_host_limit(self):
+        """Send few concurrent requests to one host"""
+        with StandInServer({"/busy": busy}) as server:
+            startup = StartupFactory()
+            for number in range(6):
+                NewsLinkFactory(
+                    startup=startup,
+                    link=server.url(f"/busy?page={number}"),
+                )
+            check_links(
+                ["newslink"],
+                checker=self.checker(per_host=2),
+            )
+        self.assertEqual(len(server.requests), 6)
+        self.assertLessEqual(server.max_active, 2)
+
+
+def feed_file(name):
+    """Serve a file from testdata, with an ETag"""
+    content = (TESTDATA / name).read_bytes()
+
+    def route(method, headers):
+        """Answer 304 to clients that have the file"""
+        if headers.get("If-None-Match") == f'"{name}"':
+            return 304, {}, b""
+        return 200, {"ETag": f'"{name}"'}, content
+
+    return route
+
+
+@override_settings(
+    OUTBOUND_ALLOWED_NETWORKS=["127.0.0.1/32"]
+)
+class FeedIngestTests(TestCase):
+    """Check feed items become NewsLinks, once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create Startups for feed items to mention"""
+        cls.jambon = StartupFactory(
+            name="JamBon Software",
+            website="https://www.jambonsw.com/",
+        )
+        cls.monkey = StartupFactory(
+            name="Monkey Software",
+            website="https://monkey.example.org",
+        )
+
+    def test_normalize_url(self):
+        """Reduce variants of a URL to one key"""
+        self.assertEqual(
+            normalize_url(
+                "HTTPS://www.Example.com:443/a/"
+                "?utm_source=rss&b=2&a=1#top"
+            ),
+            "https://example.com/a?a=1&b=2",
+        )
+        self.assertEqual(
+            link_hash("http://example.com/a/"),
+            link_hash("http://www.example.com/a#b"),
+        )
+        # they may pick the content of the page
+        self.assertEqual(
+            normalize_url("https://a.com/?ref=1&source=2"),
+            "https://a.com?ref=1&source=2",
+        )
+
+    def test_rehash_migration(self):
+        """Hash links again as dedupe does now"""
+        newslink = NewsLinkFactory(
+            link="https://a.com/article?ref=1"
+        )
+        NewsLink.objects.update(
+            link_hash=link_hash("https://a.com/article")
+        )
+        import_module(
+            "organizer.migrations.0010_rehash_newslinks"
+        ).hash_links_again(apps, None)
+        newslink.refresh_from_db()
+        self.assertEqual(
+            newslink.link_hash,
+            link_hash("https://a.com/article?ref=1"),
+        )
+
+    def test_parse_in_chunks(self):
+        """Read items as chunks of the feed arrive"""
+        content = (TESTDATA / "rss.xml").read_bytes()
+        parser = FeedParser()
+        items = []
+        for start in range(0, len(content), 7):
+            items.extend(
+                parser.feed(content[start : start + 7])
+            )
+        items.extend(parser.close())
+        self.assertEqual(len(items), 4)
+        self.assertEqual(
+            items[0].title,
+            "JamBon Software Ships Django Course",
+        )
+        self.assertEqual(
+            items[0].pub_date, date(2018, 10, 19)
+        )
+        self.assertEqual(
+            items[0].summary,
+            "A new course on web development.",
+        )
+
+    def test_ingest(self):
+        """Match items to Startups; skip known links"""
+        NewsLinkFactory(
+            startup=self.monkey,
+            link="http://news.example.com/funding?utm_medium=x",
+        )
+        routes = {
+            "/rss": feed_file("rss.xml"),
+            "/atom": feed_file("atom.xml"),
+        }
+        with StandInServer(routes) as server:
+            NewsFeed.objects.create(url=server.url("/rss"))
+            NewsFeed.objects.create(url=server.url("/atom"))
+            counts = ingest_feeds()
+            self.assertEqual(
+                counts,
+                {
+                    "fetched": 2,
+                    "unchanged": 0,
+                    "failed": 0,
+                    "items": 5,
+                    "created": 2,
+                },
+            )
+            again = ingest_feeds()
+        self.assertEqual(again["unchanged"], 2)
+        self.assertEqual(again["created"], 0)
+        self.assertEqual(
+            sorted(
+                self.jambon.newslink_set.values_list(
+                    "link", flat=True
+                )
+            ),
+            [
+                "https://jambonsw.com/blog/office",
+                "https://news.example.com/jambon-course"
+                "?utm_source=rss",
+            ],
+        )
+        self.assertEqual(
+            self.monkey.newslink_set.count(), 1
+        )
+
+    def test_private_feed(self):
+        """Fetch no feed from private addresses"""
+        with StandInServer(
+            {"/rss": feed_file("rss.xml")}, host="127.0.0.2"
+        ) as private:
+            routes = {
+                "/moved": partial(
+                    moved, private.url("/rss")
+                )
+            }
+            with StandInServer(routes) as server:
+                NewsFeed.objects.create(
+                    url=private.url("/rss")
+                )
+                NewsFeed.objects.create(
+                    url=server.url("/moved")
+                )
+                counts = ingest_feeds(timeout=1)
+        self.assertEqual(counts["failed"], 2)
+        self.assertEqual(counts["created"], 0)
+        self.assertEqual(private.requests, [])
+
+    def test_match_whole_names(self):
+        """Match names whole and as written, or domains"""
+        matcher = StartupMatcher.from_database()
+
+        def match(title, link="https://news.example.com/"):
+            """Return the Startups an item matches"""
+            return matcher.match(
+                FeedItem(title, link, None, "")
+            )
+
+        self.assertEqual(
+            match("Monkey Software raises"),
+            {self.monkey.pk},
+        )
+        self.assertEqual(match("Monkey Business"), set())
+        self.assertEqual(match("monkey software"), set())
+        self.assertEqual(
+            match("Office", "https://jambonsw.com/office"),
+            {self.jambon.pk},
+        )
+
+    def test_insert_conflicts(self):
+        """Skip NewsLinks in conflict, keep the others"""
+        existing = NewsLinkFactory(startup=self.monkey)
+        newslinks = [
+            NewsLink(
+                title=title,
+                slug=slug,
+                pub_date=date(2018, 10, 19),
+                link=link,
+                link_hash=link_hash(link),
+                startup=self.monkey,
+            )
+            for title, slug, link in [
+                # inserted meanwhile, by another ingest
+                ("Again", "again", existing.link),
+                # the slug of another NewsLink
+                ("Slug", existing.slug, "https://a.com/1"),
+                ("New", "new", "https://a.com/2"),
+            ]
+        ]
+        inserted = insert_newslinks(newslinks)
+        self.assertEqual(
+            [newslink.title for newslink in inserted],
+            ["New"],
+        )
+        self.assertEqual(
+            self.monkey.newslink_set.count(), 2
+        )
+        # logged as added, for syncing clients
+        self.assertEqual(
+            list(
+                Change.objects.filter(
+                    kind="newslink", added=True
+                ).values_list("object_id", flat=True)
+            ),
+            [existing.pk, inserted[0].pk],
+        )
+
+    def test_form_duplicate(self):
+        """Refuse a second link of a Startup to an article"""
+        existing = NewsLinkFactory(startup=self.monkey)
+        form = NewsLinkForm(
+            {
+                "title": "Again",
+                "slug": "again",
+                "pub_date": "2018-10-19",
+                "link": existing.link + "?utm_source=x",
+                "startup": self.monkey.pk,
+            }
+        )
+        self.assertFalse(form.is_valid())
+        form = NewsLinkForm(
+            {
+                "title": existing.title,
+                "slug": existing.slug,
+                "pub_date": "2018-10-19",
+                "link": existing.link,
+                "startup": self.monkey.pk,
+            },
+            instance=existing,
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+
+
+ARTICLE = """<!DOCTYPE html>
+<html><head>
+<meta charset="iso-8859-1">
+<title>Fallback title</title>
+<meta property="og:title" content="Caf\xe9 opens">
+<meta name="description" content="Fallback &amp; more">
+<meta property="og:image" content="/cover.png">
+</head><body><p>Never parsed</p></body></html>
+""".encode(
+    "iso-8859-1"
+)
+
+
+def article(method, headers):
+    """Serve a page with Open Graph metadata"""
+    return (
+        200,
+        {"Content-Type": "text/html; charset=iso-8859-1"},
+        ARTICLE,
+    )
+
+
+def pdf(method, headers):
+    """Serve a document that is not HTML"""
+    return 200, {"Content-Type": "application/pdf"}, b"%PDF"
+
+
+@override_settings(
+    OUTBOUND_ALLOWED_NETWORKS=["127.0.0.1/32"]
+)
+class PreviewTests(TestCase):
+    """Check previews are fetched, stored and displayed"""
+
+    def test_fetch_previews(self):
+        """Store Open Graph data; keep old data on failure"""
+        routes = {"/article": article, "/pdf": pdf}
+        with StandInServer(routes) as server:
+            startup = StartupFactory()
+            good = NewsLinkFactory(
+                startup=startup, link=server.url("/article")
+            )
+            other = NewsLinkFactory(
+                startup=startup,
+                link=server.url("/pdf"),
+                preview_title="Kept",
+            )
+            counts = fetch_previews(timeout=1)
+            again = fetch_previews(timeout=1)
+        self.assertEqual(
+            counts, {"fetched": 2, "previewed": 1}
+        )
+        self.assertEqual(
+            again, {"fetched": 0, "previewed": 0}
+        )
+        good.refresh_from_db()
+        self.assertEqual(
+            good.preview_title, "Caf\xe9 opens"
+        )
+        self.assertEqual(
+            good.preview_description, "Fallback & more"
+        )
+        self.assertEqual(
+            good.preview_image, server.url("/cover.png")
+        )
+        self.assertIsNotNone(good.preview_fetched)
+        other.refresh_from_db()
+        self.assertEqual(other.preview_title, "Kept")
+        self.assertIsNotNone(other.preview_fetched)
+
+    def test_private_addresses(self):
+        """Publish nothing from private addresses"""
+        with StandInServer(
+            {"/article": article}, host="127.0.0.2"
+        ) as private:
+            routes = {
+                "/moved": partial(
+                    moved, private.url("/article")
+                )
+            }
+            with StandInServer(routes) as server:
+                links = [
+                    NewsLinkFactory(
+                        link=private.url("/article")
+                    ),
+                    NewsLinkFactory(
+                        link=server.url("/moved")
+                    ),
+                ]
+                counts = fetch_previews(timeout=1)
+        self.assertEqual(
+            counts, {"fetched": 2, "previewed": 0}
+        )
+        self.assertEqual(private.requests, [])
+        for link in links:
+            link.refresh_from_db()
+            self.assertEqual(link.preview_title, "")
+
+    def test_detail_shows_stored_preview(self):
+        """Render previews without fetching anything"""
+        newslink = NewsLinkFactory(
+            link="http://127.0.0.1:9/unreachable",
+            preview_description="Stored summary",
+            preview_image="https://example.com/cover.png",
+        )
+        response = self.client.get(
+            newslink.startup.get_absolute_url()
+        )
+        self.assertContains(response, "Stored summary")
+        self.assertContains(
+            response, "https://example.com/cover.png"
+        )
+
+
+class AdminTests(TestCase):
+    """Check admin changelists page with cursors"""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create Tags and a staff user"""
+        for name in "abcde":
+            TagFactory(name=f"tag {name}")
+        cls.user = get_user_model().objects.create_superuser(
+            "admin", "admin@example.com", "s3cr3t!!"
+        )
+
+    def setUp(self):
+        """Log in; show two Tags per page"""
+        self.client.force_login(self.user)
+        tag_admin = admin.site._registry[Tag]
+        tag_admin.list_per_page = 2
+        self.addCleanup(
+            setattr, tag_admin, "list_per_page", 100
+        )
+
+    def names(self, response):
+        """Return the Tag names listed on the page"""
+        return [
+            tag.name
+            for tag in response.context["cl"].result_list
+        ]
+
+    def test_keyset_navigation(self):
+        """Follow next and previous links through Tags"""
+        url = reverse("admin:organizer_tag_changelist")
+        response = self.client.get(url)
+        self.assertEqual(
+            self.names(response), ["tag a", "tag b"]
+        )
+        pages = []
+        while True:
+            cl = response.context["cl"]
+            pages.append(self.names(response))
+            if not cl.next_url:
+                break
+            response = self.client.get(url + cl.next_url)
+        self.assertEqual(
+            pages,
+            [
+                ["tag a", "tag b"],
+                ["tag c", "tag d"],
+                ["tag e"],
+            ],
+        )
+        response = self.client.get(
+            url + response.context["cl"].previous_url
+        )
+        self.assertEqual(
+            self.names(response), ["tag c", "tag d"]
+        )
+        self.assertNotContains(response, "?p=")
+
+    def test_bad_cursor(self):
+        """Redirect to an error page for a broken cursor"""
+        response = self.client.get(
+            reverse("admin:organizer_tag_changelist"),
+            {"after": "broken"},
+        )
+        self.assertRedirects(
+            response,
+            reverse("admin:organizer_tag_changelist")
+            + "?e=1",
+        )
+
+    def test_search(self):
+        """Search by name prefix and NewsLinks by URL"""
+        response = self.client.get(
+            reverse("admin:organizer_tag_changelist"),
+            {"q": "tag c"},
+        )
+        self.assertEqual(self.names(response), ["tag c"])
+        newslink = NewsLinkFactory(
+            link="https://example.com/news/"
+        )
+        NewsLinkFactory()
+        response = self.client.get(
+            reverse("admin:organizer_newslink_changelist"),
+            {
+                "q": "http://www.example.com/news?utm_source=x"
+            },
+        )
+        self.assertEqual(
+            list(response.context["cl"].result_list),
+            [newslink],
+        )
+
+
+class AutocompleteTests(TestCase):
+    """Check autocomplete suggests by prefix"""
+
+    def test_tag_autocomplete(self):
+        """Suggest Tags starting with the term"""
+        django = TagFactory(name="django")
+        TagFactory(name="flask")
+        TagFactory(name="web django")
+        response = self.client.get(
+            reverse("tag_autocomplete"), {"q": "Dj"}
+        )
+        self.assertEqual(
+            response.json(),
+            {
+                "results": [
+                    {"id": django.pk, "text": "django"}
+                ]
+            },
+        )
+        response = self.client.get(
+            reverse("tag_autocomplete"), {"q": " "}
+        )
+        self.assertEqual(response.json(), {"results": []})
+
+    def test_startup_autocomplete(self):
+        """Suggest Startups by name or slug"""
+        startup = StartupFactory(
+            name="JamBon Software", slug="jambon-software"
+        )
+        StartupFactory(name="monkey software")
+        response = self.client.get(
+            reverse("startup_autocomplete"),
+            {"q": "jambon s"},
+        )
+        self.assertEqual(
+            response.json()["results"],
+            [{"id": startup.pk, "text": "JamBon Software"}],
+        )
+        other = StartupFactory(name="Bonjour", slug="hello")
+        response = self.client.get(
+            reverse("startup_autocomplete"), {"q": "bONJ"}
+        )
+        self.assertEqual(
+            response.json()["results"],
+            [{"id": other.pk, "text": "Bonjour"}],
+        )
+
+
+class CatalogTests(TestCase):
+    """Check the Tag catalog follows changes to Tags"""
+
+    def test_rebuilt_on_change(self):
+        """Build a new snapshot when a Tag is saved"""
+        tag = TagFactory(name="django")
+        before = catalog.snapshot()
+        self.assertEqual(
+            before.get(tag.pk).url, tag.get_absolute_url()
+        )
+        tag.name = "python"
+        tag.save()
+        after = catalog.snapshot()
+        self.assertIsNot(before, after)
+        self.assertEqual(after.get(tag.pk).name, "python")
+        self.assertEqual(before.get(tag.pk).name, "django")
+        tag.delete()
+        self.assertIsNone(catalog.snapshot().get(tag.pk))
+
+    @override_settings(TAG_CATALOG_MAX_AGE=60)
+    def test_other_processes(self):
+        """Check the stamp only once the snapshot is old"""
+        tag = TagFactory(name="django")
+        catalog.snapshot()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                [entry.pk for entry in catalog.snapshot()],
+                [tag.pk],
+            )
+        # as another process would, without expiring ours
+        Tag.objects.bulk_create([Tag(name="flask")])
+        versions.bump(VERSION)
+        self.assertEqual(len(catalog.snapshot()), 1)
+        catalog.expire()
+        self.assertEqual(
+            [entry.name for entry in catalog.snapshot()],
+            ["django", "flask"],
+        )
+
+    @override_settings(TAG_CATALOG_MAX_AGE=60)
+    def test_form_choices(self):
+        """List Tag choices without queries"""
+        tags = [TagFactory(name=name) for name in "ba"]
+        catalog.snapshot()
+        form = StartupForm()
+        with self.assertNumQueries(0):
+            choices = list(form.fields["tags"].choices)
+        self.assertEqual(
+            choices, [(tags[1].pk, "a"), (tags[0].pk, "b")]
+        )
+
+
+# the index is bumped and updated once changes commit
+@override_settings(TAG_INDEX_MAX_AGE=0)
+class TagIndexTests(TransactionTestCase):
+    """Check Startups are filtered by Tags in memory"""
+
+    def setUp(self):
+        """Tag four Startups"""
+        fintech, ai, b2b = (
+            TagFactory(name=name)
+            for name in ["fintech", "ai", "b2b"]
+        )
+        self.startups = [
+            StartupFactory(name="a", tags=[fintech, ai]),
+            StartupFactory(name="b", tags=[fintech, b2b]),
+            StartupFactory(name="c", tags=[ai]),
+            StartupFactory(name="d"),
+        ]
+
+    def names(self, expression):
+        """Return the names of the Startups matching"""
+        response = self.client.get(
+            reverse("api-startup-list"),
+            {"tags": expression},
+            **JSON,
+        )
+        return sorted(
+            startup["name"]
+            for startup in response.json()["results"]
+        )
+
+    def test_bitmaps(self):
+        """Turn primary keys into bitmaps and back"""
+        self.assertEqual(
+            members(bitmap([0, 9, 3])), [0, 3, 9]
+        )
+        self.assertEqual(members(0), [])
+        self.assertEqual(
+            parse("a, b|-c,"),
+            [[("a", False)], [("b", False), ("c", True)]],
+        )
+
+    def test_filter(self):
+        """Combine Tags with AND, OR and NOT"""
+        self.assertEqual(self.names("fintech,ai"), ["a"])
+        self.assertEqual(
+            self.names("b2b|ai"), ["a", "b", "c"]
+        )
+        self.assertEqual(self.names("-fintech"), ["c", "d"])
+        self.assertEqual(self.names("fintech,-ai"), ["b"])
+        self.assertEqual(self.names("unknown"), [])
+        response = self.client.get(
+            reverse("api-startup-list"),
+            {"tags": "fintech"},
+            **JSON,
+        )
+        self.assertEqual(response.json()["count"], 2)
+        self.assertEqual(
+            response.json()["facets"],
+            {"fintech": 2, "ai": 1, "b2b": 1},
+        )
+
+    def test_follows_changes(self):
+        """Apply Tag and Startup changes to the index"""
+        a, b, c, d = self.startups
+        fintech = Tag.objects.get(name="fintech")
+        startup_index.get()
+        d.tags.add(fintech)
+        fintech.startup_set.remove(a)
+        b.tags.clear()
+        self.assertEqual(self.names("fintech"), ["d"])
+        e = StartupFactory(name="e")
+        self.assertEqual(
+            self.names("-fintech"), ["a", "b", "c", "e"]
+        )
+        e.delete()
+        Tag.objects.get(name="ai").delete()
+        self.assertEqual(
+            self.names("-fintech"), ["a", "b", "c"]
+        )
+        self.assertEqual(self.names("ai"), [])
+
+    @patch.object(StartupViewSet, "page_size", 2)
+    def test_pages(self):
+        """Page through the Startups found"""
+        url = reverse("api-startup-list")
+        first = self.client.get(
+            url, {"tags": "-b2b"}, **JSON
+        ).json()
+        self.assertEqual(first["count"], 3)
+        self.assertIsNone(first["previous"])
+        second = self.client.get(
+            first["next"], **JSON
+        ).json()
+        self.assertIsNone(second["next"])
+        self.assertEqual(
+            [
+                startup["name"]
+                for startup in first["results"]
+                + second["results"]
+            ],
+            ["a", "c", "d"],
+        )
+        self.assertEqual(second["facets"], first["facets"])
+        previous = self.client.get(
+            second["previous"], **JSON
+        ).json()
+        self.assertEqual(
+            previous["results"], first["results"]
+        )
+        response = self.client.get(
+            url, {"tags": "ai", "after": "junk"}, **JSON
+        )
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(TAG_INDEX_MAX_AGE=60)
+    def test_updated_in_place(self):
+        """Apply changes without rebuilding the index"""
+        startup_index.get()
+        d = self.startups[3]
+        d.tags.add(Tag.objects.get(name="b2b"))
+        with self.assertNumQueries(0):
+            found = startup_index.get()
+        self.assertIn(
+            d.pk, members(found.bits(d.tags.get().pk))
+        )
+
+
+class NewsFeedTests(TransactionTestCase):
+    """Check the news feeds of Startups"""
+
+    def test_feed(self):
+        """Link to the Startup's articles, newest first"""
+        startup = StartupFactory()
+        NewsLinkFactory(
+            startup=startup,
+            pub_date=date(2018, 1, 1),
+            link="https://example.com/old",
+        )
+        NewsLinkFactory(
+            startup=startup,
+            pub_date=date(2019, 1, 1),
+            link="https://example.com/new",
+        )
+        NewsLinkFactory(link="https://example.com/other")
+        url = reverse(
+            "startup_news_atom_feed",
+            kwargs={"slug": startup.slug},
+        )
+        response = self.client.get(url)
+        content = response.content.decode()
+        self.assertLess(
+            content.index("example.com/new"),
+            content.index("example.com/old"),
+        )
+        self.assertNotIn("example.com/other", content)
+        etag = response["ETag"]
+        NewsLinkFactory(startup=startup)
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(
+        OUTBOUND_ALLOWED_NETWORKS=["127.0.0.1/32"]
+    )
+    def test_ingest(self):
+        """Expire the feeds as feeds add NewsLinks"""
+        StartupFactory(
+            name="JamBon Software",
+            website="https://www.jambonsw.com/",
+        )
+        with StandInServer(
+            {"/rss": feed_file("rss.xml")}
+        ) as server:
+            NewsFeed.objects.create(url=server.url("/rss"))
+            ingest_feeds()
+            stamp = versions.current(NEWS_FEEDS)
+            self.assertNotEqual(stamp, "")
+            # the feed is unchanged: nothing to add
+            ingest_feeds()
+        self.assertEqual(
+            versions.current(NEWS_FEEDS), stamp
+        )
+
+
+class ListPaginationTests(TestCase):
+    """Check lists page with cursors"""
+
+    def test_tag_pages(self):
+        """Link to the next page of Tags, and back"""
+        TagFactory.create_batch(101)
+        response = self.client.get(reverse("tag_list"))
+        self.assertEqual(
+            len(response.context["tag_list"]), 100
+        )
+        self.assertIsNone(response.context["previous_url"])
+        response = self.client.get(
+            reverse("tag_list")
+            + response.context["next_url"]
+        )
+        self.assertEqual(
+            len(response.context["tag_list"]), 1
+        )
+        self.assertIsNone(response.context["next_url"])
+        self.assertContains(response, 'rel="prev"')
+
+    def test_invalid_cursor(self):
+        """Answer 404 to cursors we did not make"""
+        response = self.client.get(
+            reverse("startup_list"), {"after": "nope"}
+        )
+        self.assertEqual(response.status_code, 404)
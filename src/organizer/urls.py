@@ -1,16 +1,22 @@
 """URL paths for Organizer App"""
 from django.urls import path
 
+from .syndication import (
+    AtomStartupNewsFeed,
+    StartupNewsFeed,
+)
 from .views import (
     NewsLinkCreate,
     NewsLinkDelete,
     NewsLinkDetail,
     NewsLinkUpdate,
+    StartupAutocomplete,
     StartupCreate,
     StartupDelete,
     StartupDetail,
     StartupList,
     StartupUpdate,
+    TagAutocomplete,
     TagCreate,
     TagDelete,
     TagDetail,
@@ -19,6 +25,16 @@ from .views import (
 )
 
 urlpatterns = [
+    path(
+        "autocomplete/startup/",
+        StartupAutocomplete.as_view(),
+        name="startup_autocomplete",
+    ),
+    path(
+        "autocomplete/tag/",
+        TagAutocomplete.as_view(),
+        name="tag_autocomplete",
+    ),
     path(
         "startup/",
         StartupList.as_view(),
@@ -34,6 +50,16 @@ urlpatterns = [
         StartupDetail.as_view(),
         name="startup_detail",
     ),
+    path(
+        "startup/<str:slug>/feed/",
+        StartupNewsFeed(),
+        name="startup_news_feed",
+    ),
+    path(
+        "startup/<str:slug>/feed/atom/",
+        AtomStartupNewsFeed(),
+        name="startup_news_atom_feed",
+    ),
     path(
         "startup/<str:slug>/delete/",
         StartupDelete.as_view(),
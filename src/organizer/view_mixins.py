@@ -2,6 +2,7 @@
 from django.core.exceptions import SuspiciousOperation
 from django.shortcuts import get_object_or_404
 
+from .catalog import related_tags
 from .models import NewsLink, Startup
 
 
@@ -21,6 +22,19 @@ class NewsLinkContextMixin:
         )
 
 
+class TagListContextMixin:
+    """Add the object's Tags, from the catalog, as tag_list"""
+
+    def get_context_data(self, **kwargs):
+        """Read names and URLs of Tags from the snapshot
+
+        http://ccbv.co.uk/ContextMixin
+        """
+        return super().get_context_data(
+            tag_list=related_tags(self.object), **kwargs
+        )
+
+
 class NewsLinkObjectMixin:
     """Django View mix-in to find NewsLinks"""
 
@@ -35,7 +49,9 @@ class NewsLinkObjectMixin:
             if hasattr(self, "get_queryset"):
                 queryset = self.get_queryset()
             else:
-                queryset = self.model.objects.all()
+                queryset = self.model.objects.select_related(
+                    "startup"
+                )
 
         # Django's View class puts URI kwargs in dictionary
         startup_slug = self.kwargs.get("startup_slug")
@@ -2,6 +2,7 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy
+from django.utils.text import slugify
 from django.views.generic import (
     CreateView,
     DeleteView,
@@ -11,11 +12,19 @@ from django.views.generic import (
     UpdateView,
 )
 
+from core.keyset import page_sequence
+from core.views import (
+    AutocompleteView,
+    KeysetPaginationMixin,
+)
+
+from .catalog import catalog
 from .forms import NewsLinkForm, StartupForm, TagForm
 from .models import NewsLink, Startup, Tag
 from .view_mixins import (
     NewsLinkContextMixin,
     NewsLinkObjectMixin,
+    TagListContextMixin,
     VerifyStartupFkToUriMixin,
 )
 
@@ -89,17 +98,32 @@ class NewsLinkUpdate(
     template_name = "newslink/form.html"
 
 
-class TagList(ListView):
-    """Display a list of Tags"""
+class TagList(KeysetPaginationMixin, ListView):
+    """Display a list of Tags, from the catalog"""
 
-    queryset = Tag.objects.all()
+    context_object_name = "tag_list"
+    page_size = 100
     template_name = "tag/list.html"
 
+    def get_queryset(self):
+        """List the Tags of the catalog's snapshot"""
+        return catalog.snapshot()
+
+    def paginate_keyset(self, snapshot, after, before):
+        """Find the page in the snapshot, by name"""
+        return page_sequence(
+            snapshot.entries,
+            snapshot.sort_keys,
+            self.page_size,
+            after,
+            before,
+        )
+
 
 class TagDetail(DetailView):
     """Display a single Tag"""
 
-    queryset = Tag.objects.all()
+    queryset = Tag.objects.prefetch_related("startup_set")
     template_name = "tag/detail.html"
 
 
@@ -146,17 +170,23 @@ class StartupDelete(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy("startup_list")
 
 
-class StartupList(ListView):
+class StartupList(KeysetPaginationMixin, ListView):
     """Display a list of Startups"""
 
-    queryset = Startup.objects.all()
+    context_object_name = "startup_list"
+    keys = [("name", False), ("pk", False)]
+    queryset = Startup.objects.defer(
+        "description", "description_html"
+    )
     template_name = "startup/list.html"
 
 
-class StartupDetail(DetailView):
+class StartupDetail(TagListContextMixin, DetailView):
     """Display a single Startup"""
 
-    queryset = Startup.objects.all()
+    queryset = Startup.objects.defer(
+        "description"
+    ).prefetch_related("newslink_set")
     template_name = "startup/detail.html"
 
 
@@ -167,3 +197,26 @@ class StartupUpdate(LoginRequiredMixin, UpdateView):
     model = Startup
     template_name = "startup/form.html"
     extra_context = {"update": True}
+
+
+class TagAutocomplete(AutocompleteView):
+    """Suggest Tags by the start of their name"""
+
+    queryset = Tag.objects.only("name")
+
+    def prefixes(self, term):
+        """Match names in any case"""
+        return {"name__istartswith": term}
+
+
+class StartupAutocomplete(AutocompleteView):
+    """Suggest Startups by the start of their name"""
+
+    queryset = Startup.objects.only("name").order_by("name")
+
+    def prefixes(self, term):
+        """Match names in any case, or slugs"""
+        return {
+            "name__istartswith": term,
+            "slug__startswith": slugify(term),
+        }
@@ -1,19 +1,93 @@
 """Viewsets for the Organizer App"""
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.status import (
     HTTP_204_NO_CONTENT,
     HTTP_400_BAD_REQUEST,
 )
+from rest_framework.utils.urls import (
+    remove_query_param,
+    replace_query_param,
+)
 from rest_framework.viewsets import ModelViewSet
 
+from core.keyset import AFTER_VAR, BEFORE_VAR, page_sequence
+
 from .models import NewsLink, Startup, Tag
 from .serializers import (
     NewsLinkSerializer,
+    StartupListSerializer,
     StartupSerializer,
     TagSerializer,
 )
+from .tag_index import startup_index
+
+
+class TagFilterMixin:
+    """Filter lists with ?tags=, using a TagIndex
+
+    ?tags=fintech,ai|ml,-b2b lists objects labelled fintech
+    AND (ai OR ml) AND NOT b2b. The response is then
+    {"count": ..., "next": ..., "previous": ...,
+    "results": [...], "facets": {...}}, where facets counts
+    the objects found labelled with each Tag slug. Results
+    are paged by primary key, page_size at a time: only the
+    primary keys of the page are queried. next and previous
+    are the URLs of the neighbouring pages, or None.
+    """
+
+    tag_index = None
+    page_size = 100
+
+    def list(self, request, *args, **kwargs):
+        """Filter by Tags, if asked to"""
+        expression = request.query_params.get("tags")
+        if expression is None:
+            return super().list(request, *args, **kwargs)
+        found = self.tag_index.filter(expression)
+        try:
+            page = page_sequence(
+                found.pks,
+                [(pk,) for pk in found.pks],
+                self.page_size,
+                request.query_params.get(AFTER_VAR),
+                request.query_params.get(BEFORE_VAR),
+            )
+        except ValueError:
+            raise NotFound("Invalid cursor")
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .filter(pk__in=page.object_list)
+            .order_by("pk")
+        )
+        serializer = self.get_serializer(
+            queryset, many=True
+        )
+        return Response(
+            {
+                "count": len(found.pks),
+                "next": self.cursor_url(
+                    AFTER_VAR, page.next
+                ),
+                "previous": self.cursor_url(
+                    BEFORE_VAR, page.previous
+                ),
+                "results": serializer.data,
+                "facets": found.facets,
+            }
+        )
+
+    def cursor_url(self, name, cursor):
+        """Return the URL of a page, or None"""
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        for var in (AFTER_VAR, BEFORE_VAR):
+            url = remove_query_param(url, var)
+        return replace_query_param(url, name, cursor)
 
 
 class TagViewSet(ModelViewSet):
@@ -24,12 +98,36 @@ class TagViewSet(ModelViewSet):
     serializer_class = TagSerializer
 
 
-class StartupViewSet(ModelViewSet):
+class StartupViewSet(TagFilterMixin, ModelViewSet):
     """A set of views for the Startup model"""
 
     lookup_field = "slug"
-    queryset = Startup.objects.all()
+    queryset = Startup.objects.prefetch_related(
+        Prefetch("tags", queryset=Tag.objects.only("pk"))
+    )
     serializer_class = StartupSerializer
+    tag_index = startup_index
+
+    def get_queryset(self):
+        """Load whole Tags when serializing them
+
+        Lists load the excerpt, not the description.
+        """
+        if self.action == "tags":
+            return Startup.objects.prefetch_related("tags")
+        if self.action == "list":
+            return (
+                super()
+                .get_queryset()
+                .defer("description", "description_html")
+            )
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        """Leave descriptions out of lists"""
+        if self.action == "list":
+            return StartupListSerializer
+        return super().get_serializer_class()
 
     @action(detail=True, methods=["HEAD", "GET", "POST"])
     def tags(self, request, slug=None):
@@ -56,7 +154,7 @@ class StartupViewSet(ModelViewSet):
 class NewsLinkViewSet(ModelViewSet):
     """A set of views for the Startup model"""
 
-    queryset = NewsLink.objects.all()
+    queryset = NewsLink.objects.select_related("startup")
     serializer_class = NewsLinkSerializer
 
     def get_object(self):